@@ -0,0 +1,153 @@
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+from rest_framework.response import Response
+
+from . import auth, conditional, dashboard, roles
+from .views import serialize
+
+# ==========================================
+#       ASYNC READ VIEWS (ASGI native ⚡)
+# ==========================================
+# DRF ke views sync hain: ASGI pe har request ek thread pakad leti hai. Ye views
+# list / detail / dashboard ke GET async ORM (aiterator, acount, aaggregate) se
+# chalate hain. Queryset, filters, permissions, pagination aur serializer wahi DRF
+# class se aate hain (`view_class`), isliye response sync endpoint jaisa hi hai:
+#
+#   /api/async/leads/?cursor=      == /api/leads/?cursor=
+#   /api/async/dashboard/stats/    == /api/dashboard/stats/
+#
+# Jo path abhi sync hi hai (delta sync ?since=, DB wala auth fallback) wo
+# sync_to_async se thread me chalta hai. WSGI (gunicorn) pe bhi ye kaam karte hain,
+# bas wahan fayda nahi — `manage.py bench_reads` dono ko compare karta hai.
+
+LIST_CHUNK_SIZE = 200
+
+
+def plain_response(response):
+    """
+    DRF Response ko yahin render karke plain HttpResponse. Warna Django ka ASGI handler
+    `render()` ke liye har response pe thread hop karta hai.
+    """
+    if not isinstance(response, Response):
+        return response  # 304 (HttpResponseNotModified) waise hi plain hai
+    response.render()
+    plain = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        plain[header] = value
+    return plain
+
+
+class AsyncReadView(View):
+    """`view_class` (DRF view) ka async GET. Subclasses `respond()` likhte hain."""
+    view_class = None
+    http_method_names = ['get', 'head', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        view = self.view_class()
+        view.args, view.kwargs = args, kwargs
+        view.headers = view.default_response_headers
+        drf_request = view.initialize_request(request, *args, **kwargs)
+        view.request = drf_request
+
+        try:
+            await self.authenticate(drf_request)
+            # User set ho chuka hai: permissions / negotiation me koi DB nahi
+            view.initial(drf_request, *args, **kwargs)
+            response = await self.conditional_respond(view, drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        return plain_response(view.finalize_response(drf_request, response, *args, **kwargs))
+
+    async def authenticate(self, request):
+        # DRF ka lazy request.user async context me DB query chala deta (SynchronousOnlyOperation)
+        try:
+            for authenticator in request.authenticators:
+                result = None
+                if isinstance(authenticator, auth.ClaimsJWTAuthentication):
+                    result = authenticator.authenticate_claims(request)
+                if result is None or result[0] is None:
+                    result = await sync_to_async(authenticator.authenticate)(request)
+                if result is not None:
+                    request._authenticator = authenticator
+                    request.user, request.auth = result
+                    break
+            else:
+                request._not_authenticated()
+                return
+        except Exception:
+            request._not_authenticated()
+            raise
+
+        if not isinstance(request.user, auth.ClaimsUser):
+            # DB waale user ke roles bhi yahin memoize, taaki get_queryset sync DB na chhede
+            await sync_to_async(roles.get_roles)(request.user)
+
+    async def conditional_respond(self, view, request, *args, **kwargs):
+        if not conditional.enabled():
+            return await self.respond(view, request, *args, **kwargs)
+
+        etag, last_modified = conditional.compute_etag(
+            request, type(view).__name__, view.get_etag_models(), *view.get_etag_extra()
+        )
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        return conditional.stamp(await self.respond(view, request, *args, **kwargs), etag, last_modified)
+
+    async def respond(self, view, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    """BaseListCreateView subclasses ka async list (keyset / page-number / poori list)."""
+
+    async def respond(self, view, request, *args, **kwargs):
+        if 'since' in request.query_params:
+            # Delta sync (sync.changes) sync hi hai
+            return await sync_to_async(view.list)(request, *args, **kwargs)
+
+        queryset = view.filter_queryset(view.get_queryset())
+        plan = view.get_values_plan()
+        if plan is not None:
+            queryset = view.values_queryset(plan, queryset)
+        paginator = view.paginator
+        if paginator is None:
+            rows = [obj async for obj in queryset.aiterator(chunk_size=LIST_CHUNK_SIZE)]
+            return Response(view.serialize_rows(rows, plan))
+
+        if paginator.cursor_query_param in request.query_params:
+            page_queryset = paginator.page_queryset(queryset, request, view)
+            page = paginator.set_page([obj async for obj in page_queryset])
+        else:
+            fallback_class = getattr(view, 'fallback_pagination_class', None)
+            if fallback_class is None:
+                rows = [obj async for obj in queryset.aiterator(chunk_size=LIST_CHUNK_SIZE)]
+                return Response(view.serialize_rows(rows, plan))
+            paginator.fallback = fallback_class()
+            page = await paginator.fallback.apaginate_queryset(queryset, request, view=view)
+        return paginator.get_paginated_response(view.serialize_rows(page, plan))
+
+
+class AsyncDetailView(AsyncReadView):
+    """BaseDetailView subclasses ka async retrieve."""
+
+    async def respond(self, view, request, *args, **kwargs):
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            obj = await queryset.aget(**{view.lookup_field: kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404("No %s matches the given query." % queryset.model._meta.object_name)
+        view.check_object_permissions(request, obj)
+        return Response(serialize(view.get_serializer(obj)))
+
+
+class AsyncDashboardStats(AsyncReadView):
+    """DashboardStats ka async version: independent queries asyncio.gather se."""
+
+    async def respond(self, view, request, *args, **kwargs):
+        return Response(await dashboard.aget_stats(request.user, date.today()))
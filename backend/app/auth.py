@@ -0,0 +1,124 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import caching, roles
+
+# ==========================================
+#       CLAIMS-BASED JWT AUTH (GET pe DB hit nahi 🔑)
+# ==========================================
+# Login / refresh pe access token me user ke groups, superuser/staff flag aur
+# `claims_at` (kab calculate hue) daale jaate hain. Safe-method requests pe user seedha
+# token claims se banta hai — na auth_user query, na groups query.
+#
+# Writes (aur CRM_JWT_CLAIMS_FOR_WRITES=False) aur "revoked" users ke liye normal DB
+# lookup hota hai. Revoke = user ke groups / is_active / superuser badle (signals.py):
+# us time se pehle bane claims pe bharosa nahi, DB se user aata hai (inactive = 401).
+# Markers cache me hain — LocMem (per worker) pe dusre workers tak revoke nahi
+# pahunchta, isliye CRM_JWT_CLAIMS_AUTH unset ho to ye sirf shared cache pe on hai.
+
+GROUPS_CLAIM = 'groups'
+CLAIMS_AT_CLAIM = 'claims_at'
+
+_REVOKED_PREFIX = 'crm:auth:revoked'
+_REVOKED_ALL_KEY = 'crm:auth:revoked:all'
+
+
+def add_claims(token, user):
+    token['username'] = user.get_username()
+    token['is_superuser'] = user.is_superuser
+    token['is_staff'] = user.is_staff
+    token[GROUPS_CLAIM] = sorted(roles.get_roles(user))
+    token[CLAIMS_AT_CLAIM] = time.time()
+    return token
+
+
+# --- Revocation markers ---
+def _marker_timeout():
+    # Isse purane claims waale access tokens waise bhi expire ho chuke honge
+    return int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 60
+
+
+def revoke_user(user_id):
+    cache.set(f'{_REVOKED_PREFIX}:{user_id}', time.time(), _marker_timeout())
+
+
+def revoke_all():
+    cache.set(_REVOKED_ALL_KEY, time.time(), _marker_timeout())
+
+
+def claims_are_fresh(token):
+    claims_at = token.get(CLAIMS_AT_CLAIM)
+    if claims_at is None or GROUPS_CLAIM not in token:
+        return False  # Purane tokens (is feature se pehle ke)
+    user_key = f'{_REVOKED_PREFIX}:{token[api_settings.USER_ID_CLAIM]}'
+    markers = cache.get_many([user_key, _REVOKED_ALL_KEY])
+    return all(claims_at > revoked_at for revoked_at in markers.values())
+
+
+class ClaimsUser(TokenUser):
+    """TokenUser jiske roles claims se pehle hi memoized hain (roles.get_roles DB nahi jata)."""
+
+    def __init__(self, token):
+        super().__init__(token)
+        setattr(self, roles._USER_ATTR, frozenset(token.get(GROUPS_CLAIM, ())))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def use_claims(self, request):
+        if not caching.setting_or_shared('CRM_JWT_CLAIMS_AUTH'):
+            return False
+        return request.method in SAFE_METHODS or getattr(settings, 'CRM_JWT_CLAIMS_FOR_WRITES', False)
+
+    def authenticate(self, request):
+        result = self.authenticate_claims(request)
+        if result is None:
+            return None
+        user, validated_token = result
+        if user is None:
+            # Fallback: poora User DB se (inactive / deleted user yahin 401 paata hai)
+            user = self.get_user(validated_token)
+        return user, validated_token
+
+    def authenticate_claims(self, request):
+        """
+        authenticate() ka DB-free hissa: None (header nahi) ya (user, token), jahan user
+        None = DB lookup chahiye. Async views isse event loop me hi auth kar lete hain.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if self.use_claims(request) and claims_are_fresh(validated_token):
+            return ClaimsUser(validated_token), validated_token
+        return None, validated_token
+
+
+# ==========================================
+#       TOKEN REFRESH (claims dobara DB se)
+# ==========================================
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh token ke claims login ke time ke hain. Naya access token banate waqt
+    groups/flags DB se dobara bharo (ek query per refresh), warna group change ke
+    baad bhi purane roles aage copy hote rahenge.
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]})
+        data['access'] = str(add_claims(access, user))
+        return data
@@ -0,0 +1,275 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models, transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import fingerprints, funnel
+from .exports import ListViewMixin
+from .models import FingerprintMixin
+from .signals import records_changed
+
+# ==========================================
+#       BULK UPDATE / DELETE (har resource pe 🧹)
+# ==========================================
+# 200 rows ke liye 200 PATCH ki jagah ek request, ek transaction:
+#
+#   POST /api/leads/bulk-update/  {"ids": [1, 2, 3], "patch": {"status": "Interested"}}
+#   POST /api/tasks/bulk-update/  {"filter": {"status": "Pending", "date__lt": "2024-01-01"},
+#                                  "patch": {"status": "Completed"}}
+#   POST /api/tenders/bulk-update/ {"updates": [{"id": 4, "status": "Won"}, {"id": 9, "remarks": "..."}]}
+#   POST /api/tasks/bulk-delete/  {"ids": [...]} ya {"filter": {...}}
+#
+# Permissions list view ki (IsTechTeamOrReadOnly wagairah) aur rows bhi list view ke
+# get_queryset se (role scoping) — jo row user ko list me nahi dikhti wo `not_found`.
+# Same patch = ek `UPDATE ... WHERE id IN`, per-row patches = bulk_update (CASE WHEN).
+# Patch serializer se validate hota hai (partial=True), isliye choices/types wahi.
+
+FILTER_LOOKUPS = ('exact', 'iexact', 'in', 'lt', 'lte', 'gt', 'gte', 'isnull')
+
+
+class BulkError(Exception):
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail if isinstance(detail, dict) else {'error': detail}
+
+
+def max_rows():
+    return getattr(settings, 'CRM_BULK_MAX_ROWS', 1000)
+
+
+def parse_ids(raw):
+    if raw is None:
+        return None
+    if not isinstance(raw, list):
+        raise BulkError("`ids` must be a list")
+    try:
+        ids = list(dict.fromkeys(int(pk) for pk in raw))
+    except (TypeError, ValueError):
+        raise BulkError("`ids` must be integers")
+    if len(ids) > max_rows():
+        raise BulkError(f"At most {max_rows()} ids per request")
+    return ids
+
+
+def parse_filter(model, raw):
+    """{"status": "New", "date__lt": "..."} -> filter kwargs. Sirf apne columns, koi join nahi."""
+    if raw is None:
+        return None
+    if not isinstance(raw, dict) or not raw:
+        raise BulkError("`filter` must be a non-empty object")
+
+    lookups = {}
+    for key, value in raw.items():
+        name, _, lookup = key.partition('__')
+        lookup = lookup or 'exact'
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.concrete or lookup not in FILTER_LOOKUPS:
+            raise BulkError({'error': "Unsupported filter", 'filter': {key: "Unknown field or lookup"}})
+        try:
+            if lookup == 'isnull':
+                value = bool(value)
+            elif lookup == 'in':
+                if not isinstance(value, list):
+                    raise ValueError
+                value = [_to_python(field, item) for item in value]
+            else:
+                value = _to_python(field, value)
+        except (TypeError, ValueError, ValidationError):
+            raise BulkError({'error': "Invalid filter value", 'filter': {key: "Invalid value"}})
+        # owner -> owner_id: FK pe join nahi, seedha column
+        lookups[f'{field.attname}__{lookup}'] = value
+    return lookups
+
+
+def _to_python(field, value):
+    if field.is_relation:
+        field = field.target_field
+    return field.to_python(value)
+
+
+def validate_patch(view, patch):
+    """Serializer (partial) se validate; validated_data ya BulkError."""
+    if not isinstance(patch, dict) or not patch:
+        raise BulkError("`patch` must be a non-empty object")
+    serializer = view.get_serializer(data=patch, partial=True)
+    errors = {}
+    for name in patch:
+        field = serializer.fields.get(name)
+        if field is None or field.read_only:
+            errors[name] = ["Not a writable field."]
+        elif isinstance(_model_field(view.model, name), models.FileField):
+            errors[name] = ["Files can't be bulk updated."]
+    if not errors and not serializer.is_valid():
+        errors = serializer.errors
+    if errors:
+        raise BulkError({'error': "Invalid patch", 'patch': errors})
+    return serializer.validated_data
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def needs_fingerprint(model, fields):
+    # Fingerprint company/contact/email se banta hai: ye badle to rows load karke recompute
+    return issubclass(model, FingerprintMixin) and bool(set(fields) & set(fingerprints.FINGERPRINT_FIELDS))
+
+
+def needs_save(model, fields):
+    # Model.BULK_SAVE_FIELDS badle to har row ka save() (e.g. Payment amount -> ledger balances)
+    return bool(set(fields) & set(getattr(model, 'BULK_SAVE_FIELDS', ())))
+
+
+def needs_instances(model, fields):
+    # Lead status: purana status chahiye (history / funnel) — rows load, phir bhi ek bulk_update
+    return needs_fingerprint(model, fields) or needs_save(model, fields) or funnel.tracks(model, fields)
+
+
+def lock_ids(queryset):
+    """Target rows lock karo (Postgres FOR UPDATE) aur unke ids. Limit se zyada = error."""
+    limit = max_rows()
+    ids = list(queryset.select_for_update().order_by('pk').values_list('pk', flat=True)[:limit + 1])
+    if len(ids) > limit:
+        raise BulkError(f"More than {limit} rows match, narrow the filter")
+    return ids
+
+
+def results(requested, found, done):
+    """Per-id result list. `requested` None = filter mode (sirf mili hui rows)."""
+    found = set(found)
+    return [
+        {'id': pk, 'status': done if pk in found else 'not_found'}
+        for pk in (sorted(found) if requested is None else requested)
+    ]
+
+
+class BulkView(ListViewMixin, APIView):
+    using = 'default'
+
+    def get_targets(self, view, data):
+        ids = parse_ids(data.get('ids'))
+        lookups = parse_filter(view.model, data.get('filter'))
+        if ids is None and lookups is None:
+            raise BulkError("Provide `ids` or `filter`")
+        # List view ka get_queryset = role scoping (non-team user sirf apni rows)
+        queryset = view.get_queryset()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        if lookups:
+            queryset = queryset.filter(**lookups)
+        return ids, queryset
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, dict):
+            # JSON array / string body: .get() pe 500 nahi, seedha 400
+            return Response({'error': "Request body must be a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+        view = self.get_list_view(request)
+        try:
+            return self.perform(view, request.data)
+        except BulkError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BulkUpdateView(BulkView):
+    def perform(self, view, data):
+        if 'updates' in data:
+            return self.update_rows(view, data['updates'])
+
+        patch = validate_patch(view, data.get('patch'))
+        ids, queryset = self.get_targets(view, data)
+        model = view.model
+        with transaction.atomic(using=self.using):
+            found = lock_ids(queryset)
+            if found:
+                targets = model.objects.using(self.using).filter(pk__in=found)
+                if needs_instances(model, patch):
+                    instances = list(targets)
+                    for instance in instances:
+                        for name, value in patch.items():
+                            setattr(instance, name, value)
+                    self.save_instances(model, instances, patch)
+                else:
+                    targets.update(**patch)
+                records_changed.send(sender=model, pks=found, deleted=False, using=self.using)
+        return Response({'updated': len(found), 'results': results(ids, found, 'updated')})
+
+    def update_rows(self, view, rows):
+        """{"updates": [{"id": 1, ...patch}, ...]} — har row ka apna patch, ek bulk_update."""
+        if not isinstance(rows, list) or not rows:
+            raise BulkError("`updates` must be a non-empty list")
+        if len(rows) > max_rows():
+            raise BulkError(f"At most {max_rows()} rows per request")
+
+        patches, invalid = {}, []
+        for row in rows:
+            if not isinstance(row, dict) or 'id' not in row:
+                raise BulkError("Each update must be an object with an `id`")
+            row = dict(row)
+            pk = parse_ids([row.pop('id')])[0]
+            try:
+                patches[pk] = validate_patch(view, row)
+            except BulkError as e:
+                invalid.append({'id': pk, 'status': 'invalid', 'errors': e.detail.get('patch', e.detail)})
+        if invalid:
+            # Ek bhi row galat = kuch nahi likha jata (poora request ek transaction hai)
+            return Response({'error': "Invalid updates", 'results': invalid}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = view.model
+        fields = set()
+        for patch in patches.values():
+            fields.update(patch)
+        with transaction.atomic(using=self.using):
+            found = lock_ids(view.get_queryset().filter(pk__in=list(patches)))
+            instances = list(model.objects.using(self.using).filter(pk__in=found))
+            for instance in instances:
+                for name, value in patches[instance.pk].items():
+                    setattr(instance, name, value)
+            if instances:
+                self.save_instances(model, instances, fields)
+                records_changed.send(sender=model, pks=found, deleted=False, using=self.using)
+        return Response({'updated': len(found), 'results': results(list(patches), found, 'updated')})
+
+    def save_instances(self, model, instances, fields):
+        fields = set(fields)
+        if needs_save(model, fields):
+            # Signals chahiye: ek ek UPDATE, par sab isi transaction me
+            for instance in instances:
+                instance.save(using=self.using, update_fields=fields)
+            return
+        if needs_fingerprint(model, fields):
+            for instance in instances:
+                instance.refresh_fingerprint()
+            fields.add('fingerprint')
+        changes = []
+        if funnel.tracks(model, fields):
+            changes = funnel.transitions(instances, self.using)
+            fields.add('status_changed_at')
+        # TrackedQuerySet.update() (bulk_update iske through) updated_at/version bhi badhata hai
+        model.objects.using(self.using).bulk_update(instances, sorted(fields))
+        funnel.record(changes, self.using)
+
+
+class BulkDeleteView(BulkView):
+    def perform(self, view, data):
+        ids, queryset = self.get_targets(view, data)
+        model = view.model
+        with transaction.atomic(using=self.using):
+            found = lock_ids(queryset)
+            if found:
+                # Public delete(): cascades (Payment -> LedgerEntry) aur post_delete signals
+                # (ledger, search index, tombstones, caches) — sab isi transaction me
+                model.objects.using(self.using).filter(pk__in=found).delete()
+        name = model._meta.verbose_name_plural
+        return Response({
+            'message': f"Deleted {len(found)} {name}!",
+            'deleted': len(found),
+            'results': results(ids, found, 'deleted'),
+        })
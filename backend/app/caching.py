@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core import checks
+
+# ==========================================
+#       SHARED CACHE CHECK 🔗
+# ==========================================
+# Role cache, JWT revoke markers, replica pins, ETag generations, dashboard version —
+# sab invalidation Django cache ke through jaata hai. LocMem / Dummy / FileBased
+# cache sirf ek process (ya ek machine) ka hai: gunicorn worker A ka bump worker B
+# ya alag machine pe chal rahe `run_jobs` tak nahi pahunchta. Isliye jo caches
+# "doosre process ne invalidate kiya" pe tike hain wo shared cache ke bina off rehte
+# hain, aur background jobs alag worker ki jagah web process me inline chalte hain.
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+)
+
+
+def is_shared(alias='default'):
+    """True jab cache saare web workers + job worker me ek hi hai (redis, memcached, DB)."""
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    return backend not in PROCESS_LOCAL_BACKENDS
+
+
+def setting_or_shared(name):
+    """Setting explicitly set hai to wahi, warna default = shared cache hai ya nahi."""
+    value = getattr(settings, name, None)
+    return is_shared() if value is None else value
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if is_shared():
+        return []
+    return [checks.Warning(
+        "Default cache is process-local; cache invalidations do not reach other processes. "
+        "The role and dashboard caches, ETag / 304 responses, JWT claim auth and token-based "
+        "replica pins stay off, and background jobs run inline in the web processes "
+        "(`run_jobs` idles).",
+        hint="Set CACHE_BACKEND (e.g. django.core.cache.backends.redis.RedisCache) and CACHE_LOCATION.",
+        id='app.W001',
+    )]
@@ -0,0 +1,129 @@
+import hashlib
+import time
+from email.utils import formatdate
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.cache import get_conditional_response
+
+from . import caching, db_router, roles
+
+# ==========================================
+#       CONDITIONAL GET (ETag / Last-Modified ⚡)
+# ==========================================
+# Har model ka ek generation counter cache me hai, jo save/delete/records_changed pe
+# (commit ke baad) badhta hai. ETag = hash(view, user/roles, query, generations) —
+# isliye If-None-Match match hone pe na main query chalti hai na serializer.
+#
+# Counter seed time-based hai, taaki cache flush ke baad purane ETags kabhi match na
+# karein. LocMem cache per worker hai — dusre worker ka write is worker ke counter tak
+# nahi pahunchta aur wo purane data pe 304 deta rahega. Isliye CRM_CONDITIONAL_GET
+# unset ho to ye sirf shared cache pe on hai (app/caching.py). Shared cache (redis) pe
+# CRM_ETAG_GENERATION_TIMEOUT None rakh sakte ho.
+
+
+def _timeout():
+    return getattr(settings, 'CRM_ETAG_GENERATION_TIMEOUT', 300)
+
+
+def _key(model):
+    return f'crm:gen:{model._meta.label_lower}'
+
+
+def _seed():
+    return time.time_ns() // 1000
+
+
+def generations(models):
+    """{model: (generation, changed_at)} — ek cache round trip, missing keys seed ho jati hain."""
+    keys = {model: _key(model) for model in models}
+    found = cache.get_many([f'{key}:at' for key in keys.values()] + list(keys.values()))
+    result = {}
+    for model, key in keys.items():
+        value = found.get(key)
+        changed_at = found.get(f'{key}:at')
+        if value is None or changed_at is None:
+            value, changed_at = _seed(), time.time()
+            cache.set_many({key: value, f'{key}:at': changed_at}, _timeout())
+        result[model] = (value, changed_at)
+    return result
+
+
+def _bump_now(model):
+    key = _key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _seed(), _timeout())
+    cache.set(f'{key}:at', time.time(), _timeout())
+
+
+def bump(model, using='default'):
+    # Commit se pehle bump kiya to beech ka request naya ETag + purana data cache kar lega
+    transaction.on_commit(lambda: _bump_now(model), using=using)
+
+
+def compute_etag(request, scope, models, *extra):
+    """Strong ETag (quoted) + Last-Modified timestamp for the given scope."""
+    user = request.user
+    marks = generations(models)
+    parts = [
+        scope,
+        str(user.pk),
+        '1' if user.is_superuser else '0',
+        ','.join(sorted(roles.get_roles(user))),
+        getattr(request, 'accepted_media_type', '') or '',
+        request.META.get('QUERY_STRING', ''),
+    ]
+    parts += [str(part) for part in extra]
+    parts += [f'{model._meta.label_lower}={marks[model][0]}' for model in models]
+    digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+    last_modified = max(changed_at for _, changed_at in marks.values())
+    return f'"{digest}"', int(last_modified)
+
+
+def enabled():
+    return caching.setting_or_shared('CRM_CONDITIONAL_GET')
+
+
+class ConditionalGetMixin:
+    """
+    GET pe ETag + Last-Modified. If-None-Match / If-Modified-Since match -> 304, handler
+    chalta hi nahi. Auth/permission checks (initial()) pehle hi ho chuke hote hain.
+    `etag_models` (default `(self.model,)`) un models ki list hai jinka data response me hai.
+    """
+    etag_models = None
+
+    def get_etag_models(self):
+        return self.etag_models or (self.model,)
+
+    def get_etag_extra(self):
+        return [sorted(self.kwargs.items())]
+
+    def get(self, request, *args, **kwargs):
+        return self.conditional_get(request, super().get, *args, **kwargs)
+
+    def conditional_get(self, request, handler, *args, **kwargs):
+        if not enabled():
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = compute_etag(
+            request, type(self).__name__, self.get_etag_models(), *self.get_etag_extra()
+        )
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        return stamp(handler(request, *args, **kwargs), etag, last_modified)
+
+
+def stamp(response, etag, last_modified):
+    # Replica lag kar raha ho to naya ETag purane data pe chipak jayega — sirf
+    # primary se padhe responses ko ETag do (304 check dono pe safe hai)
+    from_primary = db_router.current_read_alias() in (None, DEFAULT_DB_ALIAS)
+    if response.status_code == 200 and from_primary:
+        response['ETag'] = etag
+        response['Last-Modified'] = formatdate(last_modified, usegmt=True)
+        # Browser har baar revalidate kare (304 sasta hai), purana data na dikhaye
+        response.setdefault('Cache-Control', 'private, no-cache')
+    return response
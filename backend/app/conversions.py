@@ -0,0 +1,126 @@
+from datetime import date
+
+from django.db import transaction
+
+from . import funnel, ledger, roles
+from .models import Lead, Payment, SalesTask
+from .signals import records_changed
+
+# ==========================================
+#       LEAD CONVERSION (single + batch 🔁)
+# ==========================================
+# Lead -> Payment (status Converted) aur Lead -> SalesTask (status Interested).
+# Single endpoints (leads/<pk>/convert/) aur batch endpoints (leads/convert/) dono
+# yahi builders use karte hain. Batch: leads lock (select_for_update), Payments /
+# SalesTasks ek bulk_create, lead status ek bulk_update — sab ek transaction me, to beech
+# me fail hua to na lead Converted hogi na aadhi payments banengi.
+
+
+def payment_for(lead, owner, data, **extra):
+    """Lead se unsaved Payment. `data` = request payload (so_no, amount, ...)."""
+    return Payment(
+        owner_id=owner.pk,
+        company=lead.company,
+        # S.No bhara hai to wahi, khali hai to Lead ki ID (Ex: 45) S.No ban jati hai
+        sno=lead.sno if lead.sno else str(lead.id),
+        so_no=data.get('so_no', 'N/A'),
+        amount=data.get('amount', 0),
+        advance=data.get('advance', 0),  # remaining ledger (app/ledger.py) calculate karta hai
+        invoice=data.get('invoice', 'Pending'),
+        remark=data.get('remark', f"Converted from Lead: {lead.name}"),
+        **extra
+    )
+
+
+def sales_task_for(lead, owner, data):
+    return SalesTask(
+        owner_id=owner.pk,
+        date=date.today(),
+        lead_name=lead.name,
+        company=lead.company,
+        contact=lead.contact,
+        task_type="Call",
+        next_follow_up=data.get('next_follow_up'),
+        priority=data.get('priority', 'Medium'),
+        remarks=data.get('remarks', f"Moved from Leads. Purpose: {lead.purpose}"),
+        status="Pending",
+    )
+
+
+def scoped_leads(user):
+    # List view jaisa hi: team sab leads, baaki sirf apni
+    if roles.is_team_member(user):
+        return Lead.objects.all()
+    return Lead.objects.filter(owner_id=user.pk)
+
+
+def _run_batch(user, items, build, lead_status, skip, done, result_key, using='default'):
+    """
+    items = validated payloads (har ek me `id`). build(lead, item) -> unsaved object.
+    skip(lead) -> reason ya None. Per-item results (status `done` / skipped / not_found),
+    items ke order me.
+    """
+    model = None
+    results, created_for, objects = [], [], []
+    with transaction.atomic(using=using):
+        leads = scoped_leads(user).using(using).select_for_update().in_bulk([item['id'] for item in items])
+        seen = set()
+        for item in items:
+            lead = leads.get(item['id'])
+            if lead is None:
+                results.append({'id': item['id'], 'status': 'not_found'})
+                continue
+            reason = 'Duplicate id in request' if lead.pk in seen else skip(lead)
+            seen.add(lead.pk)
+            if reason:
+                results.append({'id': lead.pk, 'status': 'skipped', 'reason': reason})
+                continue
+            obj = build(lead, item)
+            model = type(obj)
+            objects.append(obj)
+            created_for.append(lead.pk)
+            results.append({'id': lead.pk, 'status': done})
+
+        if objects:
+            model.objects.using(using).bulk_create(objects)
+            if model is Payment:
+                ledger.payments_created(objects, using)  # bulk_create pe post_save nahi
+            converted = [leads[pk] for pk in created_for]
+            for lead in converted:
+                lead.status = lead_status
+            changes = funnel.transitions(converted, using)  # Jo pehle se isi status me the unka nahi
+            Lead.objects.using(using).bulk_update(converted, ['status', 'status_changed_at'])
+            funnel.record(changes, using)
+            # bulk_create / update() post_save nahi bhejte: search, dashboard, ETags, sync
+            records_changed.send(sender=Lead, pks=created_for, deleted=False, using=using)
+            records_changed.send(sender=model, pks=[obj.pk for obj in objects], deleted=False, using=using)
+
+    created = iter(objects)
+    for row in results:
+        if row['status'] == done:
+            row[result_key] = next(created).pk
+    return len(objects), results
+
+
+def convert_leads(user, items):
+    """Batch Lead -> Payment. Already Converted leads skip (retry pe double payment nahi)."""
+    return _run_batch(
+        user, items,
+        build=lambda lead, item: payment_for(lead, user, item),
+        lead_status='Converted',
+        skip=lambda lead: 'Already converted' if lead.status == 'Converted' else None,
+        done='converted',
+        result_key='payment_id',
+    )
+
+
+def move_leads_to_sales_tasks(user, items):
+    """Batch Lead -> SalesTask (follow-up), lead status Interested."""
+    return _run_batch(
+        user, items,
+        build=lambda lead, item: sales_task_for(lead, user, item),
+        lead_status='Interested',
+        skip=lambda lead: None,
+        done='moved',
+        result_key='sales_task_id',
+    )
@@ -0,0 +1,210 @@
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Q, Sum
+
+from . import caching, roles
+from .models import Lead, Payment, SalesTask, Task, TechData, Tender
+
+# ==========================================
+#       DASHBOARD STATS (cached, signal se invalidate)
+# ==========================================
+# In models ka koi bhi save/delete dashboard ko stale kar deta hai
+DASHBOARD_MODELS = (Lead, Payment, SalesTask, Task, TechData, Tender)
+
+_VERSION_KEY = 'crm:dashboard:version'
+SHARED_CACHE_TIMEOUT = 300
+
+
+def _cache_timeout():
+    # Unset = sirf shared cache pe: LocMem me dusre worker ka version bump yahan nahi pahunchta
+    timeout = getattr(settings, 'CRM_DASHBOARD_CACHE_TIMEOUT', None)
+    if timeout is None:
+        return SHARED_CACHE_TIMEOUT if caching.is_shared() else None
+    return timeout or None
+
+
+def get_scope(user):
+    """(role_view, include_sales, include_tech) — jo data dikhna hai wahi cache key banta hai."""
+    is_sales = roles.is_sales(user)
+    is_tech = roles.is_tech(user)
+    is_manager = user.is_superuser
+
+    if is_manager:
+        role_view = 'Manager'
+    elif is_tech:
+        role_view = 'Tech'
+    else:
+        role_view = 'Sales'
+    return role_view, is_sales or is_manager, is_tech or is_manager
+
+
+def _invalidate_now():
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 2, None)
+
+
+def invalidate(using=DEFAULT_DB_ALIAS):
+    # Commit se pehle bump kiya to beech ka request purana data naye version pe cache
+    # kar lega (conditional.bump jaisa hi)
+    transaction.on_commit(_invalidate_now, using=using)
+
+
+def _stats_key(version, scope, today):
+    role_view, sales, tech = scope
+    return f'crm:dashboard:{version}:{role_view}:{int(sales)}{int(tech)}:{today.isoformat()}'
+
+
+def get_stats(user, today):
+    scope = get_scope(user)
+    timeout = _cache_timeout()
+    if not timeout:
+        return build_stats(*scope, today)
+
+    version = cache.get_or_set(_VERSION_KEY, 1, None)
+    key = _stats_key(version, scope, today)
+    data = cache.get(key)
+    if data is None:
+        data = build_stats(*scope, today)
+        cache.set(key, data, timeout)
+    return data
+
+
+# --- Queries (sync aur async dono builds inhi se) ---
+def _lead_counts():
+    # Chaar alag count() ki jagah ek hi conditional aggregate
+    return dict(
+        total_leads=Count('id'),
+        new_leads=Count('id', filter=Q(status='New')),
+        interested_leads=Count('id', filter=Q(status='Interested')),
+        converted_leads=Count('id', filter=Q(status='Converted')),
+    )
+
+
+def _task_counts():
+    return dict(
+        pending_tasks=Count('id', filter=Q(status='Pending')),
+        high_priority_tasks=Count('id', filter=Q(status='Pending', priority='High')),
+    )
+
+
+def _todays_calls(today):
+    return SalesTask.objects.filter(next_follow_up=today)
+
+
+def _leaderboard():
+    return (
+        Payment.objects.values('owner__username')
+        .annotate(total_amount=Sum('amount'))
+        .order_by('-total_amount')
+    )
+
+
+def _recent_payments():
+    # owner join, N+1 nahi
+    return (
+        Payment.objects.order_by('-date', '-id')
+        .values('company', 'amount', 'date', by=F('owner__username'))[:5]
+    )
+
+
+def _service_due(today):
+    return TechData.objects.filter(service_due__gte=today)
+
+
+def _active_tenders():
+    return Tender.objects.exclude(status__in=['Won', 'Lost'])
+
+
+def build_stats(role_view, include_sales, include_tech, today):
+    data = {}
+
+    # 🟢 SALES DATA (Sales & Manager ke liye)
+    if include_sales:
+        data.update(Lead.objects.aggregate(**_lead_counts()))
+
+        # Todays Follow Ups
+        data['todays_calls'] = _todays_calls(today).count()
+
+        # --- 💰 REVENUE ---
+        data['total_revenue'] = Payment.objects.aggregate(total=Sum('amount'))['total'] or 0
+
+        # --- 🏆 LEADERBOARD ---
+        if role_view == 'Manager':
+            data['leaderboard'] = list(_leaderboard())
+
+        # --- 🕒 RECENT TRANSACTIONS ---
+        data['recent_payments'] = list(_recent_payments())
+
+    # 🔴 TECH DATA (Tech & Manager ke liye)
+    if include_tech:
+        data.update(Task.objects.aggregate(**_task_counts()))
+        data['service_due'] = _service_due(today).count()
+        data['active_tenders'] = _active_tenders().count()
+
+    data['role_view'] = role_view
+    return data
+
+
+# ==========================================
+#       ASYNC (ASGI views ke liye, app/async_views.py)
+# ==========================================
+# Independent queries asyncio.gather se ek saath await hoti hain. Dhyan rahe: Django ka
+# async ORM har query sync_to_async(thread_sensitive) se chalata hai, to ek request ki
+# queries DB pe ek ke baad ek hi jaati hain — fayda event loop ka free rehna hai
+# (dusre requests chalte rehte hain), DB-level parallelism nahi.
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def aget_stats(user, today):
+    scope = get_scope(user)
+    timeout = _cache_timeout()
+    if not timeout:
+        return await abuild_stats(*scope, today)
+
+    version = await cache.aget_or_set(_VERSION_KEY, 1, None)
+    key = _stats_key(version, scope, today)
+    data = await cache.aget(key)
+    if data is None:
+        data = await abuild_stats(*scope, today)
+        await cache.aset(key, data, timeout)
+    return data
+
+
+async def abuild_stats(role_view, include_sales, include_tech, today):
+    queries = {}
+    if include_sales:
+        queries['leads'] = Lead.objects.aaggregate(**_lead_counts())
+        queries['todays_calls'] = _todays_calls(today).acount()
+        queries['revenue'] = Payment.objects.aaggregate(total=Sum('amount'))
+        if role_view == 'Manager':
+            queries['leaderboard'] = _alist(_leaderboard())
+        queries['recent_payments'] = _alist(_recent_payments())
+    if include_tech:
+        queries['tasks'] = Task.objects.aaggregate(**_task_counts())
+        queries['service_due'] = _service_due(today).acount()
+        queries['active_tenders'] = _active_tenders().acount()
+
+    results = dict(zip(queries, await asyncio.gather(*queries.values())))
+
+    # Keys ka order build_stats jaisa hi (same JSON)
+    data = {}
+    if include_sales:
+        data.update(results['leads'])
+        data['todays_calls'] = results['todays_calls']
+        data['total_revenue'] = results['revenue']['total'] or 0
+        if 'leaderboard' in results:
+            data['leaderboard'] = results['leaderboard']
+        data['recent_payments'] = results['recent_payments']
+    if include_tech:
+        data.update(results['tasks'])
+        data['service_due'] = results['service_due']
+        data['active_tenders'] = results['active_tenders']
+
+    data['role_view'] = role_view
+    return data
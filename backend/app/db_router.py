@@ -0,0 +1,117 @@
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import caching
+
+# ==========================================
+#       READ REPLICA ROUTING
+# ==========================================
+# ReplicaRoutingMiddleware safe-method requests ke liye `_read_alias` set karta hai;
+# router bas wahi return karta hai. Writes, transactions aur "abhi-abhi likha"
+# clients hamesha primary pe.
+
+REPLICA_DB_ALIAS = 'replica'
+
+_read_alias = ContextVar('crm_read_db_alias', default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def reads_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def current_read_alias():
+    # None = router default (primary)
+    return _read_alias.get()
+
+
+# --- Read-your-writes: write ke baad thodi der primary se hi padho ---
+# Pin client ke saath chalta hai (kisi bhi worker pe valid), do raaston se: same-site
+# browser ke liye signed cookie, aur cross-origin Bearer SPA (jo Lax cookie nahi
+# bhejta) ke liye signed response header jise client agle requests me wapas bhejta
+# hai (frontend/src/main.jsx). Shared cache ho to token ke hash pe bhi pin rakhte hain.
+PIN_COOKIE = 'crm_primary_pin'
+PIN_HEADER = 'X-CRM-Primary-Pin'
+
+
+def _pin_seconds():
+    return getattr(settings, 'CRM_REPLICA_PIN_SECONDS', 5)
+
+
+def _pin_key(client_key):
+    return f'crm:db-pin:{client_key}'
+
+
+def client_key(request):
+    """JWT / session se client pehchano, bina DB hit kiye."""
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return hashlib.sha1(credential.encode('utf-8')).hexdigest()
+
+
+def pin_to_primary(request, response):
+    seconds = _pin_seconds()
+    if not seconds:
+        return
+    response.set_signed_cookie(
+        PIN_COOKIE, '1', salt=PIN_COOKIE, max_age=seconds, httponly=True,
+        secure=settings.SESSION_COOKIE_SECURE, samesite=settings.SESSION_COOKIE_SAMESITE,
+    )
+    response[PIN_HEADER] = signing.TimestampSigner(salt=PIN_COOKIE).sign('1')
+    client = client_key(request)
+    if client and caching.is_shared():
+        cache.set(_pin_key(client), 1, seconds)
+
+
+def is_pinned(request):
+    seconds = _pin_seconds()
+    if not seconds:
+        return False
+    # max_age signature ka timestamp check karta hai — purani / copy ki hui cookie bekaar
+    if request.get_signed_cookie(PIN_COOKIE, default=None, salt=PIN_COOKIE, max_age=seconds) is not None:
+        return True
+    echoed = request.headers.get(PIN_HEADER)
+    if echoed:
+        try:
+            signing.TimestampSigner(salt=PIN_COOKIE).unsign(echoed, max_age=seconds)
+            return True
+        except signing.BadSignature:  # SignatureExpired bhi isi me
+            pass
+    client = client_key(request)
+    return bool(client) and caching.is_shared() and cache.get(_pin_key(client)) is not None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None:
+            return None
+        # Primary pe transaction chal rahi ho to uske andar ke reads bhi wahi
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replica = primary ki copy, relations safe hain
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
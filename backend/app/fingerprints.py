@@ -0,0 +1,85 @@
+import hashlib
+import re
+
+from django.conf import settings
+
+# ==========================================
+#       DUPLICATE FINGERPRINTS (Lead / Customer)
+# ==========================================
+# fingerprint = sha1(normalized company | phone digits | lowercased email).
+# Indexed column me store hota hai, isliye duplicate check = ek IN query.
+
+FINGERPRINT_FIELDS = ('company', 'contact', 'email')
+POLICIES = ('skip', 'merge', 'flag')
+
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+_SPACES = re.compile(r'\s+')
+_NON_DIGIT = re.compile(r'\D+')
+# "Acme Pvt. Ltd." aur "ACME private limited" ek hi company hai
+_COMPANY_SUFFIXES = {'pvt', 'private', 'ltd', 'limited', 'llp', 'inc', 'co', 'company', 'corp', 'the'}
+
+
+def normalize_company(value):
+    words = _SPACES.sub(' ', _NON_ALNUM.sub(' ', (value or '').lower())).split()
+    return ' '.join(word for word in words if word not in _COMPANY_SUFFIXES)
+
+
+def company_key(value):
+    # Receivables / revenue rollups ka company grouping key (sirf suffix waala naam = raw)
+    return normalize_company(value) or (value or '').strip().lower()
+
+
+def normalize_phone(value):
+    digits = _NON_DIGIT.sub('', value or '')
+    # +91 / 0 prefix hata ke last 10 digits (Indian mobile)
+    return digits[-10:] if len(digits) > 10 else digits
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def compute(company, contact, email):
+    parts = (normalize_company(company), normalize_phone(contact), normalize_email(email))
+    if not any(parts):
+        return None
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_policy(value=None):
+    if value in POLICIES:
+        return value
+    return getattr(settings, 'CRM_DUPLICATE_POLICY', 'flag')
+
+
+def existing_ids(queryset, fingerprints):
+    """
+    {fingerprint: oldest matching pk} for the given fingerprints (one indexed query).
+    `queryset` = caller ka role-scoped queryset: jo row user ko dikhti nahi uska na pk
+    leak hona chahiye na usme merge.
+    """
+    fingerprints = {fp for fp in fingerprints if fp}
+    if not fingerprints:
+        return {}
+    found = {}
+    rows = (
+        queryset
+        .filter(fingerprint__in=fingerprints)
+        .order_by('pk')
+        .values_list('fingerprint', 'pk')
+    )
+    for fingerprint, pk in rows:
+        found.setdefault(fingerprint, pk)
+    return found
+
+
+def merge_into(existing, incoming):
+    """Existing row ke khali fields incoming values se bharo. Changed field names return."""
+    changed = []
+    for field, value in incoming.items():
+        if field in ('id', 'owner') or value in (None, ''):
+            continue
+        if getattr(existing, field, None) in (None, ''):
+            setattr(existing, field, value)
+            changed.append(field)
+    return changed
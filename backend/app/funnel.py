@@ -0,0 +1,187 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import conditional, rollups
+from .models import FunnelDaily, Lead, LeadStatusChange
+
+# ==========================================
+#       LEAD STATUS HISTORY + FUNNEL (kaun kitne din kis stage me ⏳)
+# ==========================================
+# Har status change LeadStatusChange me append hota hai (from -> to, pichhle status me
+# kitne second) aur usi transaction me FunnelDaily (din + status) ke counters badhte
+# hain: entered / exited / time-in-stage. Funnel endpoint sirf counters padhta hai.
+#
+# Purana status Lead.from_db() yaad rakhta hai, to single save pe koi extra query nahi.
+# Paths:
+#   Lead.save()                  -> signals.py (pre_save / post_save)
+#   bulk update (app/bulk.py)    -> rows load hoti hain, transitions() + record()
+#   batch conversion, imports    -> seedha transitions() + record()
+# Counters kabhi bigde to `manage.py rebuild_funnel` log se dobara bana deta hai.
+
+# Funnel me in stages ka order pehle, baaki statuses naam se
+STAGES = ('New', 'Interested', 'Converted')
+TRACKED_FIELD = 'status'
+
+
+def tracks(model, fields):
+    return model is Lead and TRACKED_FIELD in fields
+
+
+def transitions(leads, using='default', now=None):
+    """
+    Jin leads ka status DB waale se alag hai unke unsaved LeadStatusChange. Nayi leads
+    ('' -> status) bhi. Lead.status_changed_at bhi yahin set hota hai (save se pehle bulao).
+    """
+    now = now or timezone.now()
+    unknown = [
+        lead.pk for lead in leads
+        if not lead._state.adding and getattr(lead, '_loaded_status', None) is None
+    ]
+    if unknown:
+        # from_db se nahi aayi (ya status deferred tha): ek query me purane status
+        previous = dict(Lead.objects.using(using).filter(pk__in=unknown).values_list('pk', 'status'))
+        for lead in leads:
+            if lead.pk in previous:
+                lead._loaded_status = previous[lead.pk]
+
+    changes = []
+    for lead in leads:
+        if lead._state.adding:
+            before, entered_at, changed_at = '', None, lead.status_changed_at or now
+        else:
+            before, entered_at, changed_at = lead._loaded_status, lead.status_changed_at, now
+            if before == lead.status:
+                continue
+        seconds = int((changed_at - entered_at).total_seconds()) if before and entered_at else None
+        changes.append(LeadStatusChange(
+            lead_id=lead.pk, owner_id=lead.owner_id, from_status=before or '', to_status=lead.status,
+            changed_at=changed_at, seconds_in_previous=max(seconds, 0) if seconds is not None else None,
+        ))
+        lead.status_changed_at = changed_at
+        lead._loaded_status = lead.status
+    return changes
+
+
+def created(leads):
+    """bulk_create ke baad (pk mil chuka) nayi leads ke '' -> status entries."""
+    return [
+        LeadStatusChange(
+            lead_id=lead.pk, owner_id=lead.owner_id, to_status=lead.status,
+            changed_at=lead.status_changed_at or timezone.now(),
+        )
+        for lead in leads if lead.pk is not None
+    ]
+
+
+def counters_for(changes):
+    """{(day, status): [entered, exited, timed_exits, exit_seconds]}"""
+    counters = {}
+    for change in changes:
+        day = timezone.localdate(change.changed_at)
+        counters.setdefault((day, change.to_status), [0, 0, 0, 0])[0] += 1
+        if change.from_status:
+            row = counters.setdefault((day, change.from_status), [0, 0, 0, 0])
+            row[1] += 1
+            if change.seconds_in_previous is not None:
+                row[2] += 1
+                row[3] += change.seconds_in_previous
+    return counters
+
+
+def _increment(day, status, entered, exited, timed_exits, exit_seconds, using):
+    rows = FunnelDaily.objects.using(using).filter(day=day, status=status)
+    changes = {
+        'entered': F('entered') + entered,
+        'exited': F('exited') + exited,
+        'timed_exits': F('timed_exits') + timed_exits,
+        'exit_seconds': F('exit_seconds') + exit_seconds,
+    }
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic(using=using):
+            FunnelDaily.objects.using(using).create(
+                day=day, status=status, entered=entered, exited=exited,
+                timed_exits=timed_exits, exit_seconds=exit_seconds,
+            )
+    except IntegrityError:
+        rows.update(**changes)  # Dusri request ne row abhi banayi
+
+
+def record(changes, using='default'):
+    """Log me append + counters. Caller ke transaction me (Lead write ke saath) bulao."""
+    if not changes:
+        return
+    with transaction.atomic(using=using):
+        LeadStatusChange.objects.using(using).bulk_create(changes)
+        # Fixed order me lock (deadlock se bachne ke liye)
+        for (day, status), values in sorted(counters_for(changes).items()):
+            _increment(day, status, *values, using=using)
+    conditional.bump(FunnelDaily, using)
+
+
+def _stage_order(status):
+    return (STAGES.index(status), '') if status in STAGES else (len(STAGES), status)
+
+
+def series(interval, start, end, using='default'):
+    """[{'period', 'stages': [{status, entered, exited, avg_days_in_stage}], new, converted, conversion_rate}]"""
+    rows = (
+        FunnelDaily.objects.using(using).filter(day__gte=start, day__lte=end)
+        .annotate(period=rollups.INTERVALS[interval]('day'))
+        .values('period', 'status')
+        .annotate(
+            entered=Sum('entered'), exited=Sum('exited'),
+            timed_exits=Sum('timed_exits'), exit_seconds=Sum('exit_seconds'),
+        )
+        .order_by('period')
+    )
+
+    periods = {}
+    for row in rows:
+        periods.setdefault(row['period'], []).append({
+            'status': row['status'],
+            'entered': row['entered'],
+            'exited': row['exited'],
+            'avg_days_in_stage': (
+                round(row['exit_seconds'] / row['timed_exits'] / 86400, 2) if row['timed_exits'] else None
+            ),
+        })
+
+    results = []
+    for period, stages in periods.items():
+        stages.sort(key=lambda stage: _stage_order(stage['status']))
+        entered = {stage['status']: stage['entered'] for stage in stages}
+        new, converted = entered.get(STAGES[0], 0), entered.get(STAGES[-1], 0)
+        results.append({
+            'period': period,
+            'new': new,
+            'converted': converted,
+            'conversion_rate': round(converted / new, 4) if new else None,
+            'stages': stages,
+        })
+    return results
+
+
+def rebuild(using='default'):
+    """FunnelDaily log (LeadStatusChange) se scratch se. Returns counter row count."""
+    counters = {}
+    changes = LeadStatusChange.objects.using(using).only(
+        'from_status', 'to_status', 'changed_at', 'seconds_in_previous',
+    )
+    for change in changes.iterator(chunk_size=2000):
+        for key, values in counters_for([change]).items():
+            row = counters.setdefault(key, [0, 0, 0, 0])
+            for i, value in enumerate(values):
+                row[i] += value
+
+    with transaction.atomic(using=using):
+        FunnelDaily.objects.using(using).all().delete()
+        FunnelDaily.objects.using(using).bulk_create([
+            FunnelDaily(day=day, status=status, entered=entered, exited=exited,
+                        timed_exits=timed_exits, exit_seconds=exit_seconds)
+            for (day, status), (entered, exited, timed_exits, exit_seconds) in counters.items()
+        ], batch_size=500)
+        conditional.bump(FunnelDaily, using)
+    return len(counters)
@@ -0,0 +1,310 @@
+import csv
+import json
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import conversions, fingerprints, funnel, jobs, staging
+from .models import ImportJob, Lead
+from .serializers import LeadSerializer
+from .signals import records_changed
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+#       LEAD IMPORT PIPELINE (🚛 Streaming + Batched)
+# ==========================================
+# Upload pehle stage hota hai (app/staging.py, DB chunks — worker alag machine pe ho
+# sakta hai), phir background job (app/jobs.py) me rows stream hoti hain: chunk validate -> bulk_create (har batch apni transaction me) ->
+# ImportJob pe progress. Memory me kabhi ek batch se zyada rows nahi hoti.
+
+# Excel/CSV ke common headers -> Lead fields
+HEADER_ALIASES = {
+    'company_name': 'company',
+    'contact_person': 'name',
+    'phone': 'contact',
+    'mobile': 'contact',
+    'contact_no': 'contact',
+    'e_mail': 'email',
+    's_no': 'sno',
+    'remarks': 'note',
+}
+
+
+def stage_stream(stream, suffix):
+    """File-like object ko chunks me stage karo (app/staging.py); staged key return karta hai."""
+    return staging.save_stream(stream, f'import.{suffix}')
+
+
+def stage_rows(rows):
+    """Already-parsed rows (JSON body) ko NDJSON bana ke stage karo."""
+    return staging.save_chunks(
+        (json.dumps(row, default=str).encode('utf-8') + b'\n' for row in rows), 'import.ndjson',
+    )
+
+
+def normalize_header(name):
+    key = str(name or '').strip().lower().replace('.', '').replace(' ', '_').replace('-', '_')
+    return HEADER_ALIASES.get(key, key)
+
+
+def clean_row(row):
+    # Khali cells hata do taaki model defaults lagein (DateTimeField '' accept nahi karta)
+    cleaned = {}
+    for key, value in row.items():
+        if key is None or value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        cleaned[normalize_header(key)] = value
+    return cleaned
+
+
+def iter_rows(path, source_format):
+    """Yield one dict per data row, reading the staged file lazily."""
+    if source_format == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                yield clean_row(row)
+
+    elif source_format == 'ndjson':
+        with open(path, encoding='utf-8-sig') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    value = json.loads(line)
+                except ValueError:
+                    value = None
+                # Galat line ko bhi row count karo taaki row numbers match karein
+                yield clean_row(value) if isinstance(value, dict) else {'__invalid__': line[:200]}
+
+    elif source_format == 'xlsx':
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise RuntimeError("XLSX import needs openpyxl (pip install openpyxl)")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            for values in rows:
+                if not any(value is not None for value in values):
+                    continue
+                yield clean_row(dict(zip(header, values)))
+        finally:
+            workbook.close()
+
+    else:
+        raise ValueError(f"Unsupported format: {source_format}")
+
+
+def count_rows(path, source_format):
+    if source_format == 'xlsx':
+        return None  # read_only sheets ka max_row bharosemand nahi
+    return sum(1 for _ in iter_rows(path, source_format))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validate_chunk(numbered_rows, context):
+    """(row_no, row) list -> (valid Lead kwargs, unke row numbers, errors)."""
+    valid, row_numbers, errors = [], [], []
+    for row_no, row in numbered_rows:
+        if '__invalid__' in row:
+            errors.append({'row': row_no, 'errors': {'non_field_errors': ['Invalid JSON line']}})
+            continue
+        serializer = LeadSerializer(data=row, context=context)
+        if serializer.is_valid():
+            valid.append(serializer.validated_data)
+            row_numbers.append(row_no)
+        else:
+            errors.append({'row': row_no, 'errors': serializer.errors})
+    return valid, row_numbers, errors
+
+
+class WriteResult:
+    def __init__(self):
+        self.created = []
+        self.skipped = 0
+        self.merged = 0
+        self.flagged = 0
+        self.duplicates = []
+
+
+def write_leads(validated_rows, owner, policy=None, row_numbers=None, using='default'):
+    """
+    Validated rows ko bulk insert karo (caller ki transaction me), duplicate policy ke
+    saath. Duplicate check O(batch): ek indexed fingerprint IN query + batch ke andar
+    ek dict. Pichle batches already DB me hain, isliye woh query me hi mil jate hain.
+    """
+    policy = fingerprints.get_policy(policy)
+    if row_numbers is None:
+        row_numbers = range(1, len(validated_rows) + 1)
+    result = WriteResult()
+
+    leads = []
+    for data in validated_rows:
+        lead = Lead(owner=owner, **data)
+        lead.refresh_fingerprint()
+        leads.append(lead)
+    # Owner ke scope me hi (LeadListCreate jaisa): non-team user ki import dusron ki leads na chhede
+    existing = fingerprints.existing_ids(
+        conversions.scoped_leads(owner).using(using), [lead.fingerprint for lead in leads],
+    )
+
+    to_create = []
+    to_merge = {}      # existing pk -> [incoming data, ...]
+    first_in_batch = {}  # fingerprint -> (row_no, Lead)
+    for row_no, lead, data in zip(row_numbers, leads, validated_rows):
+        fp = lead.fingerprint
+        match_pk = existing.get(fp) if fp else None
+        earlier = first_in_batch.get(fp) if fp else None
+        if match_pk is None and earlier is None:
+            if fp:
+                first_in_batch[fp] = (row_no, lead)
+            to_create.append(lead)
+            continue
+
+        if policy == 'skip':
+            action = 'skipped'
+            result.skipped += 1
+        elif policy == 'merge':
+            action = 'merged'
+            result.merged += 1
+            if match_pk is not None:
+                to_merge.setdefault(match_pk, []).append(data)
+            else:
+                fingerprints.merge_into(earlier[1], data)
+        else:
+            action = 'flagged'
+            result.flagged += 1
+            to_create.append(lead)
+        result.duplicates.append({
+            'row': row_no,
+            'duplicate_of': match_pk,
+            'duplicate_of_row': None if match_pk is not None else earlier[0],
+            'action': action,
+        })
+
+    result.created = Lead.objects.using(using).bulk_create(to_create)
+    changed_pks = [lead.pk for lead in result.created if lead.pk is not None]
+    status_changes = funnel.created(result.created)
+
+    if to_merge:
+        merged_leads, fields = [], set()
+        for lead in Lead.objects.using(using).filter(pk__in=to_merge):
+            changed = []
+            for data in to_merge[lead.pk]:
+                changed += fingerprints.merge_into(lead, data)
+            if changed:
+                lead.refresh_fingerprint()
+                fields.update(changed)
+                merged_leads.append(lead)
+        if merged_leads:
+            if 'status' in fields:
+                status_changes += funnel.transitions(merged_leads, using)
+                fields.add('status_changed_at')
+            Lead.objects.using(using).bulk_update(merged_leads, sorted(fields | {'fingerprint'}))
+            changed_pks += [lead.pk for lead in merged_leads]
+
+    funnel.record(status_changes, using)
+    if changed_pks:
+        records_changed.send(sender=Lead, pks=changed_pks, deleted=False, using=using)
+    return result
+
+
+# ==========================================
+#       JOB RUNNER
+# ==========================================
+def run_import(job_id, on_progress=None):
+    job = ImportJob.objects.select_related('owner').get(pk=job_id)
+    max_errors = getattr(settings, 'CRM_IMPORT_MAX_ERRORS', 1000)
+    context = {'request': None}
+
+    ImportJob.objects.filter(pk=job.pk).update(status='running', started_at=timezone.now())
+    processed = created = failed = skipped = merged = flagged = 0
+    stored_errors = []
+    stored_duplicates = []
+    try:
+        # Worker ka local temp copy (staged payload DB me hai)
+        with staging.local_copy(job.staged_file) as path:
+            total = count_rows(path, job.source_format)
+            ImportJob.objects.filter(pk=job.pk).update(total_rows=total)
+
+            numbered = enumerate(iter_rows(path, job.source_format), start=1)
+            for chunk in chunked(numbered, job.batch_size):
+                valid, row_numbers, errors = validate_chunk(chunk, context)
+                processed += len(chunk)
+                failed += len(errors)
+                stored_errors.extend(errors[:max(0, max_errors - len(stored_errors))])
+
+                # Har batch apni transaction: data aur progress saath commit hote hain
+                with transaction.atomic():
+                    result = write_leads(valid, job.owner, job.duplicate_policy, row_numbers)
+                    created += len(result.created)
+                    skipped += result.skipped
+                    merged += result.merged
+                    flagged += result.flagged
+                    stored_duplicates.extend(result.duplicates[:max(0, max_errors - len(stored_duplicates))])
+                    ImportJob.objects.filter(pk=job.pk).update(
+                        processed_rows=processed,
+                        created_rows=created,
+                        failed_rows=failed,
+                        errors=stored_errors,
+                        skipped_rows=skipped,
+                        merged_rows=merged,
+                        flagged_rows=flagged,
+                        duplicates=stored_duplicates,
+                    )
+                if on_progress is not None:
+                    on_progress(processed, total)
+
+        ImportJob.objects.filter(pk=job.pk).update(
+            status='done',
+            total_rows=processed,
+            finished_at=timezone.now(),
+            message=(
+                f"Imported {created} leads, {failed} rows failed, "
+                f"{skipped} duplicates skipped, {merged} merged, {flagged} flagged."
+            ),
+        )
+    except Exception as e:
+        logger.exception("Lead import %s failed", job.pk)
+        ImportJob.objects.filter(pk=job.pk).update(
+            status='failed', finished_at=timezone.now(), message=str(e),
+        )
+    finally:
+        staging.delete(job.staged_file)
+
+
+class ImportFailed(RuntimeError):
+    pass
+
+
+@jobs.task('leads.import')
+def import_leads_job(job, import_job_id):
+    run_import(import_job_id, on_progress=lambda done, total: jobs.progress(job, done, total))
+    imported = ImportJob.objects.get(pk=import_job_id)
+    if imported.status == 'failed':
+        # run_import error khud sambhal leta hai; Job bhi failed dikhe, 'done' nahi
+        raise ImportFailed(imported.message)
+    return {'import_job': imported.pk, 'status': imported.status, 'message': imported.message}
+
+
+def start_import(job):
+    # Partial batches commit ho chuke hote hain, isliye retry nahi (duplicate rows banenge)
+    return jobs.enqueue('leads.import', {'import_job_id': job.pk}, owner=job.owner, max_attempts=1)
@@ -0,0 +1,213 @@
+import logging
+import threading
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import caching
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+#       BACKGROUND JOB QUEUE (DB table, koi broker nahi 🧵)
+# ==========================================
+# View `enqueue()` karke turant 202 return karta hai; `manage.py run_jobs` worker
+# table se jobs claim karke thread pool me chalata hai. Claim Postgres pe
+# SELECT ... FOR UPDATE SKIP LOCKED se, SQLite pe conditional UPDATE se (SQLite
+# writes waise bhi serialized hain). Fail hone pe exponential backoff ke saath retry.
+#
+#   @jobs.task('leads.import')
+#   def import_leads(job, import_job_id): ...
+#
+#   jobs.enqueue('leads.import', {'import_job_id': 5}, owner=request.user)
+#
+# Shared cache ke bina alag worker ke cache bumps web tak nahi pahunchte, isliye tab
+# (CRM_JOBS_INLINE unset) jobs web process me hi thread me chalte hain — retries bhi.
+
+# Ye modules load hone pe apne tasks register karte hain
+TASK_MODULES = ('app.imports', 'app.receipts')
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name):
+    def decorator(func):
+        _registry[name] = func
+        func.job_name = name
+        return func
+    return decorator
+
+
+def get_task(name):
+    if name not in _registry:
+        for module in TASK_MODULES:
+            import_module(module)
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(name)
+
+
+def enqueue(name, payload=None, owner=None, max_attempts=None, priority=0, delay=0, using='default'):
+    job = Job.objects.using(using).create(
+        task=name,
+        payload=payload or {},
+        owner_id=getattr(owner, 'pk', owner),
+        priority=priority,
+        max_attempts=max_attempts or getattr(settings, 'CRM_JOB_MAX_ATTEMPTS', 3),
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    if inline():
+        # Bina worker process ke: commit ke baad isi process me thread
+        transaction.on_commit(lambda: _start_inline(job.pk, using), using=using)
+    return job
+
+
+def inline():
+    """Jobs isi process me chalein? Setting unset = jab cache shared nahi hai."""
+    value = getattr(settings, 'CRM_JOBS_INLINE', None)
+    return not caching.is_shared() if value is None else value
+
+
+def progress(job, done, total=None, message=None):
+    """Task ke andar se progress update (worker ka heartbeat bhi yahi refresh karta hai)."""
+    fields = {'progress_done': done, 'locked_at': timezone.now()}
+    if total is not None:
+        fields['progress_total'] = total
+    if message is not None:
+        fields['message'] = message
+    Job.objects.filter(pk=job.pk).update(**fields)
+
+
+# ==========================================
+#       CLAIM / RUN
+# ==========================================
+def _backoff(attempts):
+    base = getattr(settings, 'CRM_JOB_RETRY_BACKOFF', 10)
+    cap = getattr(settings, 'CRM_JOB_RETRY_BACKOFF_MAX', 3600)
+    return timedelta(seconds=min(base * (2 ** (attempts - 1)), cap))
+
+
+def claim(worker_id, limit, using='default'):
+    """`limit` tak ready jobs is worker ke naam karo (status=running) aur return karo."""
+    now = timezone.now()
+    ready = (
+        Job.objects.using(using)
+        .filter(status='queued', run_after__lte=now)
+        .order_by('priority', 'run_after', 'id')
+    )
+    running = dict(
+        status='running', locked_by=worker_id, locked_at=now, started_at=now,
+        attempts=F('attempts') + 1,
+    )
+
+    if connections[using].features.has_select_for_update_skip_locked:
+        # Dusre workers ki locked rows skip, koi wait nahi
+        with transaction.atomic(using=using):
+            ids = list(ready.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            if ids:
+                Job.objects.using(using).filter(pk__in=ids).update(**running)
+    else:
+        # Row locks nahi hain: jiska conditional UPDATE 1 row badle, job usi ka
+        ids = []
+        for pk in ready.values_list('pk', flat=True)[:limit * 2]:
+            if Job.objects.using(using).filter(pk=pk, status='queued').update(**running):
+                ids.append(pk)
+                if len(ids) >= limit:
+                    break
+
+    return list(Job.objects.using(using).filter(pk__in=ids).order_by('priority', 'run_after', 'id'))
+
+
+def run(job, using='default'):
+    """Claimed job chalao aur result / retry / failure record karo. True = done."""
+    jobs = Job.objects.using(using).filter(pk=job.pk)
+    try:
+        func = get_task(job.task)
+        result = func(job, **job.payload)
+    except UnknownTask:
+        logger.error("Job %s: unknown task %r", job.pk, job.task)
+        jobs.update(status='failed', error=f"Unknown task {job.task}", finished_at=timezone.now(),
+                    locked_by='', locked_at=None)
+        return False
+    except Exception as e:
+        logger.exception("Job %s (%s) failed on attempt %s", job.pk, job.task, job.attempts)
+        if job.attempts < job.max_attempts:
+            jobs.update(status='queued', run_after=timezone.now() + _backoff(job.attempts),
+                        error=str(e)[:2000], locked_by='', locked_at=None)
+        else:
+            jobs.update(status='failed', error=str(e)[:2000], finished_at=timezone.now(),
+                        locked_by='', locked_at=None)
+        return False
+
+    jobs.update(status='done', result=result, error='', finished_at=timezone.now(),
+                locked_by='', locked_at=None)
+    return True
+
+
+def heartbeat(job_ids, using='default'):
+    if job_ids:
+        Job.objects.using(using).filter(pk__in=job_ids, status='running').update(locked_at=timezone.now())
+
+
+def requeue_stale(using='default'):
+    """Jin running jobs ka heartbeat ruk gaya (worker crash), unhe wapas queue / failed karo."""
+    seconds = getattr(settings, 'CRM_JOB_STALE_SECONDS', 300)
+    cutoff = timezone.now() - timedelta(seconds=seconds)
+    stale = Job.objects.using(using).filter(status='running', locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', error='Worker stopped responding', finished_at=timezone.now(),
+        locked_by='', locked_at=None,
+    )
+    requeued = stale.update(status='queued', locked_by='', locked_at=None)
+    return requeued, failed
+
+
+# --- Inline mode (jobs.inline()) ---
+def _run_inline(job_id, using):
+    try:
+        for job in claim_one(job_id, using):
+            if not run(job, using):
+                _retry_inline(job_id, using)
+    except Exception:
+        logger.exception("Inline job %s crashed", job_id)
+    finally:
+        # Thread ke apne DB connections hain, band karna zaroori hai
+        connections.close_all()
+
+
+def claim_one(job_id, using='default'):
+    now = timezone.now()
+    claimed = Job.objects.using(using).filter(pk=job_id, status='queued').update(
+        status='running', locked_by='inline', locked_at=now, started_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(Job.objects.using(using).filter(pk=job_id)) if claimed else []
+
+
+def _retry_inline(job_id, using):
+    # Worker nahi hai jo backoff ke baad claim kare: isi process me timer
+    run_after = (
+        Job.objects.using(using).filter(pk=job_id, status='queued')
+        .values_list('run_after', flat=True).first()
+    )
+    if run_after is None:
+        return None
+    delay = max(0.0, (run_after - timezone.now()).total_seconds())
+    timer = threading.Timer(delay, _run_inline, args=(job_id, using))
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def _start_inline(job_id, using):
+    threading.Thread(target=_run_inline, args=(job_id, using), daemon=True).start()
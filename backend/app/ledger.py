@@ -0,0 +1,228 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import conditional, fingerprints, rollups, signals
+from .models import LedgerEntry, Payment, Receivable
+
+# ==========================================
+#       RECEIVABLES LEDGER (kis company pe kitna baaki 💰)
+# ==========================================
+# Payment.amount = billed. Paisa aaya = LedgerEntry (advance / receipt / adjustment),
+# Payment.received = entries ka total, remaining = amount - received (server side).
+#
+# Receivable table me (company, owner) aur company total (owner NULL) ka running
+# billed / received / balance hai. Har write — payment create / amount / company change /
+# delete aur har ledger entry — usi transaction me F() increment karta hai, isliye
+# receivables list sirf ye chhoti table padhti hai, ledger kitna bhi lamba ho.
+# Drift lage (raw SQL, purana data) to `manage.py rebuild_receivables`.
+#
+# Hooks signals.py me hain (Payment pre_save / post_save / post_delete); jo paths
+# signals nahi bhejte (bulk_create) wo seedha payments_created() bulate hain. Har hook
+# before/after contribution() deta hai — daily revenue rollups (app/rollups.py) bhi
+# usi se update hote hain.
+
+ZERO = Decimal('0')
+LEDGER_FIELDS = ('amount', 'advance', 'company', 'owner', 'date')
+
+
+def balance_key(company):
+    # "Acme Pvt Ltd" aur "ACME Private Limited" ek hi balance row
+    return fingerprints.company_key(company)
+
+
+def touches_ledger(update_fields):
+    return update_fields is None or bool(set(update_fields) & set(LEDGER_FIELDS))
+
+
+def contribution(payment, received=None):
+    """Payment ka summaries (receivables + revenue rollups) me hissa. snapshot() bhi yahi shape."""
+    return {
+        'date': payment.date,
+        'company': payment.company,
+        'owner_id': payment.owner_id,
+        'amount': payment.amount,
+        'advance': payment.advance,
+        'received': payment.received if received is None else received,
+    }
+
+
+def snapshot(pk, using='default'):
+    """Save se pehle ki ledger state (row lock ke saath, taaki receipt beech me na ghuse)."""
+    return (
+        Payment.objects.using(using).select_for_update()
+        .filter(pk=pk).values('date', 'company', 'owner_id', 'amount', 'advance', 'received').first()
+    )
+
+
+def _increment(key, owner_id, company, billed, received, payments, using):
+    rows = Receivable.objects.using(using).filter(company_key=key)
+    rows = rows.filter(owner__isnull=True) if owner_id is None else rows.filter(owner_id=owner_id)
+    changes = {
+        'company': company,
+        'billed': F('billed') + billed,
+        'received': F('received') + received,
+        'balance': F('balance') + (billed - received),
+        'payments': F('payments') + payments,
+    }
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic(using=using):
+            Receivable.objects.using(using).create(
+                company_key=key, owner_id=owner_id, company=company, billed=billed,
+                received=received, balance=billed - received, payments=payments,
+            )
+    except IntegrityError:
+        rows.update(**changes)  # Dusri request ne row abhi banayi
+
+
+def apply(deltas, using='default'):
+    """
+    deltas = [(company, owner_id, billed, received, payments), ...] — owner row aur
+    company total dono me. Caller ke transaction ke andar hi chalna chahiye.
+    """
+    totals = {}
+    for company, owner_id, billed, received, payments in deltas:
+        key = balance_key(company)
+        for scope in ((key, owner_id), (key, None)):
+            row = totals.setdefault(scope, [company, ZERO, ZERO, 0])
+            row[0] = company
+            row[1] += billed
+            row[2] += received
+            row[3] += payments
+
+    changed = False
+    # Fixed order me lock: do transactions ek dusre ka wait karte deadlock na karein
+    for (key, owner_id), (company, billed, received, payments) in sorted(
+        totals.items(), key=lambda item: (item[0][0], item[0][1] or 0)
+    ):
+        if billed or received or payments:
+            _increment(key, owner_id, company, billed, received, payments, using)
+            changed = True
+    if changed:
+        conditional.bump(Receivable, using)
+
+
+def summaries_changed(pairs, using='default'):
+    """
+    pairs = [(before, after), ...] contribution() dicts; None = row pehle nahi thi / ab
+    nahi hai. Receivables aur daily revenue rollups dono yahin se.
+    """
+    parts = [
+        (part, sign)
+        for before, after in pairs
+        for part, sign in ((before, -1), (after, 1)) if part is not None
+    ]
+    apply([
+        (part['company'], part['owner_id'], sign * part['amount'], sign * part['received'], sign)
+        for part, sign in parts
+    ], using)
+    rollups.apply(parts, using)
+
+
+def _set_received(payment_ids, delta, using):
+    # version / updated_at same: ye Payment.save() ka hi hissa hai, alag change nahi
+    Payment.objects.using(using).filter(pk__in=payment_ids).update(
+        received=F('received') + delta, remaining=F('remaining') - delta,
+        version=F('version'), updated_at=F('updated_at'),
+    )
+
+
+def payments_created(payments, using='default'):
+    """Nayi payments: amount billed, advance (agar hai) pehli ledger entry."""
+    entries = [
+        LedgerEntry(
+            payment_id=payment.pk, kind='advance', amount=payment.advance,
+            date=payment.date, created_by_id=payment.owner_id,
+        )
+        for payment in payments if payment.advance
+    ]
+    with transaction.atomic(using=using):
+        if entries:
+            LedgerEntry.objects.using(using).bulk_create(entries)
+        # Nayi row: received 0 tha, to received = advance (ek UPDATE sab payments ka)
+        Payment.objects.using(using).filter(pk__in=[payment.pk for payment in payments]).update(
+            received=F('advance'), remaining=F('amount') - F('advance'),
+            version=F('version'), updated_at=F('updated_at'),
+        )
+        summaries_changed([(None, contribution(payment, received=payment.advance)) for payment in payments], using)
+
+    for payment in payments:
+        payment.received = payment.advance
+        payment.remaining = payment.amount - payment.advance
+
+
+def payment_changed(before, payment, using='default'):
+    """Payment.save() ke baad: `before` = snapshot(). Advance badla = adjustment entry."""
+    advance_delta = payment.advance - before['advance']
+    if advance_delta:
+        LedgerEntry.objects.using(using).create(
+            payment_id=payment.pk, kind='adjustment', amount=advance_delta, created_by_id=payment.owner_id,
+            note=f"Advance corrected: {before['advance']} -> {payment.advance}",
+        )
+        _set_received([payment.pk], advance_delta, using)
+    # Company / owner / date badla to poora hissa purani rows se nayi me
+    summaries_changed([(before, contribution(payment, received=before['received'] + advance_delta))], using)
+
+
+def payment_deleted(payment, using='default'):
+    # Entries cascade se jaati hain (unka koi signal nahi) — payment ka poora hissa yahin
+    summaries_changed([(contribution(payment), None)], using)
+
+
+def record(payment_id, kind, amount, user=None, using='default', **fields):
+    """
+    Receipt / adjustment likho: entry + Payment.received + balances ek transaction me.
+    (entry, payment) return; payment scoped hona caller ki zimmedari.
+    """
+    with transaction.atomic(using=using):
+        payment = Payment.objects.using(using).select_for_update().get(pk=payment_id)
+        entry = LedgerEntry.objects.using(using).create(
+            payment=payment, kind=kind, amount=amount, created_by=user, **fields,
+        )
+        Payment.objects.using(using).filter(pk=payment.pk).update(
+            received=F('received') + amount, remaining=F('remaining') - amount,
+        )
+        summaries_changed([(contribution(payment), contribution(payment, received=payment.received + amount))], using)
+        # update() post_save nahi bhejta: ETags, dashboard, delta sync
+        signals.records_changed.send(sender=Payment, pks=[payment.pk], deleted=False, using=using)
+        payment.refresh_from_db(using=using)
+    return entry, payment
+
+
+def rebuild(using='default'):
+    """
+    Payment.received entries se dobara aur Receivable table scratch se. Sirf wo payments
+    save hoti hain jinke numbers sach me galat the. Returns (payments_fixed, receivables).
+    """
+    ledger_total = (
+        LedgerEntry.objects.using(using).filter(payment=OuterRef('pk'))
+        .order_by().values('payment').annotate(total=Sum('amount')).values('total')
+    )
+    with transaction.atomic(using=using):
+        payments = Payment.objects.using(using).annotate(ledger_total=Coalesce(Subquery(ledger_total), Value(ZERO)))
+        stale = list(payments.filter(
+            ~Q(received=F('ledger_total')) | ~Q(remaining=F('amount') - F('received'))
+        ).values_list('pk', flat=True))
+        if stale:
+            Payment.objects.using(using).filter(pk__in=stale).update(
+                received=Coalesce(Subquery(ledger_total), Value(ZERO)),
+            )
+            Payment.objects.using(using).filter(pk__in=stale).update(
+                remaining=F('amount') - F('received'), version=F('version'), updated_at=F('updated_at'),
+            )
+            signals.records_changed.send(sender=Payment, pks=stale, deleted=False, using=using)
+
+        Receivable.objects.using(using).all().delete()
+        rows = (
+            Payment.objects.using(using).order_by().values('company', 'owner_id')
+            .annotate(billed=Sum('amount'), received=Sum('received'), payments=Count('id'))
+        )
+        apply([
+            (row['company'], row['owner_id'], row['billed'], row['received'], row['payments']) for row in rows
+        ], using)
+        count = Receivable.objects.using(using).count()
+    return len(stale), count
@@ -0,0 +1,117 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+
+from app.serializers import CustomTokenObtainPairSerializer
+
+
+def _summary(mode, path, durations, errors, elapsed):
+    ordered = sorted(durations)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)] if ordered else 0
+    return {
+        'mode': mode,
+        'path': path,
+        'requests': len(durations),
+        'errors': errors,
+        'req_per_sec': len(durations) / elapsed if elapsed else 0,
+        'p50_ms': statistics.median(ordered) * 1000 if ordered else 0,
+        'p95_ms': p95 * 1000,
+    }
+
+
+def bench_wsgi(path, headers, total, concurrency):
+    """Sync DRF view, WSGI handler, `concurrency` threads (gunicorn --threads jaisa)."""
+    def worker(count):
+        client = Client()
+        results = []
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                status = client.get(path, headers=headers).status_code
+                results.append((time.perf_counter() - start, status))
+        finally:
+            connections.close_all()
+        return results
+
+    shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = [row for rows in pool.map(worker, shares) for row in rows]
+    return results, time.perf_counter() - start
+
+
+async def _bench_asgi(path, headers, total, concurrency):
+    client = AsyncClient()
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(total)))
+    return results, time.perf_counter() - start
+
+
+def bench_asgi(path, headers, total, concurrency):
+    """ASGI handler, ek event loop, `concurrency` requests ek saath in flight."""
+    return asyncio.run(_bench_asgi(path, headers, total, concurrency))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read throughput: sync views over WSGI (threads) vs async views over ASGI "
+        "(event loop) at the same concurrency. In-process, so it measures framework + ORM "
+        "overhead, not the network."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User whose JWT is sent with each request.")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path under /api/ (repeatable). Default: leads/ and dashboard/stats/.")
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--skip-asgi-sync', action='store_true',
+                            help="Don't also run the sync views under ASGI (one thread per request).")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} not found")
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        headers = {'Authorization': f'Bearer {token}'}
+        total = max(1, options['requests'])
+        concurrency = max(1, options['concurrency'])
+        paths = options['paths'] or ['leads/', 'dashboard/stats/']
+
+        rows = []
+        for path in paths:
+            path = path.strip('/') + '/'
+            runs = [
+                ('wsgi sync', bench_wsgi, f'/api/{path}'),
+                ('asgi async', bench_asgi, f'/api/async/{path}'),
+            ]
+            if not options['skip_asgi_sync']:
+                runs.append(('asgi sync', bench_asgi, f'/api/{path}'))
+            for mode, bench, url in runs:
+                bench(url, headers, min(total, concurrency), concurrency)  # warm up (caches, connections)
+                results, elapsed = bench(url, headers, total, concurrency)
+                errors = sum(1 for _, status in results if status >= 400)
+                rows.append(_summary(mode, url, [duration for duration, _ in results], errors, elapsed))
+
+        self.stdout.write(f"{total} requests per run, concurrency {concurrency}\n")
+        self.stdout.write(f"{'mode':<11} {'path':<32} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['mode']:<11} {row['path']:<32} {row['req_per_sec']:>9.1f} "
+                f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['errors']:>7}"
+            )
@@ -0,0 +1,122 @@
+import gzip
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app import middleware, values, views
+from app.renderers import FastJSONRenderer, enabled as fast_json_enabled
+
+RESOURCES = {
+    'leads': views.LeadListCreate,
+    'customers': views.CustomerListCreate,
+    'payments': views.PaymentListCreate,
+    'tasks': views.TaskListCreate,
+    'tenders': views.TenderListCreate,
+    'tech-data': views.TechDataListCreate,
+    'sales-tasks': views.SalesTaskListCreate,
+}
+
+
+def _median_ms(durations):
+    return statistics.median(durations) * 1000 if durations else 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-page list serialization cost, before vs after: ModelSerializer + DRF JSONRenderer, "
+        "ModelSerializer + orjson renderer, and .values() rows + orjson renderer. In-process, "
+        "same user scoping / masking as the API. Also prints gzip / brotli sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User whose role scoping / masking is applied.")
+        parser.add_argument('--resource', action='append', dest='resources', choices=sorted(RESOURCES),
+                            help="Repeatable. Default: leads and payments.")
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def get_view(self, view_class, user):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=user)
+        view = view_class()
+        view.setup(request)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        return view
+
+    def measure(self, build, renderer, repeat):
+        # rows = SQL fetch + rows banana (instances / dicts) + serializer; render = JSON bytes
+        rows_times, render_times, content = [], [], b''
+        for _ in range(repeat + 1):
+            start = time.perf_counter()
+            data = build()
+            built = time.perf_counter()
+            content = renderer.render(data)
+            rendered = time.perf_counter()
+            rows_times.append(built - start)
+            render_times.append(rendered - built)
+        # Pehla run warm up (query cache, field binding)
+        return _median_ms(rows_times[1:]), _median_ms(render_times[1:]), content
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} not found")
+        page_size = max(1, options['page_size'])
+        repeat = max(1, options['repeat'])
+        if not fast_json_enabled():
+            self.stderr.write("orjson not installed (or CRM_FAST_JSON=False): fast renderer = DRF renderer")
+
+        results = []
+        for name in options['resources'] or ['leads', 'payments']:
+            view = self.get_view(RESOURCES[name], user)
+            queryset = view.filter_queryset(view.get_queryset())
+            count = len(queryset[:page_size])
+            if not count:
+                self.stderr.write(f"{name}: no rows visible to {user.username}, skipped")
+                continue
+
+            def with_instances():
+                return view.get_serializer(list(queryset[:page_size]), many=True).data
+
+            runs = [('serializer + json', with_instances, JSONRenderer()),
+                    ('serializer + orjson', with_instances, FastJSONRenderer())]
+            plan = values.plan_for(view.get_serializer())
+            if plan is not None:
+                def with_values():
+                    return plan.rows(plan.queryset(queryset)[:page_size])
+                runs.append(('values + orjson', with_values, FastJSONRenderer()))
+            else:
+                self.stderr.write(f"{name}: serializer not supported by the values path")
+
+            baseline = None
+            for mode, build, renderer in runs:
+                rows_ms, render_ms, content = self.measure(build, renderer, repeat)
+                total = rows_ms + render_ms
+                baseline = baseline or total
+                results.append({
+                    'resource': name, 'rows': count, 'mode': mode, 'rows_ms': rows_ms,
+                    'render_ms': render_ms, 'total_ms': total, 'speedup': baseline / total if total else 0,
+                    'bytes': len(content), 'gzip': len(gzip.compress(content)),
+                    'br': len(middleware.brotli.compress(content, quality=settings.CRM_BROTLI_QUALITY))
+                    if middleware.brotli else None,
+                })
+
+        self.stdout.write(f"median of {repeat} runs per page (page size {page_size})\n")
+        self.stdout.write(
+            f"{'resource':<12} {'rows':>5} {'mode':<20} {'rows ms':>8} {'render ms':>10} "
+            f"{'total ms':>9} {'speedup':>8} {'bytes':>9} {'gzip':>8} {'br':>8}"
+        )
+        for row in results:
+            br = '-' if row['br'] is None else row['br']
+            self.stdout.write(
+                f"{row['resource']:<12} {row['rows']:>5} {row['mode']:<20} {row['rows_ms']:>8.2f} "
+                f"{row['render_ms']:>10.2f} {row['total_ms']:>9.2f} {row['speedup']:>7.1f}x "
+                f"{row['bytes']:>9} {row['gzip']:>8} {br:>8}"
+            )
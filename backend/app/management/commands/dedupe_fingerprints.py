@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from app import fingerprints
+from app.models import Customer, Lead
+
+MODELS = {'lead': Lead, 'customer': Customer}
+
+
+class Command(BaseCommand):
+    help = "Backfill Lead/Customer fingerprints in batches and report duplicate clusters."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['lead', 'customer', 'all'], default='all')
+        parser.add_argument('--backfill', action='store_true', help="Recompute fingerprints for every row first.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--top', type=int, default=20, help="How many of the largest clusters to list.")
+
+    def handle(self, *args, **options):
+        names = MODELS if options['model'] == 'all' else [options['model']]
+        for name in names:
+            model = MODELS[name]
+            if options['backfill']:
+                self.backfill(model, options['batch_size'])
+            self.report(model, options['top'])
+
+    def backfill(self, model, batch_size):
+        # Sirf zaroori columns, iterator + bulk_update: badi table pe bhi memory constant
+        rows = model.objects.only('pk', 'fingerprint', *fingerprints.FINGERPRINT_FIELDS).order_by('pk')
+        batch, updated = [], 0
+        for obj in rows.iterator(chunk_size=batch_size):
+            old = obj.fingerprint
+            obj.refresh_fingerprint()
+            if obj.fingerprint != old:
+                batch.append(obj)
+            if len(batch) >= batch_size:
+                updated += self.flush(model, batch)
+                batch = []
+        updated += self.flush(model, batch)
+        self.stdout.write(f"{model.__name__}: {updated} fingerprints updated")
+
+    @staticmethod
+    def flush(model, batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            model.objects.bulk_update(batch, ['fingerprint'])
+        return len(batch)
+
+    def report(self, model, top):
+        clusters = (
+            model.objects.exclude(fingerprint__isnull=True)
+            .values('fingerprint')
+            .annotate(size=Count('id'))
+            .filter(size__gt=1)
+            .order_by('-size')
+        )
+        total_clusters = clusters.count()
+        self.stdout.write(f"{model.__name__}: {total_clusters} duplicate clusters")
+        for cluster in clusters[:top]:
+            members = list(
+                model.objects.filter(fingerprint=cluster['fingerprint'])
+                .order_by('pk')
+                .values_list('pk', 'company')[:10]
+            )
+            ids = ', '.join(str(pk) for pk, _ in members)
+            more = ' ...' if cluster['size'] > len(members) else ''
+            self.stdout.write(f"  {cluster['size']:>5} x {members[0][1]!r}: ids {ids}{more}")
@@ -0,0 +1,78 @@
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from app.models import Customer, Lead, Payment, SalesTask, Task, TechData, Tender
+
+
+def hot_queries():
+    """(label, expected index, queryset) for list views and DashboardStats access paths."""
+    today = date.today()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    return [
+        ('Lead list, status filter', 'lead_status_id_idx',
+         Lead.objects.filter(status='New').order_by('-id')[:20]),
+        ('Lead list, own rows', 'lead_owner_id_idx',
+         Lead.objects.filter(owner_id=1).order_by('-id')[:20]),
+        ('Lead list, date_after filter', 'lead_date_idx',
+         Lead.objects.filter(date__gte=start)),
+        ('Customer list, team view', 'customer_date_id_idx',
+         Customer.objects.order_by('-date', '-id')[:20]),
+        ('Customer list, own rows', 'customer_owner_date_idx',
+         Customer.objects.filter(owner_id=1).order_by('-date')[:20]),
+        ('Payment list, own rows', 'payment_owner_id_idx',
+         Payment.objects.filter(owner_id=1).order_by('-id')[:20]),
+        ('Dashboard recent payments', 'payment_date_id_idx',
+         Payment.objects.order_by('-date', '-id')[:5]),
+        ('SalesTask list, own rows', 'salestask_owner_date_idx',
+         SalesTask.objects.filter(owner_id=1).order_by('-date')[:20]),
+        ('Dashboard todays_calls', 'salestask_follow_up_idx',
+         SalesTask.objects.filter(next_follow_up=today)),
+        ('Task list, own rows', 'task_owner_date_idx',
+         Task.objects.filter(owner_id=1).order_by('-date')[:20]),
+        ('Dashboard high priority tasks', 'task_status_priority_idx',
+         Task.objects.filter(status='Pending', priority='High')),
+        ('Tender list, own rows', 'tender_owner_date_idx',
+         Tender.objects.filter(owner_id=1).order_by('-date')[:20]),
+        ('Dashboard service_due', 'techdata_service_due_idx',
+         TechData.objects.filter(service_due__gte=today)),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN output for the hot list/dashboard queries (markdown with --markdown)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--markdown', action='store_true', help="Emit a markdown report section.")
+        parser.add_argument(
+            '--no-seqscan', action='store_true',
+            help="Postgres only: SET enable_seqscan = off, so tiny dev tables still show index plans.",
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if options['no_seqscan'] and vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        out = self.stdout
+        if options['markdown']:
+            out.write(f'## {vendor} {self._server_version()}\n\n')
+
+        for label, index, queryset in hot_queries():
+            plan = queryset.explain()
+            used = 'yes' if index in plan else 'NO'
+            if options['markdown']:
+                out.write(f'### {label}\n\nExpected index: `{index}` — used: **{used}**\n')
+                out.write(f'\n```sql\n{queryset.query}\n```\n\n```\n{plan}\n```\n\n')
+            else:
+                out.write(f'[{used:>3}] {label} ({index})\n{plan}\n')
+
+    def _server_version(self):
+        if connection.vendor == 'sqlite':
+            return connection.Database.sqlite_version
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW server_version')
+            return cursor.fetchone()[0]
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app.storage import is_content_addressed, is_referenced, receipt_storage
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed receipt blobs that no payment references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default='receipts')
+        parser.add_argument('--min-age-hours', type=float, default=24,
+                            help="Skip blobs newer than this (upload worker may not have saved the row yet).")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        pruned = skipped = 0
+        for name in receipt_storage.walk(options['directory']):
+            if not is_content_addressed(name) or is_referenced(name):
+                continue
+            try:
+                modified = receipt_storage.get_modified_time(name)
+            except NotImplementedError:
+                skipped += 1  # Umar pata nahi to mat chhedo
+                continue
+            if modified > cutoff:
+                continue
+            if not options['dry_run']:
+                receipt_storage.base.delete(name)
+            pruned += 1
+        verb = "Would prune" if options['dry_run'] else "Pruned"
+        self.stdout.write(f"{verb} {pruned} receipt blobs ({skipped} skipped, modified time unknown)")
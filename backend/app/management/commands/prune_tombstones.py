@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from app import sync
+
+
+class Command(BaseCommand):
+    help = "Delete delta-sync tombstones older than CRM_TOMBSTONE_RETENTION_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        deleted = sync.prune_tombstones(options['database'])
+        self.stdout.write(f"Pruned {deleted} tombstones")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from app import funnel
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily funnel counters from the lead status history log."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        count = funnel.rebuild(options['database'])
+        self.stdout.write(f"Funnel counter rows: {count}")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from app import ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Payment.received / remaining from the ledger and rebuild the receivables "
+        "balance table from scratch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        fixed, balances = ledger.rebuild(options['database'])
+        self.stdout.write(f"Payments corrected: {fixed}, receivable rows: {balances}")
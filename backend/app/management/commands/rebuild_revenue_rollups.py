@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from app import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily revenue rollup table (analytics) from the Payment table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        count = rollups.rebuild(options['database'])
+        self.stdout.write(f"Revenue rollup rows: {count}")
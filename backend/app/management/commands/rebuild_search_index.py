@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from app import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for every searchable model."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        backend = search.get_backend(using)
+        if backend is None or not backend.needs_sync:
+            self.stdout.write("This database maintains its search indexes itself; nothing to do.")
+            return
+
+        for model in search.SEARCH_INDEXES:
+            with transaction.atomic(using=using):
+                backend.rebuild(model, using)
+            self.stdout.write(f"{model.__name__}: rebuilt")
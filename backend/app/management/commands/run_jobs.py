@@ -0,0 +1,104 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from app import caching, jobs
+
+
+def _execute(job, using):
+    try:
+        return jobs.run(job, using)
+    finally:
+        # Pool thread ke DB connections har job ke baad band
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (imports, receipt uploads, ...) with a thread pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=getattr(settings, 'CRM_JOB_WORKER_THREADS', 4))
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit when no job is ready instead of polling forever.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--allow-local-cache', action='store_true',
+                            help="Start even if the default cache is process-local (dev / single box).")
+
+    def handle(self, *args, **options):
+        if not caching.is_shared() and not options['allow_local_cache']:
+            # Worker ke writes (imports, receipts) ETag / dashboard / role caches bump karte
+            # hain — LocMem me wo bump web workers tak kabhi nahi pahunchega
+            if not jobs.inline():
+                raise CommandError(
+                    "The default cache is process-local, so cache invalidations from this worker "
+                    "would never reach the web processes. Configure a shared CACHE_BACKEND "
+                    "(redis / memcached / database), leave CRM_JOBS_INLINE unset or pass "
+                    "--allow-local-cache."
+                )
+            # Jobs web process me inline chal rahe hain: Procfile worker crash-loop na kare
+            self.stdout.write(
+                "The default cache is process-local, so jobs run inline in the web processes "
+                "(CRM_JOBS_INLINE). This worker stays idle; configure a shared CACHE_BACKEND to use it."
+            )
+            if not options['once']:
+                self._idle()
+            return
+        using = options['database']
+        threads = max(1, options['threads'])
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"Worker {worker_id} started with {threads} threads")
+        in_flight = {}  # future -> job id
+        last_maintenance = 0
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='crm-job') as pool:
+            while True:
+                for future in [f for f in in_flight if f.done()]:
+                    in_flight.pop(future)
+                    if future.exception() is None and future.result():
+                        done += 1
+                    else:
+                        failed += 1
+
+                now = time.monotonic()
+                if now - last_maintenance >= 30:
+                    # Heartbeat apne running jobs ka, aur crash hue workers ke jobs wapas queue
+                    jobs.heartbeat(list(in_flight.values()), using)
+                    jobs.requeue_stale(using)
+                    last_maintenance = now
+
+                claimed = []
+                if not self.stopping and len(in_flight) < threads:
+                    claimed = jobs.claim(worker_id, threads - len(in_flight), using)
+                    for job in claimed:
+                        in_flight[pool.submit(_execute, job, using)] = job.pk
+
+                if not in_flight and (self.stopping or (options['once'] and not claimed)):
+                    break
+                if not claimed:
+                    time.sleep(options['poll_interval'] if not in_flight else 0.2)
+
+        connections.close_all()
+        self.stdout.write(f"Worker {worker_id} stopped: {done} done, {failed} failed/retrying")
+
+    def _idle(self):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        while not self.stopping:
+            time.sleep(1)
+
+    def _stop(self, signum, frame):
+        # Naye jobs claim karna band, chal rahe jobs poore hone do
+        self.stopping = True
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app import receipts
+from app.models import Payment
+
+
+class Command(BaseCommand):
+    help = "Upload staged payment receipts that are still pending (e.g. after a worker restart)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Also retry receipts that ran out of attempts.")
+        parser.add_argument('--stale-minutes', type=int, default=15,
+                            help="Treat 'uploading' receipts untouched for this long as crashed.")
+
+    def handle(self, *args, **options):
+        stale_before = timezone.now() - timedelta(minutes=options['stale_minutes'])
+        Payment.objects.filter(receipt_status='uploading', updated_at__lt=stale_before).update(
+            receipt_status='pending',
+        )
+        if options['retry_failed']:
+            Payment.objects.filter(receipt_status='failed').exclude(receipt_staged='').update(
+                receipt_status='pending', receipt_attempts=0,
+            )
+
+        pending = Payment.objects.filter(receipt_status='pending').values_list('pk', flat=True)
+        uploaded = failed = 0
+        for payment_id in list(pending):
+            if receipts.upload(payment_id):
+                uploaded += 1
+            else:
+                failed += 1
+        self.stdout.write(f"Uploaded {uploaded} receipts, {failed} failed")
@@ -0,0 +1,288 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import db_router, perf
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:  # Brotli optional hai: na ho to sirf gzip
+        brotli = None
+
+logger = logging.getLogger('app.perf')
+
+
+# ==========================================
+#       SYNC + ASYNC (ASGI) DONO ⚡
+# ==========================================
+# Chain me ek bhi sync-only middleware ho to ASGI pe Django har request ek thread me
+# chalata hai aur async views ka fayda khatam. Isliye hamare middlewares dono modes
+# support karte hain (Django ke MiddlewareMixin jaisa pattern).
+class HybridMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class PerformanceMiddleware(HybridMiddleware):
+    """
+    Har request ka SQL count/time, serializer time, total time aur view name record
+    karta hai. Slow requests ko worst queries ke saath log karta hai, aur per-view
+    aggregates (perf/stats/) update karta hai. Server-Timing header sirf
+    CRM_SERVER_TIMING = 'staff' (staff users) / 'all' pe — default off, kyunki query
+    count + timings bahar walon ke liye info leak hai.
+    SQL timer har connection pe laga hai (perf.query_timer), yahan sirf metrics scope.
+    """
+
+    def handle(self, request):
+        if not getattr(settings, 'CRM_PERF_ENABLED', True):
+            return self.get_response(request)
+
+        metrics, token = perf.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            perf.end_request(token)
+        return self.record(request, response, metrics, self.show_timing(request))
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'CRM_PERF_ENABLED', True):
+            return await self.get_response(request)
+
+        metrics, token = perf.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            perf.end_request(token)
+        mode = self.timing_mode()
+        show = mode == 'all' or (mode == 'staff' and await sync_to_async(self.show_timing)(request))
+        return self.record(request, response, metrics, show)
+
+    @staticmethod
+    def timing_mode():
+        return getattr(settings, 'CRM_SERVER_TIMING', 'off')
+
+    def show_timing(self, request):
+        mode = self.timing_mode()
+        if mode == 'all':
+            return True
+        if mode != 'staff':
+            return False
+        # DRF authenticated user request pe bhi set karta hai (JWT bhi); session user lazy
+        # hai, isliye async path ise sync_to_async me bulata hai
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_authenticated and user.is_staff)
+
+    def record(self, request, response, metrics, show_timing=False):
+        total = metrics.elapsed()
+        view_name = self.get_view_name(request)
+        slow = total * 1000 >= getattr(settings, 'CRM_SLOW_REQUEST_MS', 500)
+
+        if show_timing:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.sql_count} queries"',
+                f'ser;dur={metrics.serializer_time * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}',
+            ])
+            response['Timing-Allow-Origin'] = '*'
+
+        perf.view_stats.add(view_name, metrics, total, slow)
+        if slow:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'view': view_name,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 2),
+                'sql_queries': metrics.sql_count,
+                'sql_ms': round(metrics.sql_time * 1000, 2),
+                'serializer_ms': round(metrics.serializer_time * 1000, 2),
+                'worst_queries': metrics.worst_queries(),
+            }))
+        return response
+
+    @staticmethod
+    def get_view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.view_name or match._func_path
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    GET/HEAD/OPTIONS (list, detail, DashboardStats, exports) ke reads replica pe.
+    Kisi client ne abhi write kiya ho to CRM_REPLICA_PIN_SECONDS tak uske reads
+    primary pe (replication lag me apna hi data gayab na dikhe) — signed cookie ya
+    client ka echo kiya hua pin header, aur shared cache ho to token ke hash se bhi
+    (app/db_router.py).
+    """
+
+    def handle(self, request):
+        if not db_router.replica_configured():
+            return self.get_response(request)
+
+        if request.method in SAFE_METHODS:
+            if db_router.is_pinned(request):
+                return self.get_response(request)
+            with db_router.reads_from(db_router.REPLICA_DB_ALIAS):
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if response.status_code < 400:
+            db_router.pin_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not db_router.replica_configured():
+            return await self.get_response(request)
+
+        if request.method in SAFE_METHODS:
+            if db_router.is_pinned(request):
+                return await self.get_response(request)
+            # reads_from ContextVar hai — sync_to_async threads tak bhi pahunchta hai
+            with db_router.reads_from(db_router.REPLICA_DB_ALIAS):
+                return await self.get_response(request)
+
+        response = await self.get_response(request)
+        if response.status_code < 400:
+            db_router.pin_to_primary(request, response)
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise 6.x sirf sync hai. API requests static file nahi hoti, to async mode me
+    sirf lookup (dict get) karke aage badh jao; static file mili to serve thread me.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+# ==========================================
+#       RESPONSE COMPRESSION (gzip / brotli 🗜️)
+# ==========================================
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/x-ndjson', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+)
+
+
+def accepted_encodings(header):
+    """'br;q=1.0, gzip;q=0.5, *;q=0' -> {'br': 1.0, 'gzip': 0.5, '*': 0.0}"""
+    encodings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[coding] = quality
+    return encodings
+
+
+def choose_encoding(header, streaming=False):
+    """Client ki q-values ke hisaab se 'br' / 'gzip' / None. Barabar ho to br (chhota output)."""
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get('*', 0.0)
+    gzip_q = encodings.get('gzip', wildcard)
+    br_q = encodings.get('br', wildcard) if brotli is not None and not streaming else 0.0
+    if br_q > 0 and br_q >= gzip_q:
+        return 'br'
+    if gzip_q > 0:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Bade JSON / CSV responses compress karta hai — Accept-Encoding negotiate karke brotli
+    (agar `brotli` package installed hai) warna gzip. 500 leads ki list ~10x chhoti.
+
+    CRM_COMPRESS_MIN_BYTES se chhote responses, Range (206 / Content-Range) responses,
+    pehle se encoded (WhiteNoise ki .br/.gz files) aur already-compressed types (xlsx,
+    images) chhod deta hai. Streaming responses
+    Django ke gzip se. Django GZipMiddleware jaisa hi: Vary: Accept-Encoding, strong
+    ETag weak ho jata hai (If-None-Match weak comparison se match karta hai).
+    """
+
+    def process_response(self, request, response):
+        if response.status_code == 206 or response.has_header('Content-Range'):
+            # Range response ke byte offsets original body ke hain — compress kiya to toot jayenge
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'CRM_COMPRESS_MIN_BYTES', 1024):
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), response.streaming)
+        if encoding == 'gzip':
+            return super().process_response(request, response)
+        if encoding is None:
+            return response
+
+        compressed = brotli.compress(response.content, quality=getattr(settings, 'CRM_BROTLI_QUALITY', 4))
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_lead_nature_of_business'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['owner', '-date'], name='customer_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['-date', '-id'], name='customer_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['status', '-id'], name='lead_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['owner', '-id'], name='lead_owner_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['date'], name='lead_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['owner', '-id'], name='payment_owner_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-date', '-id'], name='payment_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salestask',
+            index=models.Index(fields=['owner', '-date'], name='salestask_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salestask',
+            index=models.Index(fields=['-date'], name='salestask_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salestask',
+            index=models.Index(fields=['next_follow_up'], name='salestask_follow_up_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', '-date'], name='task_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-date'], name='task_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'priority'], name='task_status_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='techdata',
+            index=models.Index(fields=['service_due'], name='techdata_service_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['owner', '-date'], name='tender_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['-date'], name='tender_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['status'], name='tender_status_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+# table -> searchable columns (views ke search_fields jaise hi)
+SEARCH_COLUMNS = {
+    'app_lead': ('name', 'company', 'status', 'contact'),
+    'app_customer': ('name', 'company', 'email'),
+    'app_payment': ('company', 'invoice', 'so_no'),
+    'app_salestask': ('lead_name', 'company', 'status'),
+    'app_task': ('task_name', 'company_name', 'status', 'priority'),
+    'app_tender': ('company', 'bid_no', 'status'),
+    'app_techdata': ('company', 'machine', 'serial'),
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    qn = schema_editor.quote_name
+    if vendor == 'sqlite':
+        # FTS5 trigram tokenizer: substring match (icontains jaisa) but indexed
+        for table, columns in SEARCH_COLUMNS.items():
+            cols = ', '.join(columns)
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5({cols}, tokenize='trigram')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table}_fts (rowid, {cols}) SELECT id, {cols} FROM {table}"
+            )
+    elif vendor == 'postgresql':
+        # SearchFilter ka icontains = UPPER(col::text) LIKE UPPER(%term%) -> same expression pe GIN trigram
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                schema_editor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{column}_trgm "
+                    f"ON {qn(table)} USING gin (UPPER({qn(column)}::text) gin_trgm_ops)"
+                )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in SEARCH_COLUMNS.items():
+        if vendor == 'sqlite':
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+        elif vendor == 'postgresql':
+            for column in columns:
+                schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='duplicate_policy',
+            field=models.CharField(default='flag', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='duplicates',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='flagged_rows',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='merged_rows',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='skipped_rows',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40, null=True),
+        ),
+    ]
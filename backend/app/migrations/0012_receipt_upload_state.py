@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_receipts(apps, schema_editor):
+    # Purane receipts seedha storage pe upload hue the
+    Payment = apps.get_model('app', 'Payment')
+    Payment.objects.exclude(receipt='').exclude(receipt__isnull=True).update(receipt_status='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_change_tracking'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_error',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_staged',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_status',
+            field=models.CharField(choices=[('none', 'No receipt'), ('pending', 'Pending upload'), ('uploading', 'Uploading'), ('done', 'Uploaded'), ('failed', 'Upload failed')], default='none', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['receipt_status'], name='payment_receipt_status_idx'),
+        ),
+        migrations.RunPython(mark_existing_receipts, migrations.RunPython.noop),
+    ]
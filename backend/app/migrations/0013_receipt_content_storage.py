@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:27
+
+import app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_receipt_upload_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=app.storage.get_receipt_storage, upload_to='receipts/thumbs/'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='receipt',
+            field=models.ImageField(blank=True, null=True, storage=app.storage.get_receipt_storage, upload_to='receipts/'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_job_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salestask',
+            index=models.Index(fields=['status', 'next_follow_up', 'owner'], name='salestask_due_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:48
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F
+
+from app.fingerprints import normalize_company
+
+
+def seed_ledger(apps, schema_editor):
+    # Purani payments: advance = pehli ledger entry, remaining = amount - advance,
+    # aur (company, owner) + company total balances
+    Payment = apps.get_model('app', 'Payment')
+    LedgerEntry = apps.get_model('app', 'LedgerEntry')
+    Receivable = apps.get_model('app', 'Receivable')
+
+    entries = [
+        LedgerEntry(payment_id=pk, kind='advance', amount=advance, date=day, created_by_id=owner_id)
+        for pk, advance, day, owner_id in Payment.objects.exclude(advance=0).values_list('pk', 'advance', 'date', 'owner_id')
+    ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=500)
+    Payment.objects.update(received=F('advance'), remaining=F('amount') - F('advance'))
+
+    totals = {}
+    for company, owner_id, amount, advance in Payment.objects.values_list('company', 'owner_id', 'amount', 'advance'):
+        key = normalize_company(company) or (company or '').strip().lower()
+        for scope in ((key, owner_id), (key, None)):
+            row = totals.setdefault(scope, [company, Decimal('0'), Decimal('0'), 0])
+            row[0] = company
+            row[1] += amount
+            row[2] += advance
+            row[3] += 1
+    Receivable.objects.bulk_create([
+        Receivable(company_key=key, owner_id=owner_id, company=company, billed=billed,
+                   received=received, balance=billed - received, payments=count)
+        for (key, owner_id), (company, billed, received, count) in totals.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_salestask_agenda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='received',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=15),
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('advance', 'Advance'), ('receipt', 'Receipt'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('date', models.DateField(default=datetime.date.today)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('note', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='app.payment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['payment', '-date', '-id'], name='ledger_payment_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Receivable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_key', models.CharField(max_length=200)),
+                ('company', models.CharField(max_length=200)),
+                ('billed', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('received', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('payments', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', '-balance'], name='receivable_owner_balance_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company_key', 'owner'), name='receivable_company_owner_uniq'), models.UniqueConstraint(condition=models.Q(('owner__isnull', True)), fields=('company_key',), name='receivable_company_total_uniq')],
+            },
+        ),
+        migrations.RunPython(seed_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+from app.fingerprints import company_key
+
+
+def seed_rollups(apps, schema_editor):
+    # Purani payments ke din-wise total / owner / company rows
+    Payment = apps.get_model('app', 'Payment')
+    RevenueDaily = apps.get_model('app', 'RevenueDaily')
+
+    rows = {}
+    payments = (
+        Payment.objects.order_by().values('date', 'company', 'owner_id')
+        .annotate(revenue=Sum('amount'), advance=Sum('advance'), received=Sum('received'), count=Count('id'))
+    )
+    for p in payments:
+        for scope in (('total', None, ''), ('owner', p['owner_id'], ''), ('company', None, company_key(p['company']))):
+            row = rows.setdefault((scope[0], p['date'], scope[1], scope[2]), RevenueDaily(
+                grain=scope[0], day=p['date'], owner_id=scope[1], company_key=scope[2],
+                company=p['company'] if scope[0] == 'company' else '', payments=0,
+            ))
+            row.revenue += p['revenue']
+            row.advance += p['advance']
+            row.received += p['received']
+            row.payments += p['count']
+    RevenueDaily.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_receivables_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grain', models.CharField(choices=[('total', 'Total'), ('owner', 'Per owner'), ('company', 'Per company')], max_length=10)),
+                ('day', models.DateField()),
+                ('company_key', models.CharField(blank=True, max_length=200)),
+                ('company', models.CharField(blank=True, max_length=200)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('advance', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('received', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('payments', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['grain', 'day'], name='revenue_grain_day_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('grain', 'total')), fields=('day',), name='revenue_total_day_uniq'), models.UniqueConstraint(condition=models.Q(('grain', 'owner')), fields=('day', 'owner'), name='revenue_owner_day_uniq'), models.UniqueConstraint(condition=models.Q(('grain', 'company')), fields=('day', 'company_key'), name='revenue_company_day_uniq')],
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
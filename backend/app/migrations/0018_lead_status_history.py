@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_status_changed_at(apps, schema_editor):
+    # Purani leads kab is status me aayi pata nahi: lead ki date (ya last update) se andaza.
+    # History / funnel counters isi migration se shuru hote hain.
+    Lead = apps.get_model('app', 'Lead')
+    Lead.objects.update(status_changed_at=Coalesce('date', 'updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_revenue_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='FunnelDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=50)),
+                ('entered', models.IntegerField(default=0)),
+                ('exited', models.IntegerField(default=0)),
+                ('timed_exits', models.IntegerField(default=0)),
+                ('exit_seconds', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='funnel_day_status_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeadStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lead_id', models.BigIntegerField()),
+                ('from_status', models.CharField(blank=True, max_length=50)),
+                ('to_status', models.CharField(max_length=50)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('seconds_in_previous', models.BigIntegerField(blank=True, null=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lead_id', 'changed_at'], name='leadstatus_lead_idx'), models.Index(fields=['changed_at'], name='leadstatus_changed_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_status_changed_at, migrations.RunPython.noop),
+    ]
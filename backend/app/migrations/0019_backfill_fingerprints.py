@@ -0,0 +1,37 @@
+from django.db import migrations
+
+from app import fingerprints
+
+BATCH_SIZE = 2000
+
+
+def backfill_fingerprints(apps, schema_editor):
+    # 0010 ne column NULL add kiya tha: purani rows duplicate check me kabhi match nahi
+    # hoti thi jab tak koi `dedupe_fingerprints --backfill` na chalaye. Yahin bhar do.
+    for name in ('Lead', 'Customer'):
+        model = apps.get_model('app', name)
+        rows = (
+            model.objects.filter(fingerprint__isnull=True)
+            .only('pk', 'fingerprint', *fingerprints.FINGERPRINT_FIELDS).order_by('pk')
+        )
+        batch = []
+        for obj in rows.iterator(chunk_size=BATCH_SIZE):
+            obj.fingerprint = fingerprints.compute(obj.company, obj.contact, obj.email)
+            if obj.fingerprint:
+                batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ['fingerprint'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_lead_status_history'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
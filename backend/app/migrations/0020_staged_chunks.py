@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_backfill_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('seq', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('key', 'seq'), name='stagedchunk_key_seq_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_staged_chunks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tombstone',
+            name='owner_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'owner_id', 'deleted_at'], name='tombstone_owner_deleted_idx'),
+        ),
+    ]
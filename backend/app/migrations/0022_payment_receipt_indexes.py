@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_tombstone_owner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['receipt'], name='payment_receipt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['receipt_thumbnail'], name='payment_receipt_thumb_idx'),
+        ),
+    ]
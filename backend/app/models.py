@@ -1,9 +1,71 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
 from datetime import date  # <--- Ye zaroori hai default date ke liye
+from . import fingerprints
+from .storage import get_receipt_storage
+
+
+# ==========================================
+#       CHANGE TRACKING (delta sync ke liye)
+# ==========================================
+class TrackedQuerySet(models.QuerySet):
+    # queryset.update() / bulk_update() bhi updated_at + version bump karein
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        kwargs.setdefault('version', F('version') + 1)
+        return super().update(**kwargs)
+
+
+class TrackedModel(models.Model):
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = TrackedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version = (self.version or 0) + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'updated_at', 'version'}
+        super().save(*args, **kwargs)
+
+
+# Delete hue rows ka record, taaki ?since= clients ko bata sakein
+class Tombstone(models.Model):
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    # Deleted row ka owner: non-team users ko sirf apne deletes dikhte hain. NULL = pata
+    # nahi (bulk records_changed) -> sirf team ko
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+            models.Index(fields=['model', 'owner_id', 'deleted_at'], name='tombstone_owner_deleted_idx'),
+        ]
+
+
+# Lead / Customer: duplicate detection ke liye normalized hash (app/fingerprints.py)
+class FingerprintMixin:
+    def refresh_fingerprint(self):
+        self.fingerprint = fingerprints.compute(self.company, self.contact, self.email)
+
+    def save(self, *args, **kwargs):
+        self.refresh_fingerprint()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(fingerprints.FINGERPRINT_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | {'fingerprint'}
+        super().save(*args, **kwargs)
 
 # 1. Lead Manager Model
-class Lead(models.Model):
+class Lead(FingerprintMixin, TrackedModel):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateTimeField(null=True, blank=True) 
     sno = models.CharField(max_length=50, blank=True)
@@ -19,12 +81,39 @@ class Lead(models.Model):
     note = models.TextField(blank=True)
     purpose = models.CharField(max_length=200, blank=True)
     status = models.CharField(max_length=50, default="New")
+    # Current status kab se hai (funnel ka time-in-stage, app/funnel.py)
+    status_changed_at = models.DateTimeField(default=timezone.now, null=True, blank=True, editable=False)
+    fingerprint = models.CharField(max_length=40, null=True, blank=True, editable=False, db_index=True)
+
+    class Meta:
+        indexes = [
+            # List: filter by status, newest first
+            models.Index(fields=['status', '-id'], name='lead_status_id_idx'),
+            models.Index(fields=['owner', '-id'], name='lead_owner_id_idx'),
+            models.Index(fields=['date'], name='lead_date_idx'),
+        ]
 
     def __str__(self):
         return self.company
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # DB waala status yaad rakho: save pe transition bina extra query ke pata chalta hai
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'status_changed_at'}
+        # Status history + funnel counters (signals.py) isi transaction me
+        using = kwargs.get('using') or router.db_for_write(Lead, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
 # 2. Customer Manager Model
-class Customer(models.Model):
+class Customer(FingerprintMixin, TrackedModel):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateField(null=True, blank=True)
     sno = models.CharField(max_length=50, blank=True)
@@ -35,9 +124,16 @@ class Customer(models.Model):
     purpose = models.CharField(max_length=200, blank=True)
     status = models.CharField(max_length=50, default="Active")
     remarks = models.TextField(blank=True)
+    fingerprint = models.CharField(max_length=40, null=True, blank=True, editable=False, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-date'], name='customer_owner_date_idx'),
+            models.Index(fields=['-date', '-id'], name='customer_date_id_idx'),
+        ]
 
 # 3. Payment Status Model
-class Payment(models.Model):
+class Payment(TrackedModel):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     # 👇👇 Naya Field: Date (Default aaj ki date lega) 👇👇
     date = models.DateField(default=date.today) 
@@ -49,13 +145,204 @@ class Payment(models.Model):
     remaining = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     invoice = models.CharField(max_length=100, blank=True)
     remark = models.TextField(blank=True)
-    receipt = models.ImageField(upload_to='receipts/', null=True, blank=True)
+    # Content hash se naam (storage.py): same receipt ki ek hi copy storage me
+    receipt = models.ImageField(upload_to='receipts/', storage=get_receipt_storage, null=True, blank=True)
+    receipt_thumbnail = models.ImageField(
+        upload_to='receipts/thumbs/', storage=get_receipt_storage, null=True, blank=True, editable=False,
+    )
+    # Receipt pehle local staging me aata hai, storage pe upload background worker karta hai
+    RECEIPT_STATUS = (
+        ('none', 'No receipt'),
+        ('pending', 'Pending upload'),
+        ('uploading', 'Uploading'),
+        ('done', 'Uploaded'),
+        ('failed', 'Upload failed'),
+    )
+    receipt_status = models.CharField(max_length=10, choices=RECEIPT_STATUS, default='none')
+    receipt_staged = models.CharField(max_length=500, blank=True, editable=False)
+    receipt_attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    receipt_error = models.TextField(blank=True, editable=False)
+
+    # Ledger (LedgerEntry) ka total: advance + receipts + adjustments. Sirf ledger.py
+    # F() se badalta hai; remaining = amount - received server calculate karta hai.
+    received = models.DecimalField(max_digits=15, decimal_places=2, default=0, editable=False)
+
+    # Bulk update me ye fields badle to har row ka save() (ledger / rollup signals) chahiye
+    BULK_SAVE_FIELDS = ('amount', 'advance', 'company', 'date')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-id'], name='payment_owner_id_idx'),
+            # Upload worker: pending/failed receipts dhoondhna
+            models.Index(fields=['receipt_status'], name='payment_receipt_status_idx'),
+            # Shared receipt blobs: delete se pehle "koi aur payment isse use karta hai?"
+            models.Index(fields=['receipt'], name='payment_receipt_idx'),
+            models.Index(fields=['receipt_thumbnail'], name='payment_receipt_thumb_idx'),
+            # Dashboard: recent payments
+            models.Index(fields=['-date', '-id'], name='payment_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.company} - {self.amount}"
 
+    def save(self, *args, **kwargs):
+        self.date = self._meta.get_field('date').to_python(self.date)
+        self.amount = self._meta.get_field('amount').to_python(self.amount)
+        self.advance = self._meta.get_field('advance').to_python(self.advance)
+        if self._state.adding:
+            self.remaining = self.amount - (self.received or 0)
+        else:
+            # Stale instance ka `received` kabhi overwrite na ho (receipt beech me aa sakti hai)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+            update_fields = set(update_fields) - {'received'}
+            if update_fields & {'amount', 'remaining'}:
+                update_fields.add('remaining')
+                self.remaining = self.amount - F('received')
+            kwargs['update_fields'] = update_fields
+
+        # Payment row + ledger / balance writes (signals.py) ek hi transaction me
+        using = kwargs.get('using') or router.db_for_write(Payment, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if isinstance(self.remaining, models.Expression):
+                self.refresh_from_db(using=using, fields=['received', 'remaining'])
+
+
+# Payment ka ledger: advance + baad ki receipts. Append-only — galti = `adjustment` entry
+class LedgerEntry(models.Model):
+    KIND_CHOICES = [
+        ('advance', 'Advance'),
+        ('receipt', 'Receipt'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='ledger_entries')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Received me itna judta hai (adjustment negative ho sakta hai)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    date = models.DateField(default=date.today)
+    reference = models.CharField(max_length=100, blank=True)  # UTR / cheque no.
+    note = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['payment', '-date', '-id'], name='ledger_payment_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.amount} (Payment #{self.payment_id})"
+
+
+# Company (aur company + owner) ka running balance — har ledger write ke saath F() se
+# update hota hai, to receivables list ledger history scan nahi karti. owner NULL = company total.
+class Receivable(models.Model):
+    company_key = models.CharField(max_length=200)  # fingerprints.normalize_company
+    company = models.CharField(max_length=200)  # Display ke liye latest naam
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    billed = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    received = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    payments = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company_key', 'owner'], name='receivable_company_owner_uniq'),
+            # NULL owner unique constraint me distinct hota hai: company total ke liye alag
+            models.UniqueConstraint(
+                fields=['company_key'], condition=models.Q(owner__isnull=True), name='receivable_company_total_uniq',
+            ),
+        ]
+        indexes = [
+            # WHERE owner_id IS NULL / = X ORDER BY balance DESC
+            models.Index(fields=['owner', '-balance'], name='receivable_owner_balance_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.company}: {self.balance}"
+
+
+# Lead status ka append-only log (app/funnel.py). Lead delete ho jaye tab bhi history
+# rehti hai, isliye lead_id plain column hai (Tombstone jaisa), FK nahi.
+class LeadStatusChange(models.Model):
+    lead_id = models.BigIntegerField()
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    from_status = models.CharField(max_length=50, blank=True)  # '' = nayi lead
+    to_status = models.CharField(max_length=50)
+    changed_at = models.DateTimeField(default=timezone.now)
+    # from_status me kitne second rahi (pata na ho to null)
+    seconds_in_previous = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lead_id', 'changed_at'], name='leadstatus_lead_idx'),
+            models.Index(fields=['changed_at'], name='leadstatus_changed_idx'),
+        ]
+
+    def __str__(self):
+        return f"Lead #{self.lead_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+# Funnel counters: din + status. Funnel endpoint sirf ye padhta hai, Lead table nahi.
+class FunnelDaily(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=50)
+    entered = models.IntegerField(default=0)
+    exited = models.IntegerField(default=0)
+    # Time-in-stage: exits jinka entry time pata tha, unka total
+    timed_exits = models.IntegerField(default=0)
+    exit_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='funnel_day_status_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}: +{self.entered} -{self.exited}"
+
+
+# Payments ka daily rollup (app/rollups.py) — analytics charts Payment table nahi padhte.
+# Teen grain: total (poora din), owner (din + owner), company (din + company).
+class RevenueDaily(models.Model):
+    GRAIN_CHOICES = [
+        ('total', 'Total'),
+        ('owner', 'Per owner'),
+        ('company', 'Per company'),
+    ]
+
+    grain = models.CharField(max_length=10, choices=GRAIN_CHOICES)
+    day = models.DateField()  # Payment.date
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)  # sirf 'owner' grain
+    company_key = models.CharField(max_length=200, blank=True)  # sirf 'company' grain
+    company = models.CharField(max_length=200, blank=True)
+    revenue = models.DecimalField(max_digits=17, decimal_places=2, default=0)  # Sum(amount)
+    advance = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    received = models.DecimalField(max_digits=17, decimal_places=2, default=0)  # remaining = revenue - received
+    payments = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day'], condition=models.Q(grain='total'), name='revenue_total_day_uniq'),
+            models.UniqueConstraint(fields=['day', 'owner'], condition=models.Q(grain='owner'),
+                                    name='revenue_owner_day_uniq'),
+            models.UniqueConstraint(fields=['day', 'company_key'], condition=models.Q(grain='company'),
+                                    name='revenue_company_day_uniq'),
+        ]
+        indexes = [
+            # WHERE grain = X AND day BETWEEN ... (chart range)
+            models.Index(fields=['grain', 'day'], name='revenue_grain_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.grain} {self.day}: {self.revenue}"
+
 # 4. Task Manager Model (System/Admin Tasks)
-class Task(models.Model):
+class Task(TrackedModel):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateField(default=date.today) 
     
@@ -70,8 +357,16 @@ class Task(models.Model):
     deadline = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=50, default="Pending")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-date'], name='task_owner_date_idx'),
+            models.Index(fields=['-date'], name='task_date_idx'),
+            # Dashboard: pending / high priority counts
+            models.Index(fields=['status', 'priority'], name='task_status_priority_idx'),
+        ]
+
 # 5. Tender Submission Model
-class Tender(models.Model):
+class Tender(TrackedModel):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateField(null=True, blank=True)
     company = models.CharField(max_length=200)
@@ -81,8 +376,15 @@ class Tender(models.Model):
     end_date = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=50, default="Draft")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-date'], name='tender_owner_date_idx'),
+            models.Index(fields=['-date'], name='tender_date_idx'),
+            models.Index(fields=['status'], name='tender_status_idx'),
+        ]
+
 # 6. Tech Data Model
-class TechData(models.Model):
+class TechData(TrackedModel):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     company = models.CharField(max_length=200)
     machine = models.CharField(max_length=200, blank=True)
@@ -91,8 +393,13 @@ class TechData(models.Model):
     service_due = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=50, default="Active")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['service_due'], name='techdata_service_due_idx'),
+        ]
+
 # 7. Sales Task Model (Follow Ups)
-class SalesTask(models.Model):
+class SalesTask(TrackedModel):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateField(null=True, blank=True)
     lead_name = models.CharField(max_length=200)
@@ -112,5 +419,122 @@ class SalesTask(models.Model):
     ]
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='Medium')
 
+    # Ye statuses "abhi karna hai" hain (Done agenda me nahi aata)
+    OPEN_STATUSES = ('Pending', 'Rescheduled')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-date'], name='salestask_owner_date_idx'),
+            models.Index(fields=['-date'], name='salestask_date_idx'),
+            # Dashboard: todays_calls
+            models.Index(fields=['next_follow_up'], name='salestask_follow_up_idx'),
+            # Agenda: open tasks (status) jo next_follow_up tak due hain, owner wise
+            models.Index(fields=['status', 'next_follow_up', 'owner'], name='salestask_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.lead_name} - {self.task_type}"
+
+# 8. Import Job Model (Background lead import ka progress)
+class ImportJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'XLSX'),
+        ('ndjson', 'NDJSON'),
+    ]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    source_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    staged_file = models.CharField(max_length=500)
+    batch_size = models.PositiveIntegerField(default=500)
+
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    # [{"row": 12, "errors": {...}}, ...] — CRM_IMPORT_MAX_ERRORS tak hi store hote hain
+    errors = models.JSONField(default=list, blank=True)
+
+    # Duplicate handling: skip / merge / flag (app/fingerprints.py)
+    duplicate_policy = models.CharField(max_length=10, default='flag')
+    skipped_rows = models.PositiveIntegerField(default=0)
+    merged_rows = models.PositiveIntegerField(default=0)
+    flagged_rows = models.PositiveIntegerField(default=0)
+    # [{"row": 7, "duplicate_of": 123, "duplicate_of_row": null, "action": "skipped"}, ...]
+    duplicates = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import #{self.id} ({self.status})"
+
+
+# 8b. Staged upload ke chunks (web aur worker alag machines pe ho sakte hain, isliye DB me)
+class StagedChunk(models.Model):
+    key = models.CharField(max_length=255)  # app/staging.py ka staged key
+    seq = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'seq'], name='stagedchunk_key_seq_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} #{self.seq}"
+
+
+# 9. Background Job Model (DB queue — koi broker nahi, `manage.py run_jobs` chalata hai)
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)  # app/jobs.py registry ka naam
+    payload = models.JSONField(default=dict, blank=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    priority = models.SmallIntegerField(default=0)  # chhota = pehle
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)  # retry backoff isi se
+
+    # Progress: processed / total (total null = pata nahi)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    # Kaunsa worker chala raha hai + heartbeat (crash hua to stale job requeue)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker claim: WHERE status='queued' AND run_after <= now ORDER BY priority, run_after
+            models.Index(fields=['status', 'priority', 'run_after'], name='job_claim_idx'),
+            models.Index(fields=['owner', '-id'], name='job_owner_id_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.lead_name} - {self.task_type}"
\ No newline at end of file
+        return f"Job #{self.id} {self.task} ({self.status})"
@@ -0,0 +1,183 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# ==========================================
+#       PAGINATION CLASS (🚀 Fast Loading)
+# ==========================================
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 20  # Ek baar mein sirf 20 leads aayengi
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset ka async version (acount + async slice) — app/async_views.py."""
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count cached_property hai: pehle hi bhar do, warna Paginator sync COUNT chalayega
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [obj async for obj in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
+
+
+# ==========================================
+#       KEYSET (CURSOR) PAGINATION
+# ==========================================
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination: `?cursor=` (khali = pehla page) bhejo tab hi lagta hai.
+    Bina cursor ke view ka `fallback_pagination_class` chalta hai (None = poori list,
+    jaise frontend abhi expect karta hai).
+
+    Ordering view ke `keyset_ordering` se aati hai, e.g. ('-date', '-id'). Last field
+    unique hona chahiye (id) taaki ties stable rahein. Page N = WHERE (date, id) < last
+    seen row, isliye na OFFSET na COUNT(*) — har page page 1 jitna sasta.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.active = False
+        self.fallback = None
+
+    # --- DRF hooks ---
+    def paginate_queryset(self, queryset, request, view=None):
+        self.active = self.cursor_query_param in request.query_params
+        if not self.active:
+            fallback_class = getattr(view, 'fallback_pagination_class', None)
+            if fallback_class is None:
+                return None
+            self.fallback = fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view=view)
+
+        return self.set_page(list(self.page_queryset(queryset, request, view)))
+
+    # Async views (app/async_views.py) beech me rows khud async fetch karte hain
+    def page_queryset(self, queryset, request, view=None):
+        """Is page ki rows ka queryset (page_size + 1, taaki next page ka pata chale)."""
+        self.active = True
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        model = queryset.model
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+
+        position = self.decode_cursor(request, model)
+        queryset = queryset.order_by(*[('-' if desc else '') + name for name, desc in self.ordering])
+        if position is not None:
+            queryset = queryset.filter(self.after(model, position))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.active:
+            return self.fallback.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # --- helpers ---
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'keyset_ordering', ('-id',))
+        return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+    def after(self, model, position):
+        """WHERE clause for rows that come after `position` in the keyset ordering."""
+        clause = Q(pk__in=[])
+        prefix = Q()
+        for (name, desc), value in zip(self.ordering, position):
+            nullable = model._meta.get_field(name).null
+            # Nulls kis end pe aate hain: sqlite = smallest, postgres = largest
+            nulls_at_end = nullable and desc != self.nulls_largest
+            if value is None:
+                if not nulls_at_end:
+                    clause |= prefix & Q(**{f'{name}__isnull': False})
+                prefix &= Q(**{f'{name}__isnull': True})
+            else:
+                step = Q(**{f'{name}__{"lt" if desc else "gt"}': value})
+                if nulls_at_end:
+                    step |= Q(**{f'{name}__isnull': True})
+                clause |= prefix & step
+                prefix &= Q(**{name: value})
+        return clause
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if not isinstance(raw, list) or len(raw) != len(self.ordering):
+                raise ValueError
+            return [
+                None if value is None else model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.ordering, raw)
+            ]
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance):
+        values = []
+        for name, _ in self.ordering:
+            # Row model instance ho sakti hai ya .values() dict (app/values.py)
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        raw = json.dumps(values).encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
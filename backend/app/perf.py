@@ -0,0 +1,145 @@
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ==========================================
+#       PER-REQUEST PERF METRICS 📊
+# ==========================================
+# PerformanceMiddleware har request ke liye RequestMetrics banata hai; SQL wrapper
+# aur serializer timer isi me likhte hain. Per-view aggregates process-local hain.
+
+_current = ContextVar('crm_perf_metrics', default=None)
+
+WORST_QUERIES_KEPT = 5
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self._worst = []  # min-heap of (duration, seq, sql)
+
+    def record_query(self, sql, duration):
+        self.sql_count += 1
+        self.sql_time += duration
+        entry = (duration, self.sql_count, sql)
+        if len(self._worst) < WORST_QUERIES_KEPT:
+            heapq.heappush(self._worst, entry)
+        elif duration > self._worst[0][0]:
+            heapq.heapreplace(self._worst, entry)
+
+    def worst_queries(self):
+        return [
+            {'ms': round(duration * 1000, 2), 'sql': sql[:1000]}
+            for duration, _, sql in sorted(self._worst, reverse=True)
+        ]
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def query_timer(execute, sql, params, many, context):
+    """
+    Har connection pe hamesha laga rehta hai (connection_created signal, signals.py) aur
+    current request ke metrics me likhta hai. Async views me ORM query sync_to_async
+    thread pe chalti hai jiska connection alag hota hai — ContextVar wahan bhi copy
+    hota hai, isliye sync aur async dono requests ki SQL count hoti hai.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - start)
+
+
+def install_query_timer(connection):
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+@contextmanager
+def measure_serializer():
+    """Serializer ka time, uske andar chali SQL ko chhod ke (lazy querysets)."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    sql_before = metrics.sql_time
+    try:
+        yield
+    finally:
+        metrics.serializer_time += (time.perf_counter() - start) - (metrics.sql_time - sql_before)
+
+
+# ==========================================
+#       PER-VIEW AGGREGATES
+# ==========================================
+class ViewStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view_name, metrics, total, slow):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = {
+                    'requests': 0, 'slow_requests': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0,
+                    'sql_queries': 0, 'sql_ms': 0.0, 'serializer_ms': 0.0,
+                }
+            total_ms = total * 1000
+            stats['requests'] += 1
+            stats['slow_requests'] += int(slow)
+            stats['total_ms'] += total_ms
+            stats['max_ms'] = max(stats['max_ms'], total_ms)
+            stats['sql_queries'] += metrics.sql_count
+            stats['sql_ms'] += metrics.sql_time * 1000
+            stats['serializer_ms'] += metrics.serializer_time * 1000
+
+    def snapshot(self):
+        with self._lock:
+            items = [(name, dict(stats)) for name, stats in self._views.items()]
+        rows = []
+        for name, stats in items:
+            n = stats['requests']
+            rows.append({
+                'view': name,
+                'requests': n,
+                'slow_requests': stats['slow_requests'],
+                'avg_ms': round(stats['total_ms'] / n, 2),
+                'max_ms': round(stats['max_ms'], 2),
+                'avg_sql_queries': round(stats['sql_queries'] / n, 2),
+                'avg_sql_ms': round(stats['sql_ms'] / n, 2),
+                'avg_serializer_ms': round(stats['serializer_ms'] / n, 2),
+                'total_ms': round(stats['total_ms'], 2),
+            })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+view_stats = ViewStats()
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from . import roles
 
 # Rule: Sales wale sab kar sakte hain, Tech wale sirf dekh sakte hain
 class IsSalesTeamOrReadOnly(permissions.BasePermission):
@@ -7,7 +8,7 @@ class IsSalesTeamOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         # Agar Edit/Delete/Add karna hai, toh Group 'Sales' hona chahiye ya Superuser
-        return request.user.groups.filter(name='Sales').exists() or request.user.is_superuser
+        return roles.is_sales(request.user) or request.user.is_superuser
 
 # Rule: Tech wale sab kar sakte hain, Sales wale sirf dekh sakte hain
 class IsTechTeamOrReadOnly(permissions.BasePermission):
@@ -15,4 +16,4 @@ class IsTechTeamOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         # Agar Edit/Delete/Add karna hai, toh Group 'Tech' hona chahiye ya Superuser
-        return request.user.groups.filter(name='Tech').exists() or request.user.is_superuser
\ No newline at end of file
+        return roles.is_tech(request.user) or request.user.is_superuser
\ No newline at end of file
@@ -0,0 +1,167 @@
+import logging
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db.models import F
+from PIL import Image, ImageOps
+
+from . import jobs, staging
+from .models import Payment
+from .signals import records_changed
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+#       RECEIPT UPLOAD PIPELINE (🧾 request path se bahar)
+# ==========================================
+# Request me receipt sirf stage hota hai (app/staging.py) aur Payment turant commit
+# (receipt_status='pending'). Storage (Cloudinary) pe upload background job (app/jobs.py)
+# karta hai, retries + backoff ke saath — shared cache / worker na ho to wahi job web
+# process me inline (jobs.inline()). Status: none -> pending -> uploading
+# -> done / failed. `manage.py upload_receipts` atke hue uploads dobara chalata hai.
+
+
+def stage(upload):
+    """UploadedFile ko stage karo (app/staging.py); staged key return karta hai."""
+    return staging.save_chunks(upload.chunks(staging.CHUNK_SIZE), upload.name or 'receipt')
+
+
+def original_name(staged_key):
+    return staging.original_name(staged_key)
+
+
+def discard(staged_key):
+    staging.delete(staged_key)
+
+
+def pending_fields(staged_key):
+    """Payment create/update ke kwargs jab naya receipt stage hua ho."""
+    return {
+        'receipt_staged': staged_key,
+        'receipt_status': 'pending',
+        'receipt_attempts': 0,
+        'receipt_error': '',
+    }
+
+
+# ==========================================
+#       THUMBNAILS (payment list ke liye chhoti WebP)
+# ==========================================
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_QUALITY = 70
+
+
+def thumbnail_for(receipt_name, staged_path):
+    """Receipt ka thumbnail name. Same receipt ka thumbnail pehle bana ho to wahi reuse."""
+    existing = (
+        Payment.objects.filter(receipt=receipt_name)
+        .exclude(receipt_thumbnail='').exclude(receipt_thumbnail__isnull=True)
+        .values_list('receipt_thumbnail', flat=True)
+        .first()
+    )
+    if existing:
+        return existing
+    try:
+        return make_thumbnail(staged_path)
+    except Exception as e:
+        # PDF / corrupt image: thumbnail nahi, receipt phir bhi valid hai
+        logger.info("No thumbnail for %s: %s", receipt_name, e)
+        return ''
+
+
+def make_thumbnail(staged_path):
+    with Image.open(staged_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        buffer = BytesIO()
+        image.save(buffer, 'WEBP', quality=THUMBNAIL_QUALITY, method=4)
+    field = Payment._meta.get_field('receipt_thumbnail')
+    return field.storage.save(field.generate_filename(None, 'thumb.webp'), ContentFile(buffer.getvalue()))
+
+
+# ==========================================
+#       WORKER
+# ==========================================
+def _max_attempts():
+    return getattr(settings, 'CRM_RECEIPT_MAX_ATTEMPTS', 5)
+
+
+def _backoff(attempt):
+    return getattr(settings, 'CRM_RECEIPT_RETRY_BACKOFF', 2) * (2 ** (attempt - 1))
+
+
+def _finish(payment_id, staged_path, **fields):
+    # Beech me naya receipt stage ho gaya ho to uski state mat chhedo
+    updated = Payment.objects.filter(pk=payment_id, receipt_staged=staged_path).update(**fields)
+    if updated:
+        records_changed.send(sender=Payment, pks=[payment_id], deleted=False, using='default')
+    return updated
+
+
+def upload(payment_id, sleep=time.sleep):
+    """
+    Ek payment ka staged receipt storage pe daalo. Claim atomic UPDATE se hota hai,
+    isliye do workers ek hi receipt upload nahi karte. Har fail pe exponential backoff.
+    """
+    claimed = Payment.objects.filter(
+        pk=payment_id, receipt_status__in=('pending', 'failed'),
+    ).exclude(receipt_staged='').update(receipt_status='uploading')
+    if not claimed:
+        return False
+
+    payment = Payment.objects.get(pk=payment_id)
+    staged_key = payment.receipt_staged
+    try:
+        # Staged receipt DB me hai; worker ke disk pe temp copy
+        with staging.local_copy(staged_key) as path:
+            return _upload(payment, staged_key, path, sleep)
+    except FileNotFoundError:
+        _finish(payment_id, staged_key, receipt_status='failed', receipt_attempts=payment.receipt_attempts + 1,
+                receipt_error='Staged file missing')
+        return False
+
+
+def _upload(payment, staged_key, path, sleep):
+    payment_id = payment.pk
+    max_attempts = _max_attempts()
+    attempt = payment.receipt_attempts
+    while True:
+        attempt += 1
+        try:
+            with open(path, 'rb') as f:
+                payment.receipt.save(original_name(staged_key), File(f), save=False)
+        except Exception as e:
+            logger.warning("Receipt upload for payment %s failed (attempt %s): %s", payment_id, attempt, e)
+            if attempt >= max_attempts:
+                _finish(payment_id, staged_key, receipt_status='failed', receipt_attempts=attempt,
+                        receipt_error=str(e)[:1000])
+                return False
+            Payment.objects.filter(pk=payment_id).update(
+                receipt_attempts=F('receipt_attempts') + 1, receipt_error=str(e)[:1000],
+            )
+            sleep(_backoff(attempt))
+            continue
+
+        thumbnail = thumbnail_for(payment.receipt.name, path)
+        # Upload ke dauran naya receipt aa gaya ho to _finish kuch nahi karega. Blob delete
+        # nahi karte — content-addressed hai, kisi aur payment ka bhi ho sakta hai.
+        if _finish(payment_id, staged_key, receipt=payment.receipt.name, receipt_thumbnail=thumbnail,
+                   receipt_status='done', receipt_staged='', receipt_attempts=attempt, receipt_error=''):
+            discard(staged_key)
+        return True
+
+
+@jobs.task('receipts.upload')
+def upload_receipt_job(job, payment_id):
+    return {'uploaded': upload(payment_id)}
+
+
+def schedule(payment):
+    # upload() khud retries + backoff karta hai, isliye job ek hi attempt. Default deploy
+    # (LocMem, koi worker nahi) pe ye commit ke baad isi process me chalta hai.
+    return jobs.enqueue('receipts.upload', {'payment_id': payment.pk}, owner=payment.owner_id, max_attempts=1)
@@ -0,0 +1,53 @@
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # orjson nahi hai to DRF ka stdlib json hi chalega
+    orjson = None
+
+# ==========================================
+#       FAST JSON RENDERER (orjson ⚡)
+# ==========================================
+# DRF ka JSONRenderer stdlib json.dumps + Python encoder class chalata hai — 500 rows
+# ki list pe render hi serializer jitna time le leta hai. orjson (Rust) wahi bytes
+# kai guna tez banata hai.
+#
+# Output DRF jaisa hi rehna chahiye (frontend + ETags ko farq na pade):
+#   - datetime / date / time orjson khud format nahi karta (OPT_PASSTHROUGH_DATETIME):
+#     DRF encoder ka format — milliseconds tak, UTC = 'Z'
+#   - Decimal (Payment.amount jab serializer se na guzre, e.g. analytics rows) DRF jaisa
+#     float; serializer fields pehle hi string de dete hain ("1500.00")
+#   - U+2028 / U+2029 escape (JS me line terminators)
+# Indent maanga (browsable API, `; indent=4`) ya orjson kisi type pe ruka to DRF fallback.
+
+FAST_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    # Jo orjson nahi jaanta (Decimal, datetime, lazy strings, querysets...) DRF encoder se
+    return _encoder.default(obj)
+
+
+def enabled():
+    return orjson is not None and getattr(settings, 'CRM_FAST_JSON', True)
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not enabled() or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=FAST_OPTIONS)
+        except (TypeError, orjson.JSONEncodeError):
+            # e.g. 64-bit se bada int, ajeeb keys — DRF ka raasta hi sahi
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
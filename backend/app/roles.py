@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from . import caching
+
+# ==========================================
+#       ROLE RESOLUTION (Groups ek hi baar load karo)
+# ==========================================
+# Permissions, views, serializers sab yahin se role puchte hain.
+# Per-request: roles `user` object pe memoize hote hain (request.user har
+# request ke liye naya object hota hai).
+# Cross-request (optional): settings.CRM_ROLE_CACHE_TIMEOUT seconds ke liye
+# Django cache me, user id se keyed. 0 = disabled; unset = sirf shared cache pe
+# (LocMem me invalidate sirf usi worker ka cache saaf karta).
+
+SALES = 'Sales'
+TECH = 'Tech'
+
+_USER_ATTR = '_crm_roles'
+_CACHE_PREFIX = 'crm:roles'
+_GENERATION_KEY = 'crm:roles:generation'
+SHARED_CACHE_TIMEOUT = 300
+
+
+def _cache_timeout():
+    timeout = getattr(settings, 'CRM_ROLE_CACHE_TIMEOUT', None)
+    if timeout is None:
+        return SHARED_CACHE_TIMEOUT if caching.is_shared() else None
+    return timeout or None
+
+
+def _generation():
+    # Group rename/delete pe sab users ke cached roles ek saath invalid ho jate hain
+    return cache.get_or_set(_GENERATION_KEY, 1, None)
+
+
+def _cache_key(user_id):
+    return f'{_CACHE_PREFIX}:{_generation()}:{user_id}'
+
+
+def get_roles(user):
+    """Return the user's group names as a frozenset, loading them at most once."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, _USER_ATTR, None)
+    if roles is not None:
+        return roles
+
+    timeout = _cache_timeout()
+    if timeout:
+        key = _cache_key(user.pk)
+        roles = cache.get(key)
+        if roles is None:
+            roles = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, roles, timeout)
+    else:
+        roles = frozenset(user.groups.values_list('name', flat=True))
+
+    setattr(user, _USER_ATTR, roles)
+    return roles
+
+
+def has_role(user, *names):
+    return not get_roles(user).isdisjoint(names)
+
+
+def is_sales(user):
+    return has_role(user, SALES)
+
+
+def is_tech(user):
+    return has_role(user, TECH)
+
+
+def is_team_member(user, *names):
+    """Shared-access check used by list views: any of `names` (default Sales/Tech) or superuser."""
+    return user.is_superuser or has_role(user, *(names or (SALES, TECH)))
+
+
+def invalidate_user(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def invalidate_all():
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 2, None)
@@ -0,0 +1,150 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from . import conditional, fingerprints
+from .models import Payment, RevenueDaily
+
+# ==========================================
+#       REVENUE ROLLUPS (analytics charts 📈)
+# ==========================================
+# RevenueDaily me har din ka revenue / advance / received — teen grain me: total,
+# per owner, per company. Payment create / edit / delete aur ledger receipts
+# (app/ledger.py -> summaries_changed) usi transaction me F() increments karte hain.
+# Chart = rollup rows ka GROUP BY (day/week/month), Payment table kabhi nahi padhi
+# jaati: 3 saal ka monthly chart = zyada se zyada ~1100 din-rows, 36 buckets.
+# Drift lage to `manage.py rebuild_revenue_rollups`.
+
+ZERO = Decimal('0')
+INTERVALS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+GRAINS = ('total', 'owner', 'company')
+
+
+def default_start(interval, end):
+    # Default range: 30 din / 12 hafte / 12 mahine, bucket ki shuruaat se
+    if interval == 'day':
+        return end - timedelta(days=29)
+    if interval == 'week':
+        return end - timedelta(days=end.weekday() + 7 * 11)
+    month = end.month - 11
+    year = end.year + (month - 1) // 12
+    return end.replace(year=year, month=(month - 1) % 12 + 1, day=1)
+
+
+def rows_for(parts):
+    """
+    parts = [(contribution, sign), ...] (ledger.contribution() shape, optional `payments`
+    count) -> {(grain, day, owner_id, company_key): [company, revenue, advance, received, payments]}.
+    """
+    rows = {}
+    for part, sign in parts:
+        key = fingerprints.company_key(part['company'])
+        scopes = (
+            ('total', part['date'], None, ''),
+            ('owner', part['date'], part['owner_id'], ''),
+            ('company', part['date'], None, key),
+        )
+        for scope in scopes:
+            row = rows.setdefault(scope, ['', ZERO, ZERO, ZERO, 0])
+            if scope[0] == 'company':
+                row[0] = part['company']
+            row[1] += sign * part['amount']
+            row[2] += sign * part['advance']
+            row[3] += sign * part['received']
+            row[4] += sign * part.get('payments', 1)
+    return rows
+
+
+def _increment(scope, company, revenue, advance, received, payments, using):
+    grain, day, owner_id, key = scope
+    rows = RevenueDaily.objects.using(using).filter(grain=grain, day=day, owner_id=owner_id, company_key=key)
+    changes = {
+        'revenue': F('revenue') + revenue,
+        'advance': F('advance') + advance,
+        'received': F('received') + received,
+        'payments': F('payments') + payments,
+    }
+    if company:
+        changes['company'] = company
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic(using=using):
+            RevenueDaily.objects.using(using).create(
+                grain=grain, day=day, owner_id=owner_id, company_key=key, company=company,
+                revenue=revenue, advance=advance, received=received, payments=payments,
+            )
+    except IntegrityError:
+        rows.update(**changes)  # Dusri request ne row abhi banayi
+
+
+def apply(parts, using='default'):
+    """Caller ke transaction ke andar: har part ke teeno grain rows update."""
+    changed = False
+    # Fixed order me lock (deadlock se bachne ke liye)
+    for scope, (company, revenue, advance, received, payments) in sorted(
+        rows_for(parts).items(), key=lambda item: (item[0][0], item[0][1], item[0][2] or 0, item[0][3])
+    ):
+        if revenue or advance or received or payments:
+            _increment(scope, company, revenue, advance, received, payments, using)
+            changed = True
+    if changed:
+        conditional.bump(RevenueDaily, using)
+
+
+def series(grain, interval, start, end, owner_id=None, using='default'):
+    """Rollup rows ko interval buckets me: [{'period', owner / company, revenue, advance, received, remaining, payments}]."""
+    group = {
+        'total': (),
+        'owner': ('owner_id', 'owner__username'),
+        'company': ('company_key',),
+    }[grain]
+    queryset = RevenueDaily.objects.using(using).filter(grain=grain, day__gte=start, day__lte=end).exclude(payments=0)
+    if owner_id is not None:
+        queryset = queryset.filter(owner_id=owner_id)
+    rows = (
+        queryset.annotate(period=INTERVALS[interval]('day'))
+        .values('period', *group)
+        .annotate(
+            revenue=Sum('revenue'), advance=Sum('advance'), received=Sum('received'),
+            payments=Sum('payments'), company_name=Max('company'),
+        )
+        .order_by('period', *group)
+    )
+
+    results = []
+    for row in rows:
+        item = {'period': row['period']}
+        if grain == 'owner':
+            item.update(owner=row['owner_id'], owner_name=row['owner__username'])
+        elif grain == 'company':
+            item.update(company=row['company_name'], company_key=row['company_key'])
+        item.update(
+            revenue=row['revenue'], advance=row['advance'], received=row['received'],
+            remaining=row['revenue'] - row['received'], payments=row['payments'],
+        )
+        results.append(item)
+    return results
+
+
+def rebuild(using='default'):
+    """RevenueDaily scratch se (Payment table ek GROUP BY me). Returns rollup row count."""
+    payments = (
+        Payment.objects.using(using).order_by().values('date', 'company', 'owner_id')
+        .annotate(amount=Sum('amount'), advance=Sum('advance'), received=Sum('received'), payments=Count('id'))
+    )
+    rows = rows_for((row, 1) for row in payments)
+    with transaction.atomic(using=using):
+        RevenueDaily.objects.using(using).all().delete()
+        RevenueDaily.objects.using(using).bulk_create([
+            RevenueDaily(
+                grain=grain, day=day, owner_id=owner_id, company_key=key, company=company,
+                revenue=revenue, advance=advance, received=received, payments=count,
+            )
+            for (grain, day, owner_id, key), (company, revenue, advance, received, count) in rows.items()
+        ], batch_size=500)
+        conditional.bump(RevenueDaily, using)
+    return len(rows)
@@ -0,0 +1,159 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework import filters
+
+from .models import Customer, Lead, Payment, SalesTask, Task, TechData, Tender
+
+# ==========================================
+#       INDEXED SEARCH (SearchFilter ka drop-in replacement 🔍)
+# ==========================================
+# Model -> indexed columns. Migration 0008 ke SEARCH_COLUMNS se match hona chahiye.
+SEARCH_INDEXES = {
+    Lead: ('name', 'company', 'status', 'contact'),
+    Customer: ('name', 'company', 'email'),
+    Payment: ('company', 'invoice', 'so_no'),
+    SalesTask: ('lead_name', 'company', 'status'),
+    Task: ('task_name', 'company_name', 'status', 'priority'),
+    Tender: ('company', 'bid_no', 'status'),
+    TechData: ('company', 'machine', 'serial'),
+}
+
+
+class SqliteFTSBackend:
+    """FTS5 virtual table per model (trigram tokenizer), synced from save/delete signals."""
+    needs_sync = True
+    # Trigram tokenizer 3 chars se chhote term index se match nahi kar sakta
+    min_term_length = 3
+
+    def fts_table(self, model):
+        return f'{model._meta.db_table}_fts'
+
+    def search(self, queryset, terms, fields):
+        if any(len(term) < self.min_term_length for term in terms):
+            return None
+
+        model = queryset.model
+        table = self.fts_table(model)
+        pk_column = f'"{model._meta.db_table}"."{model._meta.pk.column}"'
+        # Har term kisi bhi column me (AND across terms) — SearchFilter jaisa hi
+        match = ' AND '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+        # FTS table seedha join: MATCH ek hi baar chalta hai aur usi scan ka bm25 `rank`
+        # (jitna chhota utna behtar) har row ke saath aata hai — per-row subquery nahi
+        ordering = queryset.query.order_by
+        queryset = queryset.extra(
+            tables=[table],
+            where=[f'"{table}".rowid = {pk_column}', f'"{table}" MATCH %s'],
+            params=[match],
+            select={'search_rank': f'"{table}".rank'},
+        )
+        return queryset.order_by('search_rank', *ordering)
+
+    def index(self, model, instances, using):
+        table = self.fts_table(model)
+        columns = SEARCH_INDEXES[model]
+        rows = [[obj.pk] + [getattr(obj, column) for column in columns] for obj in instances]
+        if not rows:
+            return
+        placeholders = ', '.join(['%s'] * (len(columns) + 1))
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [[row[0]] for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {table} (rowid, {", ".join(columns)}) VALUES ({placeholders})', rows
+            )
+
+    def unindex(self, model, pks, using):
+        table = self.fts_table(model)
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [[pk] for pk in pks])
+
+    def rebuild(self, model, using):
+        table = self.fts_table(model)
+        columns = ', '.join(SEARCH_INDEXES[model])
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, {columns}) '
+                f'SELECT {model._meta.pk.column}, {columns} FROM {model._meta.db_table}'
+            )
+
+
+class PostgresTrigramBackend:
+    """
+    Filter wahi icontains hai, par migration 0008 ne UPPER(col::text) pe GIN trigram
+    indexes banaye hain, isliye LIKE '%term%' bhi index scan hota hai. Postgres
+    indexes khud update karta hai, sync ki zaroorat nahi.
+    """
+    needs_sync = False
+
+    def search(self, queryset, terms, fields):
+        from django.contrib.postgres.search import TrigramSimilarity
+        from django.db.models.functions import Greatest
+
+        condition = Q()
+        rank = None
+        for term in terms:
+            condition &= reduce(or_, [Q(**{f'{field}__icontains': term}) for field in fields])
+            similarity = [TrigramSimilarity(field, term) for field in fields]
+            best = Greatest(*similarity) if len(similarity) > 1 else similarity[0]
+            rank = best if rank is None else rank + best
+
+        ordering = queryset.query.order_by
+        queryset = queryset.filter(condition).annotate(search_rank=rank)
+        return queryset.order_by('-search_rank', *ordering)
+
+    def index(self, model, instances, using):
+        pass
+
+    def unindex(self, model, pks, using):
+        pass
+
+    def rebuild(self, model, using):
+        pass
+
+
+BACKENDS = {
+    'sqlite': SqliteFTSBackend(),
+    'postgresql': PostgresTrigramBackend(),
+}
+
+
+def get_backend(using):
+    return BACKENDS.get(connections[using].vendor)
+
+
+def index_instances(model, instances, using='default'):
+    backend = get_backend(using)
+    if backend is not None and model in SEARCH_INDEXES:
+        backend.index(model, instances, using)
+
+
+def unindex_pks(model, pks, using='default'):
+    backend = get_backend(using)
+    if backend is not None and model in SEARCH_INDEXES:
+        backend.unindex(model, pks, using)
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    filters.SearchFilter ka drop-in replacement. Indexed backend tab use hota hai jab
+    view ke search_fields model ke indexed columns hi hon; warna (ya short terms pe)
+    normal icontains search. Results rank ke hisaab se sorted aate hain.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        backend = get_backend(queryset.db)
+        indexed = SEARCH_INDEXES.get(queryset.model)
+        if backend is not None and indexed is not None and set(search_fields) == set(indexed):
+            result = backend.search(queryset, search_terms, list(search_fields))
+            if result is not None:
+                return result
+        return super().filter_queryset(request, queryset, view)
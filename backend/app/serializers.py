@@ -2,13 +2,21 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Lead, Customer, Payment, Task, Tender, TechData
 from .models import SalesTask 
+from .models import ImportJob, Job
+from .models import LedgerEntry, LeadStatusChange, Receivable
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from . import auth, receipts, roles
 
 # --- LOGIN SERIALIZER (Role Return karne ke liye) ---
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Groups + superuser flag token claims me, taaki GET requests DB hit na karein
+        return auth.add_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
-        user_groups = self.user.groups.values_list('name', flat=True)
+        user_groups = roles.get_roles(self.user)
         if 'Sales' in user_groups:
             data['role'] = 'Sales'
         elif 'Tech' in user_groups:
@@ -32,50 +40,162 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
         return user
 
+# ==========================================
+#       MASKING (Tech walo ke liye number hide 🔒)
+# ==========================================
+def mask_phone(value):
+    if value and len(str(value)) > 5:
+        return str(value)[:-5] + '*****'
+    return value
+
+
+class MaskedListSerializer(serializers.ListSerializer):
+    # Poore page ke liye policy ek hi baar decide hoti hai, phir har row pe lagti hai
+    def to_representation(self, data):
+        maskers = self.child.get_maskers()
+        rows = super().to_representation(data)
+        if maskers:
+            for row in rows:
+                self.child.apply_masks(row, maskers)
+        return rows
+
+
+class MaskedFieldsMixin:
+    """
+    Opt-in declarative masking. Serializer ke Meta me likho:
+
+        masked_fields = {'contact': mask_phone}
+        masked_for = ('Tech',)   # default
+
+    Jis user ke paas `masked_for` ka koi role hai (superuser chhod ke) usko
+    masked value milti hai. many=True pe MaskedListSerializer use hota hai.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = cls.__dict__.get('Meta')
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = MaskedListSerializer
+
+    def get_maskers(self):
+        # Child serializer poore list ke liye shared hai, isliye yahan memo kar sakte hain
+        if not hasattr(self, '_maskers'):
+            self._maskers = self._resolve_maskers()
+        return self._maskers
+
+    def _resolve_maskers(self):
+        masked_fields = getattr(self.Meta, 'masked_fields', None)
+        request = self.context.get('request')
+        if not masked_fields or request is None:
+            return {}
+        user = getattr(request, 'user', None)
+        if user is None or user.is_superuser:
+            return {}
+        if not roles.has_role(user, *getattr(self.Meta, 'masked_for', (roles.TECH,))):
+            return {}
+        return masked_fields
+
+    @staticmethod
+    def apply_masks(row, maskers):
+        for field, masker in maskers.items():
+            if field in row:
+                row[field] = masker(row[field])
+        return row
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # List ke andar ho to MaskedListSerializer khud mask karega
+        if not isinstance(self.parent, MaskedListSerializer):
+            self.apply_masks(data, self.get_maskers())
+        return data
+
+
 # 2. Lead Serializer (With Masking 🔒)
-class LeadSerializer(serializers.ModelSerializer):
+class LeadSerializer(MaskedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Lead
-        fields = '__all__'
+        # fingerprint internal hai (duplicate detection), client ko nahi
+        exclude = ('fingerprint',)
         read_only_fields = ('owner',)
+        masked_fields = {'contact': mask_phone}
+
+
+# Lead status history (app/funnel.py) — read only
+class LeadStatusChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LeadStatusChange
+        fields = ('id', 'lead_id', 'owner', 'from_status', 'to_status', 'changed_at', 'seconds_in_previous')
+        read_only_fields = fields
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            user = request.user
-            # Tech walo ke liye number hide karo
-            if user.groups.filter(name='Tech').exists() and not user.is_superuser:
-                phone = data.get('contact', '')
-                if phone and len(str(phone)) > 5:
-                    data['contact'] = str(phone)[:-5] + '*****'
-        return data
 
 # 3. Customer Serializer (UPDATED WITH MASKING 🔒)
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(MaskedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Customer
-        fields = '__all__'
+        # fingerprint internal hai (duplicate detection), client ko nahi
+        exclude = ('fingerprint',)
         read_only_fields = ('owner',)
+        masked_fields = {'contact': mask_phone}
 
-    # 👇👇👇 Same Logic Yahan Bhi Lagaya 👇👇👇
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            user = request.user
-            if user.groups.filter(name='Tech').exists() and not user.is_superuser:
-                phone = data.get('contact', '')
-                if phone and len(str(phone)) > 5:
-                    data['contact'] = str(phone)[:-5] + '*****'
-        return data
 
 # 4. Payment Serializer
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
-        fields = '__all__'
-        read_only_fields = ('owner',)
+        exclude = ('receipt_staged',)
+        # remaining = amount - received (ledger), client nahi bhejta
+        read_only_fields = ('owner', 'receipt_status', 'remaining')
+
+    # Receipt file request me upload nahi hoti: staging me jaati hai, worker upload karta hai
+    def _stage_receipt(self, validated_data):
+        upload = validated_data.pop('receipt', None)
+        if upload:
+            validated_data.update(receipts.pending_fields(receipts.stage(upload)))
+        return bool(upload)
+
+    def create(self, validated_data):
+        staged = self._stage_receipt(validated_data)
+        payment = super().create(validated_data)
+        if staged:
+            receipts.schedule(payment)
+        return payment
+
+    def update(self, instance, validated_data):
+        previous = instance.receipt_staged
+        staged = self._stage_receipt(validated_data)
+        payment = super().update(instance, validated_data)
+        if staged:
+            receipts.discard(previous)
+            receipts.schedule(payment)
+        return payment
+
+
+# Payment ledger entry (app/ledger.py). Advance Payment.advance se hi aata hai
+class LedgerEntrySerializer(serializers.ModelSerializer):
+    kind = serializers.ChoiceField(choices=[('receipt', 'Receipt'), ('adjustment', 'Adjustment')])
+
+    class Meta:
+        model = LedgerEntry
+        fields = ('id', 'payment', 'kind', 'amount', 'date', 'reference', 'note', 'created_by', 'created_at')
+        read_only_fields = ('payment', 'created_by')
+
+    def validate(self, attrs):
+        amount = attrs['amount']
+        if attrs['kind'] == 'receipt' and amount <= 0:
+            raise serializers.ValidationError({'amount': "Receipt amount must be positive."})
+        if not amount:
+            raise serializers.ValidationError({'amount': "Amount can't be zero."})
+        return attrs
+
+
+class ReceivableSerializer(serializers.ModelSerializer):
+    owner_name = serializers.CharField(source='owner.username', default=None, read_only=True)
+
+    class Meta:
+        model = Receivable
+        fields = ('company', 'company_key', 'owner', 'owner_name', 'billed', 'received', 'balance',
+                  'payments', 'updated_at')
+
 
 # 5. Task Serializer
 class TaskSerializer(serializers.ModelSerializer):
@@ -99,20 +219,58 @@ class TechDataSerializer(serializers.ModelSerializer):
         read_only_fields = ('owner',)
 
 # 8. Sales Task Serializer (UPDATED WITH MASKING 🔒)
-class SalesTaskSerializer(serializers.ModelSerializer):
+class SalesTaskSerializer(MaskedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = SalesTask
         fields = '__all__'
         read_only_fields = ('owner',)
+        masked_fields = {'contact': mask_phone}
 
-    # 👇👇👇 Same Logic Yahan Bhi Lagaya 👇👇👇
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            user = request.user
-            if user.groups.filter(name='Tech').exists() and not user.is_superuser:
-                phone = data.get('contact', '')
-                if phone and len(str(phone)) > 5:
-                    data['contact'] = str(phone)[:-5] + '*****'
-        return data
\ No newline at end of file
+
+# "Log follow-up" action ka input (count server pe F() se badhta hai)
+class FollowUpSerializer(serializers.Serializer):
+    next_follow_up = serializers.DateField(required=False, allow_null=True)
+    remarks = serializers.CharField(required=False, allow_blank=True)
+    status = serializers.CharField(required=False, max_length=50)
+    priority = serializers.ChoiceField(choices=SalesTask.PRIORITY_CHOICES, required=False)
+
+
+# Batch conversion (app/conversions.py): har lead ka apna payload
+class LeadConversionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    so_no = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+    advance = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+    invoice = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    remark = serializers.CharField(required=False, allow_blank=True)
+
+
+class LeadFollowUpMoveSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    next_follow_up = serializers.DateField(required=False, allow_null=True)
+    priority = serializers.ChoiceField(choices=SalesTask.PRIORITY_CHOICES, required=False)
+    remarks = serializers.CharField(required=False, allow_blank=True)
+
+
+
+# 9. Import Job Serializer (Progress dekhne ke liye)
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        exclude = ('staged_file',)
+        read_only_fields = [f.name for f in ImportJob._meta.fields]
+
+
+# 10. Background Job Status
+class JobSerializer(serializers.ModelSerializer):
+    percent = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        exclude = ('payload', 'locked_by', 'locked_at')
+        read_only_fields = [f.name for f in Job._meta.fields]
+
+    def get_percent(self, obj):
+        if not obj.progress_total:
+            return 100 if obj.status == 'done' else None
+        return min(100, round(100 * obj.progress_done / obj.progress_total))
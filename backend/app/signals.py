@@ -0,0 +1,184 @@
+from django.contrib.auth.models import Group, User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import auth, conditional, dashboard, funnel, ledger, perf, roles, search, sync
+from .models import Lead, Payment
+
+# bulk_create() / queryset.update() model signals nahi bhejte. Aise bulk writes ke
+# baad ye signal bhejo taaki search index, dashboard cache wagairah sync rahein.
+#   records_changed.send(sender=Lead, pks=[...], deleted=False, using='default')
+records_changed = Signal()
+
+
+# ==========================================
+#       ROLE CACHE INVALIDATION
+# ==========================================
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+
+    # Roles badle to token claims bhi purane (app/auth.py) — DB fallback
+    if not reverse:
+        # user.groups.add(...) -> instance User hai
+        instance.__dict__.pop(roles._USER_ATTR, None)
+        roles.invalidate_user(instance.pk)
+        auth.revoke_user(instance.pk)
+    elif pk_set:
+        # group.user_set.add(...) -> instance Group hai, pk_set me user ids
+        for user_id in pk_set:
+            roles.invalidate_user(user_id)
+            auth.revoke_user(user_id)
+    else:
+        # group.user_set.clear() -> kaun kaun the pata nahi, sab invalid
+        roles.invalidate_all()
+        auth.revoke_all()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    roles.invalidate_all()
+    auth.revoke_all()
+
+
+# Deactivate / superuser flag / delete: purane token claims pe bharosa nahi
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return  # Login pe last_login update hota hai, woh revoke nahi
+    auth.revoke_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    auth.revoke_user(instance.pk)
+
+
+# ==========================================
+#       SEARCH INDEX SYNC
+# ==========================================
+def search_index_saved(sender, instance, using, **kwargs):
+    search.index_instances(sender, [instance], using)
+
+
+def search_index_deleted(sender, instance, using, **kwargs):
+    search.unindex_pks(sender, [instance.pk], using)
+
+
+def search_index_bulk(sender, pks, deleted=False, using='default', **kwargs):
+    if deleted:
+        search.unindex_pks(sender, pks, using)
+    else:
+        search.index_instances(sender, sender._default_manager.using(using).filter(pk__in=pks), using)
+
+
+for _model in search.SEARCH_INDEXES:
+    post_save.connect(search_index_saved, sender=_model, dispatch_uid=f'search-save-{_model.__name__}')
+    post_delete.connect(search_index_deleted, sender=_model, dispatch_uid=f'search-delete-{_model.__name__}')
+    records_changed.connect(search_index_bulk, sender=_model, dispatch_uid=f'search-bulk-{_model.__name__}')
+
+
+# ==========================================
+#       DASHBOARD CACHE INVALIDATION
+# ==========================================
+def dashboard_changed(sender, using='default', **kwargs):
+    dashboard.invalidate(using)
+
+
+for _model in dashboard.DASHBOARD_MODELS:
+    post_save.connect(dashboard_changed, sender=_model, dispatch_uid=f'dashboard-save-{_model.__name__}')
+    post_delete.connect(dashboard_changed, sender=_model, dispatch_uid=f'dashboard-delete-{_model.__name__}')
+    records_changed.connect(dashboard_changed, sender=_model, dispatch_uid=f'dashboard-bulk-{_model.__name__}')
+
+
+# ==========================================
+#       TOMBSTONES (delta sync ke deletes)
+# ==========================================
+def tombstone_deleted(sender, instance, using, **kwargs):
+    sync.record_deletes(sender, [(instance.pk, instance.owner_id)], using)
+
+
+def tombstone_bulk(sender, pks, deleted=False, using='default', **kwargs):
+    # Rows ja chuki hain, owner pata nahi: ye tombstones sirf team ko milte hain
+    if deleted:
+        sync.record_deletes(sender, [(pk, None) for pk in pks], using)
+
+
+for _model in sync.TRACKED_MODELS:
+    post_delete.connect(tombstone_deleted, sender=_model, dispatch_uid=f'tombstone-delete-{_model.__name__}')
+    records_changed.connect(tombstone_bulk, sender=_model, dispatch_uid=f'tombstone-bulk-{_model.__name__}')
+
+
+# ==========================================
+#       ETAG GENERATIONS (conditional GET)
+# ==========================================
+def generation_changed(sender, using='default', **kwargs):
+    conditional.bump(sender, using)
+
+
+for _model in sync.TRACKED_MODELS:
+    post_save.connect(generation_changed, sender=_model, dispatch_uid=f'etag-save-{_model.__name__}')
+    post_delete.connect(generation_changed, sender=_model, dispatch_uid=f'etag-delete-{_model.__name__}')
+    records_changed.connect(generation_changed, sender=_model, dispatch_uid=f'etag-bulk-{_model.__name__}')
+
+
+# ==========================================
+#       RECEIVABLES LEDGER (app/ledger.py)
+# ==========================================
+# Payment.save() khud transaction.atomic me hai, to ye balance writes usi transaction me
+@receiver(pre_save, sender=Payment)
+def payment_ledger_snapshot(sender, instance, raw=False, using='default', update_fields=None, **kwargs):
+    instance._ledger_before = None
+    if raw or instance._state.adding or not ledger.touches_ledger(update_fields):
+        return  # Receipt worker wagairah ke saves ledger nahi chhedte
+    instance._ledger_before = ledger.snapshot(instance.pk, using)
+
+
+@receiver(post_save, sender=Payment)
+def payment_ledger_saved(sender, instance, created, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    if created:
+        ledger.payments_created([instance], using)
+    elif getattr(instance, '_ledger_before', None) is not None:
+        ledger.payment_changed(instance._ledger_before, instance, using)
+
+
+@receiver(post_delete, sender=Payment)
+def payment_ledger_deleted(sender, instance, using='default', **kwargs):
+    ledger.payment_deleted(instance, using)
+
+
+# ==========================================
+#       LEAD STATUS HISTORY (app/funnel.py)
+# ==========================================
+# Lead.save() bhi transaction.atomic me hai: log + counters lead ke saath hi commit
+@receiver(pre_save, sender=Lead)
+def lead_status_transition(sender, instance, raw=False, using='default', update_fields=None, **kwargs):
+    instance._status_changes = []
+    if raw or (update_fields is not None and funnel.TRACKED_FIELD not in update_fields):
+        return
+    instance._status_changes = funnel.transitions([instance], using)
+
+
+@receiver(post_save, sender=Lead)
+def lead_status_saved(sender, instance, raw=False, using='default', **kwargs):
+    changes = getattr(instance, '_status_changes', None)
+    if changes:
+        for change in changes:
+            change.lead_id = instance.pk  # Nayi lead ka pk ab mila
+        funnel.record(changes, using)
+    instance._status_changes = []
+
+
+# ==========================================
+#       PERF SQL TIMER (har naye DB connection pe)
+# ==========================================
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    perf.install_query_timer(connection)
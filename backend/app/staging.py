@@ -0,0 +1,126 @@
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils.text import get_valid_filename
+
+from .models import StagedChunk
+
+# ==========================================
+#       STAGING (uploads web se worker tak 📦)
+# ==========================================
+# Import files / receipts request me yahin likhe jate hain, background job (app/jobs.py)
+# baad me padhta hai. Render / Heroku pe worker alag service hai, uska disk alag — isliye
+# payload DB me StagedChunk rows (1 MB ke tukde) me jata hai, local disk pe nahi.
+# Worker local_copy() se ek temp file bana leta hai (csv / openpyxl ko seekable file
+# chahiye), kaam ke baad temp file aur chunks dono delete.
+#
+# Key = <uuid>--<original name>, taaki upload pe original naam wapas mil jaye.
+# Purane (is change se pehle ke) staged values absolute local paths the — wo bhi chalte hain.
+
+CHUNK_SIZE = 1024 * 1024
+NAME_SEPARATOR = '--'
+
+
+def new_key(name):
+    name = get_valid_filename(os.path.basename(name or 'upload'))[:100] or 'upload'
+    return f'{uuid.uuid4().hex}{NAME_SEPARATOR}{name}'
+
+
+def original_name(key):
+    return os.path.basename(key).split(NAME_SEPARATOR, 1)[-1]
+
+
+def _is_local_path(key):
+    return os.path.isabs(key)
+
+
+class Writer:
+    """write(bytes) buffer karta hai aur CHUNK_SIZE ke tukde DB me daalta hai."""
+
+    def __init__(self, name, using='default'):
+        self.key = new_key(name)
+        self.using = using
+        self.seq = 0
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= CHUNK_SIZE:
+            self._flush(bytes(self.buffer[:CHUNK_SIZE]))
+            del self.buffer[:CHUNK_SIZE]
+
+    def close(self):
+        # Khali payload ka bhi ek chunk, taaki local_copy() "missing" na samjhe
+        if self.buffer or not self.seq:
+            self._flush(bytes(self.buffer))
+            self.buffer = bytearray()
+        return self.key
+
+    def _flush(self, data):
+        StagedChunk.objects.using(self.using).create(key=self.key, seq=self.seq, data=data)
+        self.seq += 1
+
+
+def save_chunks(chunks, name, using='default'):
+    """bytes chunks ka iterable stage karo; key return karta hai."""
+    writer = Writer(name, using)
+    for chunk in chunks:
+        writer.write(chunk)
+    return writer.close()
+
+
+def save_stream(stream, name, using='default'):
+    return save_chunks(iter(lambda: stream.read(CHUNK_SIZE), b''), name, using)
+
+
+def exists(key, using='default'):
+    if _is_local_path(key):
+        return os.path.exists(key)
+    return StagedChunk.objects.using(using).filter(key=key).exists()
+
+
+@contextmanager
+def local_copy(key, using='default'):
+    """Staged payload ki local temp file ka path. Payload nahi mila to FileNotFoundError."""
+    if _is_local_path(key):
+        if not os.path.exists(key):
+            raise FileNotFoundError(key)
+        yield key
+        return
+
+    chunks = (
+        StagedChunk.objects.using(using).filter(key=key).order_by('seq')
+        .values_list('data', flat=True).iterator(chunk_size=1)
+    )
+    os.makedirs(settings.CRM_STAGING_ROOT, exist_ok=True)
+    suffix = os.path.splitext(key)[1]
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=settings.CRM_STAGING_ROOT)
+    try:
+        found = False
+        with os.fdopen(fd, 'wb') as out:
+            for data in chunks:
+                found = True
+                out.write(data)
+        if not found:
+            raise FileNotFoundError(key)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def delete(key, using='default'):
+    if not key:
+        return
+    if _is_local_path(key):
+        try:
+            os.remove(key)
+        except OSError:
+            pass
+        return
+    StagedChunk.objects.using(using).filter(key=key).delete()
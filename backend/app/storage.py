@@ -0,0 +1,108 @@
+import hashlib
+import os
+import posixpath
+
+from django.apps import apps
+from django.core.files.storage import Storage, default_storage
+from django.db.models import Q
+from django.utils.deconstruct import deconstructible
+
+# ==========================================
+#       CONTENT-ADDRESSED STORAGE (dedup 📦)
+# ==========================================
+# File ka naam uske content ka sha256 hai: `<upload_to>/ab/abcdef...<ext>`. Same
+# receipt do payments pe lage to storage me ek hi copy rehti hai, aur naam kabhi
+# badalta nahi — isliye URLs hamesha ke liye cache ho sakte hain (immutable).
+# Asli bytes configured default storage (Cloudinary / FileSystemStorage) me jaate hain.
+
+HASH_CHUNK = 64 * 1024
+
+
+def content_digest(content):
+    sha = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK):  # chunks() khud seek(0) karta hai
+        sha.update(chunk)
+    content.seek(0)
+    return sha.hexdigest()
+
+
+def is_content_addressed(name):
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return len(stem) == 64 and all(c in '0123456789abcdef' for c in stem)
+
+
+def is_referenced(name):
+    # models.py storage import karta hai, isliye model yahan lazy
+    payment = apps.get_model('app', 'Payment')
+    return payment.objects.filter(Q(receipt=name) | Q(receipt_thumbnail=name)).exists()
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """Default storage ka wrapper jo naam content hash se banata hai aur duplicates skip karta hai."""
+
+    def __init__(self, base=None):
+        self._base = base
+
+    @property
+    def base(self):
+        # default_storage lazy hai, isliye override_settings(STORAGES=...) bhi kaam karta hai
+        return self._base or default_storage
+
+    def content_name(self, name, content):
+        directory = posixpath.dirname(name)
+        digest = content_digest(content)
+        ext = os.path.splitext(name)[1].lower()
+        return posixpath.join(directory, digest[:2], f'{digest}{ext}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        target = self.content_name(name, content)
+        if self.base.exists(target):
+            return target  # Same bytes pehle se hain — upload hi nahi
+        return self.base.save(target, content, max_length=max_length)
+
+    # Blobs kai payments me shared hain: delete tabhi karo jab koi reference na ho.
+    # FieldFile.delete() storage pe pehle aata hai (row tab bhi naam rakhti hai), to wo
+    # blob yahan bach jaata hai — aise orphans `manage.py prune_receipts` saaf karta hai
+    def delete(self, name):
+        if is_referenced(name):
+            return
+        return self.base.delete(name)
+
+    def walk(self, directory):
+        """`directory` ke neeche saari files (nested dirs bhi)."""
+        dirs, files = self.base.listdir(directory)
+        for name in files:
+            yield posixpath.join(directory, name)
+        for sub in dirs:
+            yield from self.walk(posixpath.join(directory, sub))
+
+    def _open(self, name, mode='rb'):
+        return self.base.open(name, mode)
+
+    def exists(self, name):
+        return self.base.exists(name)
+
+    def url(self, name):
+        return self.base.url(name)
+
+    def size(self, name):
+        return self.base.size(name)
+
+    def path(self, name):
+        return self.base.path(name)
+
+    def listdir(self, path):
+        return self.base.listdir(path)
+
+    def get_modified_time(self, name):
+        return self.base.get_modified_time(name)
+
+
+receipt_storage = ContentAddressedStorage()
+
+
+def get_receipt_storage():
+    return receipt_storage
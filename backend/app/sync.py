@@ -0,0 +1,131 @@
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Customer, Lead, Payment, SalesTask, Task, TechData, Tender, Tombstone
+
+# ==========================================
+#       DELTA SYNC (?since= 🔄)
+# ==========================================
+# Har tracked row ka updated_at (indexed) + version hai, delete pe Tombstone banta hai.
+# Client pichla `next` cursor `?since=` me bhejta hai aur sirf badle / delete hue rows
+# paata hai. Khali `?since=` = shuru se (poora snapshot, pages me).
+TRACKED_MODELS = (Lead, Customer, Payment, Task, Tender, TechData, SalesTask)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorExpired(Exception):
+    """Cursor tombstone retention se purana hai — deletes miss ho sakte hain, full resync karo."""
+
+
+def _page_size():
+    return getattr(settings, 'CRM_SYNC_PAGE_SIZE', 500)
+
+
+def _overlap():
+    return timedelta(seconds=getattr(settings, 'CRM_SYNC_OVERLAP_SECONDS', 5))
+
+
+def _retention():
+    return timedelta(days=getattr(settings, 'CRM_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def encode_cursor(updated_at, pk):
+    raw = json.dumps([updated_at.isoformat(), pk]).encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(value):
+    """`since` value -> (updated_at, pk) ya None (shuru se). Plain ISO datetime bhi chalega."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is not None:
+        pk = 0
+    else:
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+            moment, pk = parse_datetime(raw[0]), int(raw[1])
+        except (TypeError, ValueError, IndexError, KeyError, binascii.Error):
+            raise InvalidCursor(value)
+        if moment is None:
+            raise InvalidCursor(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, pk
+
+
+def changes(queryset, since, owner_id=None):
+    """
+    Scoped queryset (view ke filters laga hua) me `since` ke baad kya badla.
+    Returns dict: changed (model instances), deleted (pks), next (cursor), has_more.
+    `owner_id` = non-team caller: deleted ids sirf uski apni rows ke (None = team, sab).
+
+    Keyset order (updated_at, id) me pages aate hain. Aakhri page ka cursor `now - overlap`
+    pe set hota hai, taaki jo transactions humare read ke time chal rahi thi unke rows agli
+    sync me aa jayein (kuch rows dobara aa sakte hain — client id se upsert kare).
+    """
+    now = timezone.now()
+    position = decode_cursor(since)
+    if position is not None and position[0] < now - _retention():
+        raise CursorExpired()
+
+    queryset = queryset.order_by('updated_at', 'pk')
+    if position is not None:
+        moment, pk = position
+        queryset = queryset.filter(Q(updated_at__gt=moment) | Q(updated_at=moment, pk__gt=pk))
+
+    size = _page_size()
+    rows = list(queryset[:size + 1])
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    deleted = []
+    if position is not None:
+        tombstones = Tombstone.objects.using(queryset.db).filter(
+            model=model_label(queryset.model), deleted_at__gte=position[0]
+        )
+        if owner_id is not None:
+            tombstones = tombstones.filter(owner_id=owner_id)
+        deleted = list(dict.fromkeys(tombstones.order_by('deleted_at').values_list('object_id', flat=True)))
+
+    if has_more:
+        next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].pk)
+    else:
+        settled = now - _overlap()
+        if position is not None and position[0] > settled:
+            settled = position[0]
+        next_cursor = encode_cursor(settled, 0)
+
+    return {
+        'changed': rows,
+        'deleted': deleted,
+        'next': next_cursor,
+        'has_more': has_more,
+    }
+
+
+def record_deletes(model, rows, using='default'):
+    """`rows` = [(pk, owner_id), ...]; owner_id None = sirf team ko dikhega."""
+    Tombstone.objects.using(using).bulk_create([
+        Tombstone(model=model_label(model), object_id=pk, owner_id=owner_id) for pk, owner_id in rows
+    ])
+
+
+def prune_tombstones(using='default'):
+    cutoff = timezone.now() - _retention()
+    deleted, _ = Tombstone.objects.using(using).filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -1,3 +1,1293 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import importlib
+import json
+import posixpath
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.http import HttpResponse
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import (
+    caching, dashboard, db_router, fingerprints, funnel, imports, jobs, middleware, receipts, roles, rollups, search,
+    sync,
+)
+from .auth import ClaimsJWTAuthentication, ClaimsUser
+from .management.commands.explain_hot_queries import hot_queries
+from .db_router import PrimaryReplicaRouter
+from .media import serve_media
+from .middleware import ReplicaRoutingMiddleware
+from .models import (
+    FunnelDaily, ImportJob, Job, Lead, LeadStatusChange, Payment, Receivable, RevenueDaily, SalesTask, StagedChunk,
+    Tender, Tombstone,
+)
+from .pagination import KeysetPagination
+from .serializers import CustomTokenObtainPairSerializer
+from .signals import records_changed
+from .storage import is_content_addressed, receipt_storage
+
+
+@override_settings(CRM_ROLE_CACHE_TIMEOUT=None)
+class MaskedListQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tech = User.objects.create_user('tech', 'tech@example.com', 'pass')
+        cls.tech.groups.add(Group.objects.create(name='Tech'))
+        Lead.objects.bulk_create([
+            Lead(owner=cls.tech, company=f'Company {i}', name=f'Lead {i}', contact='9876543210')
+            for i in range(60)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def _list_leads(self, page_size):
+        client = APIClient()
+        # Har request pe fresh user object, jaise JWT auth deta hai
+        client.force_authenticate(user=User.objects.get(pk=self.tech.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/leads/', {'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+        return response, len(queries)
+
+    def test_query_count_is_constant_for_any_page_size(self):
+        _, small = self._list_leads(5)
+        _, large = self._list_leads(50)
+        self.assertEqual(small, large)
+
+    def test_contact_is_masked_for_tech(self):
+        response, _ = self._list_leads(5)
+        for row in response.data['results']:
+            self.assertEqual(row['contact'], '98765*****')
+
+
+# Cloudinary ki jagah local FileSystemStorage
+RECEIPT_TEST_ROOT = tempfile.mkdtemp()
+LOCAL_STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': RECEIPT_TEST_ROOT},
+    },
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@override_settings(STORAGES=LOCAL_STORAGES, CRM_STAGING_ROOT=RECEIPT_TEST_ROOT, CRM_RECEIPT_RETRY_BACKOFF=0)
+class ReceiptUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(RECEIPT_TEST_ROOT, ignore_errors=True)
+
+    def test_receipt_is_staged_then_uploaded_by_worker(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        lead = Lead.objects.create(owner=user, company='Acme', name='Ravi')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        upload = SimpleUploadedFile('receipt.pdf', b'%PDF-1.4 receipt', content_type='application/pdf')
+
+        # Request sirf stage karta hai; worker thread yahan nahi chalate
+        response = client.post(f'/api/leads/{lead.pk}/convert/', {'receipt': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        payment = Payment.objects.get(pk=response.data['payment_id'])
+        self.assertEqual(payment.receipt_status, 'pending')
+        self.assertFalse(payment.receipt)
+
+        self.assertTrue(receipts.upload(payment.pk, sleep=lambda seconds: None))
+        payment.refresh_from_db()
+        self.assertEqual(payment.receipt_status, 'done')
+        self.assertEqual(payment.receipt_staged, '')
+        with payment.receipt.open('rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.4 receipt')
+
+    def test_worker_on_another_machine_reads_the_staged_receipt(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        buffer = BytesIO()
+        Image.new('RGB', (40, 40), 'white').save(buffer, 'PNG')
+        upload = SimpleUploadedFile('receipt.png', buffer.getvalue(), content_type='image/png')
+        response = client.post('/api/payments/', {'company': 'Acme', 'amount': '10', 'receipt': upload},
+                               format='multipart')
+
+        # Worker ka apna (khali) disk: payload DB se aata hai
+        with override_settings(CRM_STAGING_ROOT=tempfile.mkdtemp(dir=RECEIPT_TEST_ROOT)):
+            self.assertTrue(receipts.upload(response.data['id'], sleep=lambda seconds: None))
+        payment = Payment.objects.get(pk=response.data['id'])
+        with payment.receipt.open('rb') as f:
+            self.assertEqual(f.read(), buffer.getvalue())
+        self.assertTrue(payment.receipt_thumbnail)
+        self.assertFalse(StagedChunk.objects.exists())
+
+
+    def test_default_deploy_uploads_receipt_without_worker(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        buffer = BytesIO()
+        Image.new('RGB', (40, 40), 'white').save(buffer, 'PNG')
+        upload = SimpleUploadedFile('receipt.png', buffer.getvalue(), content_type='image/png')
+
+        def run_now(job_id, using):
+            # Inline thread ki jagah seedha (test transaction ke andar)
+            for job in jobs.claim_one(job_id, using):
+                jobs.run(job, using)
+
+        # Default settings: LocMem + CRM_JOBS_INLINE unset -> commit ke baad inline job
+        with mock.patch.object(jobs, '_start_inline', side_effect=run_now):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post('/api/payments/', {'company': 'Acme', 'amount': '10', 'receipt': upload},
+                                       format='multipart')
+        payment = Payment.objects.get(pk=response.data['id'])
+        self.assertEqual(payment.receipt_status, 'done')
+        self.assertEqual(Job.objects.get(task='receipts.upload').status, 'done')
+        with payment.receipt.open('rb') as f:
+            self.assertEqual(f.read(), buffer.getvalue())
+
+
+@override_settings(CRM_CONDITIONAL_GET=True)
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tech = User.objects.create_user('tech', 'tech@example.com', 'pass')
+        cls.tech.groups.add(Group.objects.create(name='Tech'))
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        Lead.objects.bulk_create([
+            Lead(owner=cls.tech, company=f'Company {i}', name=f'Lead {i}', contact='9876543210')
+            for i in range(30)
+        ])
+        Payment.objects.create(owner=cls.sales, company='Company 1', amount=Decimal('500'), advance=Decimal('100'))
+        # Tender sirf Tech team ya owner ko dikhta hai
+        cls.tender = Tender.objects.create(owner=cls.tech, company='Company 2', bid_no='GEM/1')
+
+    def setUp(self):
+        cache.clear()
+        self.headers = self.bearer(self.tech)
+        self.sales_headers = self.bearer(self.sales)
+
+    def bearer(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        return {'Authorization': f'Bearer {token}'}
+
+    async def both(self, path, headers):
+        """(sync response, async response) — same request dono endpoints pe."""
+        sync_response = await sync_to_async(APIClient().get)(f'/api{path}', headers=headers)
+        async_response = await AsyncClient().get(f'/api/async{path}', headers=headers)
+        return sync_response, async_response
+
+    async def test_async_list_matches_sync_list(self):
+        client = AsyncClient()
+        for query in ('?page=2', '?cursor=&page_size=5'):
+            sync_response = await sync_to_async(APIClient().get)(f'/api/leads/{query}', headers=self.headers)
+            async_response = await client.get(f'/api/async/leads/{query}', headers=self.headers)
+            self.assertEqual(async_response.status_code, 200)
+            self.assertEqual(async_response.json()['results'], sync_response.json()['results'])
+            self.assertEqual(async_response['ETag'], sync_response['ETag'])
+
+    async def test_async_detail_matches_sync_detail(self):
+        lead = await Lead.objects.afirst()
+        cases = [
+            (f'/leads/{lead.pk}/', self.headers, 200),
+            ('/leads/999999/', self.headers, 404),
+            (f'/tenders/{self.tender.pk}/', self.headers, 200),
+            (f'/tenders/{self.tender.pk}/', self.sales_headers, 404),  # Scope ke bahar
+            (f'/leads/{lead.pk}/', {}, 401),
+        ]
+        for path, headers, status in cases:
+            sync_response, async_response = await self.both(path, headers)
+            self.assertEqual((sync_response.status_code, async_response.status_code), (status, status), path)
+            self.assertEqual(async_response.json(), sync_response.json(), path)
+            self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'), path)
+
+    async def test_async_dashboard_matches_sync_dashboard_per_role(self):
+        for headers in (self.headers, self.sales_headers):
+            sync_response, async_response = await self.both('/dashboard/stats/', headers)
+            self.assertEqual(async_response.status_code, 200)
+            self.assertEqual(async_response.json(), sync_response.json())
+            self.assertEqual(async_response['ETag'], sync_response['ETag'])
+        sync_response, async_response = await self.both('/dashboard/stats/', {})
+        self.assertEqual((sync_response.status_code, async_response.status_code), (401, 401))
+
+    async def test_async_etag_and_claims_auth_paths(self):
+        lead = await Lead.objects.afirst()
+        for claims in (True, False):
+            with self.settings(CRM_JWT_CLAIMS_AUTH=claims):
+                for path in (f'/leads/{lead.pk}/', '/dashboard/stats/'):
+                    sync_response, async_response = await self.both(path, self.headers)
+                    self.assertEqual(async_response.json(), sync_response.json(), (claims, path))
+                    etag = {'If-None-Match': async_response['ETag'], **self.headers}
+                    not_modified = await AsyncClient().get(f'/api/async{path}', headers=etag)
+                    self.assertEqual(not_modified.status_code, 304, (claims, path))
+
+        # Write ke baad purana ETag match nahi karta
+        stale = {'If-None-Match': async_response['ETag'], **self.headers}
+        await sync_to_async(self.write_lead)()
+        self.assertEqual((await AsyncClient().get('/api/async/dashboard/stats/', headers=stale)).status_code, 200)
+
+    def write_lead(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Lead.objects.create(owner=self.tech, company='New', name='New')
+
+
+class BulkEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        cls.outsider = User.objects.create_user('outsider', 'out@example.com', 'pass')
+        cls.leads = [Lead.objects.create(owner=cls.sales, company='Acme', name=f'Lead {i}') for i in range(3)]
+
+    def _post(self, user, url, data):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client.post(url, data, format='json')
+
+    def test_bulk_update_reports_per_id_results(self):
+        ids = [lead.pk for lead in self.leads]
+        response = self._post(self.sales, '/api/leads/bulk-update/', {'ids': ids + [0], 'patch': {'status': 'Interested'}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['status'] for row in response.data['results']], ['updated'] * 3 + ['not_found'])
+        self.assertEqual(Lead.objects.filter(status='Interested').count(), 3)
+
+    def test_rows_outside_list_scope_are_not_touched(self):
+        response = self._post(self.outsider, '/api/leads/bulk-delete/', {'ids': [self.leads[0].pk]})
+        self.assertEqual(response.data['deleted'], 0)
+        self.assertTrue(Lead.objects.filter(pk=self.leads[0].pk).exists())
+
+    def test_non_object_body_is_a_400(self):
+        for url in ('/api/leads/bulk-update/', '/api/leads/bulk-delete/'):
+            response = self._post(self.sales, url, [self.leads[0].pk])
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, {'error': "Request body must be a JSON object"})
+
+    def test_bulk_delete_records_tombstones(self):
+        ids = [lead.pk for lead in self.leads[:2]]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post(self.sales, '/api/leads/bulk-delete/', {'ids': ids})
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(sorted(Tombstone.objects.filter(model='app.lead').values_list('object_id', flat=True)), ids)
+        self.assertEqual(list(Lead.objects.values_list('pk', flat=True)), [self.leads[2].pk])
+
+
+class BatchConversionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        cls.leads = [Lead.objects.create(owner=cls.sales, company='Acme', name=f'Lead {i}') for i in range(3)]
+
+    def _convert(self, items):
+        client = APIClient()
+        client.force_authenticate(user=self.sales)
+        return client.post('/api/leads/convert/', {'items': items}, format='json')
+
+    def test_invalid_item_writes_nothing(self):
+        response = self._convert([{'id': self.leads[0].pk, 'amount': '100'}, {'id': self.leads[1].pk, 'amount': 'abc'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Payment.objects.exists())
+        self.assertFalse(Lead.objects.filter(status='Converted').exists())
+
+    def test_converts_leads_and_skips_already_converted(self):
+        ids = [lead.pk for lead in self.leads]
+        self._convert([{'id': ids[0], 'amount': '100'}])
+        response = self._convert([{'id': pk} for pk in ids])
+        self.assertEqual(response.data['converted'], 2)
+        self.assertEqual(response.data['results'][0]['status'], 'skipped')
+        self.assertEqual(Payment.objects.count(), 3)
+        self.assertEqual(Lead.objects.filter(status='Converted').count(), 3)
+
+
+class ReceivablesLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.sales)
+
+    def _company_total(self, key='acme'):
+        return Receivable.objects.values_list('billed', 'received', 'balance').get(company_key=key, owner__isnull=True)
+
+    def test_receipts_and_edits_keep_balances_in_step(self):
+        payment = self.client.post('/api/payments/', {'company': 'Acme Pvt Ltd', 'amount': '1000', 'advance': '200'},
+                                   format='json').data
+        self.assertEqual(payment['remaining'], '800.00')
+
+        response = self.client.post(f"/api/payments/{payment['id']}/ledger/", {'kind': 'receipt', 'amount': '300'},
+                                    format='json')
+        self.assertEqual(response.data['payment_remaining'], '500.00')
+        self.client.patch(f"/api/payments/{payment['id']}/", {'amount': '1500'}, format='json')
+        self.assertEqual(self._company_total(), (1500, 500, 1000))
+
+        response = self.client.get('/api/receivables/')
+        self.assertEqual([row['balance'] for row in response.data['results']], ['1000.00'])
+
+        self.client.delete(f"/api/payments/{payment['id']}/")
+        self.assertEqual(self._company_total(), (0, 0, 0))
+
+
+class RevenueRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+
+    def test_hooks_match_rebuild_and_feed_the_chart(self):
+        client = APIClient()
+        client.force_authenticate(user=self.sales)
+        first = client.post('/api/payments/', {'company': 'Acme', 'amount': '1000', 'advance': '200',
+                                               'date': '2026-01-05'}, format='json').data
+        client.post('/api/payments/', {'company': 'Beta', 'amount': '500', 'date': '2026-02-10'}, format='json')
+        client.patch(f"/api/payments/{first['id']}/", {'date': '2026-01-20', 'amount': '1200'}, format='json')
+
+        response = client.get('/api/analytics/revenue/?interval=month&start=2026-01-01&end=2026-12-31')
+        self.assertEqual([(row['revenue'], row['remaining']) for row in response.data['results']],
+                         [(1200, 1000), (500, 500)])
+
+        incremental = sorted(RevenueDaily.objects.exclude(payments=0).values_list(
+            'grain', 'day', 'owner', 'company_key', 'revenue', 'advance', 'received', 'payments'))
+        rollups.rebuild()
+        self.assertEqual(incremental, sorted(RevenueDaily.objects.values_list(
+            'grain', 'day', 'owner', 'company_key', 'revenue', 'advance', 'received', 'payments')))
+
+
+class LeadFunnelTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+
+    def test_every_write_path_logs_transitions_and_counters_match_log(self):
+        client = APIClient()
+        client.force_authenticate(user=self.sales)
+        lead = Lead.objects.create(owner=self.sales, company='Acme', name='A')
+        other = Lead.objects.create(owner=self.sales, company='Beta', name='B')
+
+        client.patch(f'/api/leads/{lead.pk}/', {'status': 'Interested'}, format='json')
+        client.patch(f'/api/leads/{lead.pk}/', {'note': 'no status change'}, format='json')
+        client.post('/api/leads/bulk-update/', {'ids': [other.pk], 'patch': {'status': 'Interested'}}, format='json')
+        client.post('/api/leads/convert/', {'items': [{'id': lead.pk}, {'id': other.pk}]}, format='json')
+
+        self.assertEqual(
+            list(LeadStatusChange.objects.filter(lead_id=lead.pk).values_list('from_status', 'to_status')),
+            [('', 'New'), ('New', 'Interested'), ('Interested', 'Converted')],
+        )
+        response = client.get('/api/analytics/funnel/?interval=month')
+        self.assertEqual(response.data['results'][0]['converted'], 2)
+
+        counters = sorted(FunnelDaily.objects.values_list('day', 'status', 'entered', 'exited', 'exit_seconds'))
+        funnel.rebuild()
+        self.assertEqual(counters, sorted(FunnelDaily.objects.values_list(
+            'day', 'status', 'entered', 'exited', 'exit_seconds')))
+
+
+@override_settings(CRM_CONDITIONAL_GET=True)
+class ResponseSerializationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tech = User.objects.create_user('tech', 'tech@example.com', 'pass')
+        cls.tech.groups.add(Group.objects.create(name='Tech'))
+        Lead.objects.bulk_create([
+            Lead(owner=cls.tech, company=f'Company {i}', name=f'Lead {i}', contact='9876543210')
+            for i in range(30)
+        ])
+        Payment.objects.bulk_create([
+            Payment(owner=cls.tech, company=f'Company {i}', amount=Decimal('1234.5'), advance=Decimal('10'),
+                    remaining=Decimal('1224.5'), receipt='receipts/a.pdf' if i % 2 else '')
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.tech)
+
+    def test_values_rows_and_fast_renderer_match_serializer_output(self):
+        urls = ['/api/leads/', '/api/leads/?page=2', '/api/payments/', '/api/payments/?cursor=&page_size=7',
+                '/api/async/leads/?cursor=', '/api/leads/export/?as=ndjson']
+        for url in urls:
+            fast = self.client.get(url)
+            with override_settings(CRM_VALUES_LISTS=False, CRM_FAST_JSON=False):
+                plain = self.client.get(url)
+            content = b''.join(fast.streaming_content) if fast.streaming else fast.content
+            expected = b''.join(plain.streaming_content) if plain.streaming else plain.content
+            self.assertEqual(content, expected, url)
+        # Masking + keyset cursor dono values rows pe bhi
+        page = self.client.get('/api/payments/?cursor=&page_size=7').json()
+        self.assertEqual(page['results'][0]['amount'], '1234.50')
+        self.assertEqual(self.client.get(page['next']).json()['results'][0]['id'], page['results'][-1]['id'] - 1)
+        self.assertEqual(self.client.get('/api/leads/').json()['results'][0]['contact'], '98765*****')
+
+    def test_large_responses_are_compressed_when_accepted(self):
+        response = self.client.get('/api/leads/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), self.client.get('/api/leads/').content)
+        # Weak ETag se bhi 304
+        not_modified = self.client.get('/api/leads/', HTTP_ACCEPT_ENCODING='gzip',
+                                       HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.assertFalse(self.client.get('/api/leads/', HTTP_ACCEPT_ENCODING='gzip;q=0').has_header('Content-Encoding'))
+        small = self.client.get(f'/api/leads/{Lead.objects.first().pk}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_etags_need_a_shared_cache_by_default(self):
+        # LocMem: dusre worker ka bump yahan nahi dikhta -> ETag / 304 off
+        with override_settings(CRM_CONDITIONAL_GET=None):
+            self.assertFalse(self.client.get('/api/leads/').has_header('ETag'))
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                       'LOCATION': 'crm_cache'}}):
+                call_command('createcachetable', verbosity=0)
+                response = self.client.get('/api/leads/')
+                self.assertTrue(response.has_header('ETag'))
+                self.assertEqual(self.client.get('/api/leads/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    @skipUnless(middleware.brotli, "brotli not installed")
+    def test_brotli_preferred_when_installed(self):
+        response = self.client.get('/api/leads/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(middleware.brotli.decompress(response.content), self.client.get('/api/leads/').content)
+        not_modified = self.client.get('/api/leads/', HTTP_ACCEPT_ENCODING='gzip, br',
+                                       HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        # Client gzip ko zyada q de to gzip
+        self.assertEqual(self.client.get('/api/leads/', HTTP_ACCEPT_ENCODING='gzip;q=1, br;q=0.5')['Content-Encoding'],
+                         'gzip')
+
+    def test_encoding_negotiation(self):
+        with mock.patch.object(middleware, 'brotli', object()):
+            self.assertEqual(middleware.choose_encoding('gzip, deflate, br'), 'br')
+            self.assertEqual(middleware.choose_encoding('br;q=0.5, gzip'), 'gzip')
+            self.assertEqual(middleware.choose_encoding('br', streaming=True), None)
+            self.assertEqual(middleware.choose_encoding('*'), 'br')
+        with mock.patch.object(middleware, 'brotli', None):
+            self.assertEqual(middleware.choose_encoding('br, gzip;q=0.1'), 'gzip')
+        self.assertEqual(middleware.choose_encoding('identity, *;q=0'), None)
+
+    def test_range_responses_are_not_compressed(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        compress = middleware.CompressionMiddleware(lambda request: None)
+        body = b'{"rows": "' + b'x' * 4096 + b'"}'
+        for status, headers in ((206, {'Content-Range': 'bytes 0-4107/9000'}), (200, {'Content-Range': 'bytes */9000'})):
+            response = HttpResponse(body, status=status, content_type='application/json', headers=headers)
+            response = compress.process_response(request, response)
+            self.assertFalse(response.has_header('Content-Encoding'), status)
+            self.assertEqual(response.content, body)
+        full = compress.process_response(request, HttpResponse(body, content_type='application/json'))
+        self.assertEqual(full['Content-Encoding'], 'gzip')
+
+
+class DuplicatePolicyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        cls.outsider = User.objects.create_user('outsider', 'out@example.com', 'pass')
+        cls.lead = Lead.objects.create(owner=cls.sales, company='Acme Pvt Ltd', name='A', contact='9876543210')
+
+    def _create(self, user, policy, **data):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        payload = {'company': 'ACME private limited', 'name': 'B', 'contact': '+91 98765 43210', **data}
+        return client.post(f'/api/leads/?on_duplicate={policy}', payload, format='json')
+
+    def test_skip_merge_and_flag(self):
+        response = self._create(self.sales, 'skip')
+        self.assertEqual((response.status_code, response.data['duplicate_of']), (409, self.lead.pk))
+
+        response = self._create(self.sales, 'merge', note='Call after Diwali')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('fingerprint', response.data)
+        self.lead.refresh_from_db()
+        self.assertEqual((self.lead.name, self.lead.note), ('A', 'Call after Diwali'))
+
+        response = self._create(self.sales, 'flag')
+        self.assertEqual((response.status_code, response.data['duplicate_of']), (201, self.lead.pk))
+        self.assertEqual(Lead.objects.count(), 2)
+
+    def test_rows_outside_scope_are_not_duplicates(self):
+        response = self._create(self.outsider, 'skip')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('duplicate_of', response.data)
+
+        response = self._create(self.outsider, 'merge', note='pwned')
+        self.assertEqual(response.status_code, 200)  # Apni (abhi bani) lead me merge
+        self.assertEqual(response.data['owner'], self.outsider.pk)
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.note, '')
+
+        result = imports.write_leads([{'company': 'Acme', 'name': 'C', 'contact': '9876543210'}],
+                                     self.outsider, policy='merge')
+        self.assertEqual([row['duplicate_of'] for row in result.duplicates], [response.data['id']])
+
+    def test_migration_backfills_missing_fingerprints(self):
+        Lead.objects.filter(pk=self.lead.pk).update(fingerprint=None)
+        migration = importlib.import_module('app.migrations.0019_backfill_fingerprints')
+        migration.backfill_fingerprints(django_apps, None)
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.fingerprint, fingerprints.compute('Acme', '9876543210', None))
+
+
+class LeadBulkImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+
+    def test_json_import_keeps_synchronous_contract(self):
+        client = APIClient()
+        client.force_authenticate(user=self.sales)
+        response = client.post('/api/leads/bulk-import/', [
+            {'company': 'Acme', 'name': 'A'}, {'company': 'Beta', 'name': 'B'},
+        ], format='json')
+        self.assertEqual((response.status_code, response.data['message']), (201, "Imported 2 leads!"))
+        self.assertEqual(Lead.objects.count(), 2)
+
+        response = client.post('/api/leads/bulk-import/', [{'company': 'Gamma', 'name': 'G'}, {'status': 'x' * 100}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('status', response.data[1])
+        self.assertEqual(Lead.objects.count(), 2)
+
+
+@override_settings(CRM_STAGING_ROOT=RECEIPT_TEST_ROOT)
+class LeadImportPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.sales)
+
+    def run_worker(self):
+        job = jobs.claim('worker', 1)[0]
+        self.assertTrue(jobs.run(job))
+        return Job.objects.get(pk=job.pk)
+
+    def test_csv_upload_streams_in_batches(self):
+        csv_body = (
+            'Company Name,Contact Person,Phone\n'
+            'Acme,Ravi,9876543210\nBeta,Sita,\nGamma,,123\nDelta,Anil,\nEpsilon,Mira,\n'
+        )
+        upload = SimpleUploadedFile('leads.csv', csv_body.encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/api/leads/import/?batch_size=2', {'file': upload}, format='multipart')
+        self.assertEqual((response.status_code, response.data['status']), (202, 'queued'))
+        import_job = ImportJob.objects.get(pk=response.data['id'])
+        self.assertEqual(import_job.batch_size, 2)
+
+        # Batch = ek transaction + ek progress update: 2 + 2 + 1 rows
+        seen = []
+        with mock.patch.object(imports, 'write_leads', wraps=imports.write_leads) as write:
+            imports.run_import(import_job.pk, on_progress=lambda done, total: seen.append((done, total)))
+        self.assertEqual(seen, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual([len(call.args[0]) for call in write.call_args_list], [2, 1, 1])
+
+        import_job.refresh_from_db()
+        self.assertEqual((import_job.status, import_job.processed_rows, import_job.created_rows,
+                          import_job.failed_rows), ('done', 5, 4, 1))
+        self.assertEqual(import_job.errors[0]['row'], 3)
+        self.assertIn('name', import_job.errors[0]['errors'])
+        self.assertEqual(Lead.objects.get(company='Acme').contact, '9876543210')
+        self.assertFalse(StagedChunk.objects.exists())
+
+    def test_ndjson_body_and_job_progress(self):
+        body = b'{"company": "Acme", "name": "A"}\nnot json\n\n{"company": "Beta", "name": "B"}\n'
+        response = self.client.post('/api/leads/import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 202)
+
+        job = self.run_worker()
+        self.assertEqual((job.status, job.progress_done, job.progress_total), ('done', 3, 3))
+        self.assertEqual(job.result['status'], 'done')
+        import_job = ImportJob.objects.get(pk=response.data['id'])
+        self.assertEqual(import_job.errors, [{'row': 2, 'errors': {'non_field_errors': ['Invalid JSON line']}}])
+        self.assertEqual(sorted(Lead.objects.values_list('company', flat=True)), ['Acme', 'Beta'])
+
+        status_response = self.client.get(f"/api/leads/import/{import_job.pk}/")
+        self.assertEqual(status_response.data['created_rows'], 2)
+
+    def test_failed_import_fails_the_job(self):
+        body = b'{"company": "Acme", "name": "A"}\n'
+        response = self.client.post('/api/leads/import/', body, content_type='application/x-ndjson')
+        with mock.patch.object(imports, 'write_leads', side_effect=RuntimeError("disk full")):
+            with self.assertLogs('app', 'ERROR'):
+                self.assertFalse(jobs.run(jobs.claim('worker', 1)[0]))
+
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.error), ('failed', 'disk full'))  # max_attempts=1, retry nahi
+        self.assertEqual(ImportJob.objects.get(pk=response.data['id']).status, 'failed')
+
+    @override_settings(CRM_IMPORT_MAX_ERRORS=2)
+    def test_stored_errors_are_capped(self):
+        body = b''.join(b'{"company": "No name %d"}\n' % i for i in range(5))
+        response = self.client.post('/api/leads/import/?batch_size=2', body, content_type='application/x-ndjson')
+        self.run_worker()
+        import_job = ImportJob.objects.get(pk=response.data['id'])
+        self.assertEqual((import_job.failed_rows, len(import_job.errors)), (5, 2))
+        self.assertEqual([error['row'] for error in import_job.errors], [1, 2])
+
+
+@override_settings(CRM_JOB_RETRY_BACKOFF=10, CRM_JOB_STALE_SECONDS=60)
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        @jobs.task('tests.flaky')
+        def flaky(job, fail=True):
+            if fail:
+                raise RuntimeError("boom")
+            return {'ok': True}
+
+    def test_claim_respects_priority_delay_and_single_owner(self):
+        low = jobs.enqueue('tests.flaky', {'fail': False}, priority=5)
+        high = jobs.enqueue('tests.flaky', {'fail': False}, priority=0)
+        jobs.enqueue('tests.flaky', {'fail': False}, delay=3600)
+
+        claimed = jobs.claim('worker-1', limit=1)
+        self.assertEqual([job.pk for job in claimed], [high.pk])
+        self.assertEqual((claimed[0].status, claimed[0].attempts, claimed[0].locked_by), ('running', 1, 'worker-1'))
+        self.assertEqual([job.pk for job in jobs.claim('worker-2', limit=5)], [low.pk])
+        self.assertEqual(jobs.claim('worker-3', limit=5), [])
+
+        self.assertTrue(jobs.run(claimed[0]))
+        self.assertEqual(Job.objects.get(pk=high.pk).result, {'ok': True})
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = jobs.enqueue('tests.flaky', max_attempts=2)
+        before = timezone.now()
+        with self.assertLogs('app.jobs', 'ERROR'):
+            self.assertFalse(jobs.run(jobs.claim('worker', 1)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error, job.locked_by), ('queued', 'boom', ''))
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=10))
+        self.assertEqual(jobs.claim('worker', 1), [])  # Backoff abhi chal raha hai
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('app.jobs', 'ERROR'):
+            self.assertFalse(jobs.run(jobs.claim('worker', 1)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(jobs._backoff(3), timedelta(seconds=40))
+
+    def test_requeue_stale_recovers_crashed_jobs(self):
+        retry = jobs.enqueue('tests.flaky', max_attempts=3)
+        exhausted = jobs.enqueue('tests.flaky', max_attempts=1)
+        jobs.claim('crashed-worker', 5)
+        Job.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(jobs.requeue_stale(), (1, 1))
+        self.assertEqual(Job.objects.get(pk=retry.pk).status, 'queued')
+        self.assertEqual(Job.objects.get(pk=exhausted.pk).status, 'failed')
+        jobs.heartbeat([retry.pk])
+        self.assertEqual(jobs.requeue_stale(), (0, 0))
+
+    def test_worker_refuses_process_local_cache(self):
+        # Default (CRM_JOBS_INLINE unset): jobs web me inline, Procfile worker idle + exit 0
+        out = StringIO()
+        call_command('run_jobs', '--once', stdout=out)
+        self.assertIn('run inline', out.getvalue())
+
+        with override_settings(CRM_JOBS_INLINE=False):
+            with self.assertRaisesMessage(CommandError, 'process-local'):
+                call_command('run_jobs', '--once', stdout=StringIO())
+
+        out = StringIO()
+        call_command('run_jobs', '--once', '--allow-local-cache', stdout=out)
+        self.assertIn('0 done, 0 failed', out.getvalue())
+        self.assertEqual([w.id for w in caching.check_shared_cache(None)], ['app.W001'])
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                   'LOCATION': 'crm_cache'}}):
+            self.assertTrue(caching.is_shared())
+            self.assertEqual(caching.check_shared_cache(None), [])
+
+    def test_jobs_run_inline_without_shared_cache(self):
+        self.assertTrue(jobs.inline())
+        with mock.patch.object(jobs, '_start_inline') as start:
+            with self.captureOnCommitCallbacks(execute=True):
+                job = jobs.enqueue('tests.flaky', {'fail': False})
+        start.assert_called_once_with(job.pk, 'default')
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                   'LOCATION': 'crm_cache'}}):
+            self.assertFalse(jobs.inline())
+            with override_settings(CRM_JOBS_INLINE=True):
+                self.assertTrue(jobs.inline())
+
+    def test_inline_retry_waits_for_backoff(self):
+        job = jobs.enqueue('tests.flaky', max_attempts=2)
+        with self.assertLogs('app.jobs', 'ERROR'):
+            self.assertFalse(jobs.run(jobs.claim_one(job.pk)[0]))
+        with mock.patch('app.jobs.threading.Timer') as timer:
+            self.assertIs(jobs._retry_inline(job.pk, 'default'), timer.return_value)
+        delay, target = timer.call_args.args[:2]
+        self.assertTrue(0 < delay <= 10)
+        self.assertIs(target, jobs._run_inline)
+        timer.return_value.start.assert_called_once_with()
+
+        Job.objects.filter(pk=job.pk).update(status='failed')
+        self.assertIsNone(jobs._retry_inline(job.pk, 'default'))
+
+
+class ClaimsAuthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+
+    def setUp(self):
+        cache.clear()
+        self.token = str(CustomTokenObtainPairSerializer.get_token(self.sales).access_token)
+
+    def authenticate(self, method='get'):
+        request = getattr(APIRequestFactory(), method)('/api/leads/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    @override_settings(CRM_JWT_CLAIMS_AUTH=True)
+    def test_fresh_token_skips_the_database(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertIsInstance(user, ClaimsUser)
+            self.assertEqual(roles.get_roles(user), {'Sales'})
+
+    @override_settings(CRM_JWT_CLAIMS_AUTH=True)
+    def test_revoked_user_and_writes_use_the_database(self):
+        with self.assertNumQueries(1):
+            self.assertIsInstance(self.authenticate('post'), User)
+
+        self.sales.groups.clear()  # m2m_changed -> revoke_user
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        self.assertIsInstance(user, User)
+        self.assertEqual(roles.get_roles(user), frozenset())
+
+    def test_off_by_default_on_process_local_cache(self):
+        self.assertIsNone(settings.CRM_JWT_CLAIMS_AUTH)
+        self.assertIsInstance(self.authenticate(), User)
+
+
+@override_settings(CRM_DASHBOARD_CACHE_TIMEOUT=300)
+class DashboardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        Lead.objects.create(owner=cls.sales, company='Acme', name='A', contact='9876543210')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_hit_then_invalidated_after_commit(self):
+        today = timezone.localdate()
+        self.assertEqual(dashboard.get_stats(self.sales, today)['total_leads'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard.get_stats(self.sales, today)['total_leads'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Lead.objects.create(owner=self.sales, company='Beta', name='B', contact='9876543211')
+            # Commit se pehle purana version: cache ab bhi wahi
+            with self.assertNumQueries(0):
+                self.assertEqual(dashboard.get_stats(self.sales, today)['total_leads'], 1)
+        self.assertTrue(callbacks)
+        self.assertEqual(dashboard.get_stats(self.sales, today)['total_leads'], 2)
+
+
+    @override_settings(CRM_DASHBOARD_CACHE_TIMEOUT=None)
+    def test_off_by_default_on_process_local_cache(self):
+        self.assertIsNone(dashboard._cache_timeout())
+        today = timezone.localdate()
+        dashboard.get_stats(self.sales, today)
+        with CaptureQueriesContext(connection) as queries:
+            dashboard.get_stats(self.sales, today)
+        self.assertTrue(queries)
+
+class RoleCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales = Group.objects.create(name='Sales')
+        cls.tech = Group.objects.create(name='Tech')
+        cls.user.groups.add(cls.sales)
+
+    def setUp(self):
+        cache.clear()
+
+    def fresh_roles(self):
+        # Har request ka naya user object: memo nahi, sirf cross-request cache
+        return roles.get_roles(User.objects.get(pk=self.user.pk))
+
+    @override_settings(CRM_ROLE_CACHE_TIMEOUT=300)
+    def test_group_changes_take_effect(self):
+        self.assertEqual(self.fresh_roles(), {'Sales'})
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(roles.get_roles(user), {'Sales'})
+
+        self.tech.user_set.add(self.user)
+        self.assertEqual(self.fresh_roles(), {'Sales', 'Tech'})
+        self.user.groups.remove(self.sales)
+        self.assertEqual(self.fresh_roles(), {'Tech'})
+        self.tech.delete()
+        self.assertEqual(self.fresh_roles(), frozenset())
+
+    def test_off_by_default_on_process_local_cache(self):
+        self.assertIsNone(settings.CRM_ROLE_CACHE_TIMEOUT)
+        self.assertIsNone(roles._cache_timeout())
+        self.fresh_roles()
+        with self.assertNumQueries(1):
+            roles.get_roles(User(pk=self.user.pk))
+
+
+@override_settings(CRM_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(db_router, 'replica_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.seen = []
+
+    def view(self, request):
+        self.seen.append(PrimaryReplicaRouter().db_for_read(Lead))
+        return HttpResponse(status=400 if request.path == '/bad/' else 200)
+
+    def call(self, method, path='/', cookies=None, headers=None):
+        request = getattr(RequestFactory(), method)(path, HTTP_AUTHORIZATION='Bearer abc', headers=headers)
+        request.COOKIES.update(cookies or {})
+        return ReplicaRoutingMiddleware(self.view)(request)
+
+    def test_reads_go_to_replica_and_writes_pin_the_client(self):
+        self.call('get')
+        failed = self.call('post', '/bad/')  # Failed write pin nahi karta
+        self.assertNotIn(db_router.PIN_COOKIE, failed.cookies)
+        self.assertEqual(self.seen, ['replica', None])
+
+        pin = self.call('post').cookies[db_router.PIN_COOKIE]
+        self.assertEqual(pin['max-age'], 5)
+        self.assertTrue(pin['httponly'])
+
+        self.seen.clear()
+        self.call('get', cookies={db_router.PIN_COOKIE: pin.value})
+        self.call('get', cookies={db_router.PIN_COOKIE: '1:forged:signature'})
+        self.call('get')  # LocMem: token wala pin dusre workers tak nahi, isliye rakha hi nahi
+        self.assertEqual(self.seen, [None, 'replica', 'replica'])
+
+    def test_cross_origin_client_echoes_the_pin_header(self):
+        # Bearer SPA Lax cookie nahi bhejta: response header wapas bhejta hai
+        failed = self.call('post', '/bad/')
+        self.assertFalse(failed.has_header(db_router.PIN_HEADER))
+        pin = self.call('post')[db_router.PIN_HEADER]
+
+        self.seen.clear()
+        self.call('get', headers={db_router.PIN_HEADER: pin})
+        self.call('get', headers={db_router.PIN_HEADER: '1:forged:signature'})
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 10):
+            self.call('get', headers={db_router.PIN_HEADER: pin})  # Expire ho gaya
+        self.assertEqual(self.seen, [None, 'replica', 'replica'])
+
+    def test_token_pin_with_shared_cache(self):
+        with mock.patch.object(caching, 'is_shared', return_value=True):
+            self.call('post')
+            self.call('get')
+        self.assertEqual(self.seen, [None, None])
+
+    def test_primary_transaction_reads_stay_on_primary(self):
+        with db_router.reads_from(db_router.REPLICA_DB_ALIAS):
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(Lead), 'replica')
+            with mock.patch.object(connections[DEFAULT_DB_ALIAS], 'in_atomic_block', True):
+                self.assertEqual(PrimaryReplicaRouter().db_for_read(Lead), DEFAULT_DB_ALIAS)
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Lead), None)
+
+
+@override_settings(CRM_SYNC_PAGE_SIZE=2, CRM_SYNC_OVERLAP_SECONDS=5)
+class DeltaSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.team.groups.add(Group.objects.create(name='Sales'))
+        cls.alice = User.objects.create_user('alice', 'alice@example.com', 'pass')
+        cls.bob = User.objects.create_user('bob', 'bob@example.com', 'pass')
+        cls.leads = [
+            Lead.objects.create(owner=owner, company=f'Company {i}', name=f'Lead {i}')
+            for i, owner in enumerate([cls.alice, cls.alice, cls.bob])
+        ]
+
+    def since(self, user, cursor):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get('/api/leads/', {'since': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_then_overlap_then_only_changes(self):
+        first = self.since(self.team, '')
+        self.assertTrue(first['has_more'])
+        second = self.since(self.team, first['next'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual([row['id'] for row in first['changed'] + second['changed']], [lead.pk for lead in self.leads])
+
+        # Aakhri cursor pichle cursor se peeche nahi jaata
+        self.assertEqual(sync.decode_cursor(second['next'])[0], sync.decode_cursor(first['next'])[0])
+
+        # ... warna `now - overlap` pe: abhi abhi likhe rows agli sync me dobara
+        with self.settings(CRM_SYNC_PAGE_SIZE=10):
+            full = self.since(self.team, sync.encode_cursor(timezone.now() - timedelta(minutes=1), 0))
+            moment, pk = sync.decode_cursor(full['next'])
+            self.assertLessEqual(moment, timezone.now() - timedelta(seconds=5))
+            self.assertEqual(pk, 0)
+            self.assertEqual(len(self.since(self.team, full['next'])['changed']), 3)
+
+        cursor = sync.encode_cursor(timezone.now(), 0)
+        self.assertEqual(self.since(self.team, cursor)['changed'], [])
+        self.leads[2].address = 'Pune'
+        self.leads[2].save()
+        self.assertEqual([row['id'] for row in self.since(self.team, cursor)['changed']], [self.leads[2].pk])
+
+    def test_bad_and_expired_cursors(self):
+        client = APIClient()
+        client.force_authenticate(user=self.team)
+        self.assertEqual(client.get('/api/leads/', {'since': 'not-a-cursor'}).status_code, 400)
+        old = sync.encode_cursor(timezone.now() - timedelta(days=31), 0)
+        self.assertEqual(client.get('/api/leads/', {'since': old}).data['full_resync'], True)
+
+    def test_tombstones_are_scoped_to_the_caller(self):
+        cursor = sync.encode_cursor(timezone.now() - timedelta(minutes=1), 0)
+        alice_lead, bob_lead = self.leads[0].pk, self.leads[2].pk
+        Lead.objects.filter(pk__in=[alice_lead, bob_lead]).delete()
+        records_changed.send(sender=Lead, pks=[999], deleted=True, using='default')  # Owner pata nahi
+
+        self.assertEqual(self.since(self.alice, cursor)['deleted'], [alice_lead])
+        self.assertEqual(self.since(self.bob, cursor)['deleted'], [bob_lead])
+        self.assertEqual(sorted(self.since(self.team, cursor)['deleted']), sorted([alice_lead, bob_lead, 999]))
+
+
+@override_settings(STORAGES=LOCAL_STORAGES, MEDIA_ROOT=RECEIPT_TEST_ROOT)
+class ReceiptStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('sales', 'sales@example.com', 'pass')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(RECEIPT_TEST_ROOT, ignore_errors=True)
+
+    def save_blob(self, content=b'0123456789'):
+        return receipt_storage.save('receipts/scan.png', ContentFile(content))
+
+    def test_same_bytes_are_stored_once(self):
+        name = self.save_blob()
+        self.assertEqual(self.save_blob(), name)
+        self.assertTrue(is_content_addressed(name))
+        self.assertEqual(receipt_storage.listdir(posixpath.dirname(name))[1], [posixpath.basename(name)])
+
+    def test_delete_keeps_blobs_other_payments_use(self):
+        name = self.save_blob()
+        first, second = [Payment.objects.create(owner=self.user, company='Acme', receipt=name) for _ in range(2)]
+        first.receipt.delete()  # Row abhi bhi naam rakhti hai -> blob bachta hai
+        second.receipt.delete(save=False)
+        self.assertTrue(receipt_storage.exists(name))
+
+        Payment.objects.update(receipt='')
+        out = StringIO()
+        call_command('prune_receipts', '--min-age-hours=0', stdout=out)
+        self.assertIn('Pruned 1 receipt blobs', out.getvalue())
+        self.assertFalse(receipt_storage.exists(name))
+
+    def test_serve_media_ranges_and_validators(self):
+        name = self.save_blob()
+        etag = '"%s"' % posixpath.splitext(posixpath.basename(name))[0]
+
+        def get(**headers):
+            return serve_media(RequestFactory().get('/', headers=headers), name)
+
+        response = get()
+        self.assertEqual((response.status_code, response['ETag']), (200, etag))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+        response = get(Range='bytes=2-4')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 2-4/10'))
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        self.assertEqual(b''.join(get(Range='bytes=-3').streaming_content), b'789')
+
+        response = get(Range='bytes=20-30')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */10'))
+
+        self.assertEqual(get(Range='bytes=2-4', **{'If-Range': etag}).status_code, 206)
+        self.assertEqual(get(Range='bytes=2-4', **{'If-Range': '"stale"'}).status_code, 200)
+        self.assertEqual(get(**{'If-None-Match': etag}).status_code, 304)
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'pass', is_staff=True)
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+
+    def get(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client.get('/api/leads/')
+
+    def test_off_by_default(self):
+        response = self.get(self.staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('Timing-Allow-Origin', response)
+
+    @override_settings(CRM_SERVER_TIMING='staff')
+    def test_staff_only(self):
+        self.assertNotIn('Server-Timing', self.get(self.sales))
+        response = self.get(self.staff)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", ser;dur=[\d.]+, total;dur=')
+        self.assertEqual(response['Timing-Allow-Origin'], '*')
+
+    @override_settings(CRM_SERVER_TIMING='all')
+    def test_everyone(self):
+        self.assertIn('Server-Timing', self.get(self.sales))
+
+
+class IndexedSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        # Best match sabse purani id: rank ne '-id' ordering ko override kiya to ye pehle aayegi
+        cls.best = Lead.objects.create(owner=cls.sales, company='Acme', name='Acme')
+        cls.weak = Lead.objects.create(owner=cls.sales, company='Acme Industries Private Limited', name='Ravi Kumar')
+        cls.other = Lead.objects.create(owner=cls.sales, company='Beta Corp', name='Sita')
+
+    def fts_rows(self, match):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT rowid FROM app_lead_fts WHERE app_lead_fts MATCH %s ORDER BY rowid', [match])
+            return [row[0] for row in cursor.fetchall()]
+
+    def search(self, term):
+        client = APIClient()
+        client.force_authenticate(user=self.sales)
+        with CaptureQueriesContext(connection) as queries:
+            ids = [row['id'] for row in client.get('/api/leads/', {'search': term}).data['results']]
+        return ids, any('_fts' in query['sql'] for query in queries)
+
+    def test_index_follows_saves_deletes_and_bulk_writes(self):
+        self.assertEqual(self.fts_rows('"acme"'), [self.best.pk, self.weak.pk])
+        self.other.company = 'Gamma Steel'
+        self.other.save()
+        self.assertEqual(self.fts_rows('"beta"'), [])
+        self.assertEqual(self.fts_rows('"steel"'), [self.other.pk])
+
+        self.weak.delete()
+        self.assertEqual(self.fts_rows('"acme"'), [self.best.pk])
+
+        bulk = Lead.objects.bulk_create([Lead(owner=self.sales, company='Steel Bulk', name='B')])
+        records_changed.send(sender=Lead, pks=[bulk[0].pk], deleted=False, using='default')
+        self.assertEqual(self.fts_rows('"steel"'), [self.other.pk, bulk[0].pk])
+
+    def test_results_ranked_and_short_terms_fall_back(self):
+        self.assertEqual(self.search('acme'), ([self.best.pk, self.weak.pk], True))
+        self.assertEqual(self.search('acm ravi'), ([self.weak.pk], True))
+        # 3 chars se chhota term trigram index match nahi karta: icontains, normal '-id' order
+        self.assertEqual(self.search('ac'), ([self.weak.pk, self.best.pk], False))
+
+    def test_rank_comes_from_a_single_match(self):
+        # FTS table join hota hai: MATCH ek baar, per-row rank subquery nahi
+        queryset = search.SqliteFTSBackend().search(Lead.objects.order_by('-id'), ['acme'], None)
+        self.assertEqual(str(queryset.query).count('MATCH'), 1)
+        self.assertEqual([lead.pk for lead in queryset], [self.best.pk, self.weak.pk])
+        self.assertLess(queryset[0].search_rank, queryset[1].search_rank)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        start = timezone.now()
+        # NULL dates beech beech me, aur same date ke ties (id tie-breaker)
+        dates = [None, start, start, None, start - timedelta(days=1), None, start + timedelta(days=1)]
+        cls.leads = [Lead.objects.create(owner=cls.sales, company=f'C{i}', name='L', date=day)
+                     for i, day in enumerate(dates)]
+
+    def walk(self, ordering, page_size=2):
+        view = SimpleNamespace(keyset_ordering=ordering)
+        cursor, seen = '', []
+        while cursor is not None:
+            request = Request(APIRequestFactory().get('/', {'cursor': cursor, 'page_size': page_size}))
+            paginator = KeysetPagination()
+            seen += [lead.pk for lead in paginator.paginate_queryset(Lead.objects.all(), request, view)]
+            link = paginator.get_next_link()
+            cursor = link and parse_qs(urlparse(link).query)['cursor'][0]
+        return seen
+
+    def test_nullable_ordering_columns_page_without_gaps(self):
+        for ordering in (('-date', '-id'), ('date', 'id')):
+            expected = list(Lead.objects.order_by(*ordering).values_list('pk', flat=True))
+            for page_size in (1, 2, 3):
+                self.assertEqual(self.walk(ordering, page_size), expected, (ordering, page_size))
+
+    def test_invalid_and_tampered_cursors_are_404(self):
+        client = APIClient()
+        client.force_authenticate(user=self.sales)
+
+        def encode(raw):
+            return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+
+        for cursor in ('not-base64!', encode({'id': 1}), encode([1, 2, 3]), encode(['abc'])):
+            response = client.get('/api/leads/', {'cursor': cursor})
+            self.assertEqual((response.status_code, response.data), (404, {'detail': 'Invalid cursor'}), cursor)
+        # Badla hua par valid cursor bas ek aur position hai
+        response = client.get('/api/leads/', {'cursor': encode([self.leads[3].pk])})
+        self.assertEqual([row['id'] for row in response.data['results']], [lead.pk for lead in self.leads[2::-1]])
+
+    def test_ordering_param_is_ignored_under_cursor(self):
+        client = APIClient()
+        client.force_authenticate(user=self.sales)
+        plain = client.get('/api/leads/', {'cursor': '', 'page_size': 3}).data
+        ordered = client.get('/api/leads/', {'cursor': '', 'page_size': 3, 'ordering': 'company'}).data
+        self.assertEqual(ordered['results'], plain['results'])
+        self.assertEqual([row['id'] for row in plain['results']], [lead.pk for lead in self.leads[:-4:-1]])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        cls.tech = User.objects.create_user('tech', 'tech@example.com', 'pass')
+        cls.tech.groups.add(Group.objects.create(name='Tech'))
+        cls.outsider = User.objects.create_user('outsider', 'out@example.com', 'pass')
+        Lead.objects.create(owner=cls.sales, company='=HYPERLINK("http://evil")', name='@SUM(A1)', contact='9876543210')
+        Lead.objects.create(owner=cls.outsider, company='-2+3', name='Own lead', contact='9123456789')
+        Payment.objects.create(owner=cls.sales, company='Acme', amount=Decimal('-1500'))
+
+    def export(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_is_scoped_and_formula_safe(self):
+        rows = list(csv.DictReader(self.export(self.sales, '/api/leads/export/').lstrip('\ufeff').splitlines()))
+        self.assertEqual([row['company'] for row in rows], ["'-2+3", '\'=HYPERLINK("http://evil")'])
+        self.assertEqual(rows[1]['name'], "'@SUM(A1)")
+
+        own = list(csv.DictReader(self.export(self.outsider, '/api/leads/export/').lstrip('\ufeff').splitlines()))
+        self.assertEqual([row['name'] for row in own], ['Own lead'])
+        # Asli numbers (negative amount) escape nahi hote
+        payment = next(csv.DictReader(self.export(self.sales, '/api/payments/export/').lstrip('\ufeff').splitlines()))
+        self.assertEqual(payment['amount'], '-1500.00')
+
+    def test_ndjson_keeps_raw_values_and_masks_for_tech(self):
+        lines = [json.loads(line) for line in self.export(self.tech, '/api/leads/export/?as=ndjson').splitlines()]
+        self.assertEqual([line['company'] for line in lines], ['-2+3', '=HYPERLINK("http://evil")'])
+        self.assertEqual({line['contact'] for line in lines}, {'98765*****', '91234*****'})
+        sales_lines = self.export(self.sales, '/api/leads/export/?as=ndjson').splitlines()
+        self.assertIn('9876543210', {json.loads(line)['contact'] for line in sales_lines})
+
+
+class SalesTaskFollowUpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create_user('sales', 'sales@example.com', 'pass')
+        cls.sales.groups.add(Group.objects.create(name='Sales'))
+        cls.rep = User.objects.create_user('rep', 'rep@example.com', 'pass')
+        today = date.today()
+
+        def task(owner, days, status='Pending'):
+            return SalesTask.objects.create(owner=owner, lead_name='L', company='C', status=status,
+                                            next_follow_up=today + timedelta(days=days))
+
+        cls.overdue = task(cls.rep, -2)
+        cls.due_today = task(cls.rep, 0, 'Rescheduled')
+        cls.this_week = task(cls.rep, 3)
+        task(cls.rep, 10)  # Hafte ke baad
+        task(cls.rep, -1, 'Done')  # Band task agenda me nahi
+        cls.team_task = task(cls.sales, 0)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def test_follow_up_is_an_atomic_increment(self):
+        client = self.client_for(self.rep)
+        url = f'/api/sales-tasks/{self.overdue.pk}/follow-up/'
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(url, {'remarks': 'called'}, format='json')
+        self.assertEqual((response.status_code, response.data['follow_up_count']), (200, 1))
+        update = next(q['sql'] for q in queries if q['sql'].startswith('UPDATE "app_salestask"'))
+        self.assertIn('"follow_up_count" + 1', update)  # Read-modify-write nahi, F()
+
+        later = date.today() + timedelta(days=5)
+        response = client.post(url, {'next_follow_up': later.isoformat()}, format='json')
+        self.assertEqual((response.data['follow_up_count'], response.data['status']), (2, 'Rescheduled'))
+        self.overdue.refresh_from_db()
+        self.assertEqual((self.overdue.next_follow_up, self.overdue.remarks), (later, 'called'))
+
+        # Dusre ka task: non-team ko 404, team member log kar sakta hai
+        self.assertEqual(client.post(f'/api/sales-tasks/{self.team_task.pk}/follow-up/', {}).status_code, 404)
+        self.assertEqual(self.client_for(self.sales).post(url, {}, format='json').data['follow_up_count'], 3)
+
+    def test_agenda_buckets_and_scoping(self):
+        rep = self.client_for(self.rep)
+        response = rep.get('/api/sales-tasks/agenda/')
+        self.assertEqual([row['id'] for row in response.data['results']],
+                         [self.overdue.pk, self.due_today.pk, self.this_week.pk])
+        self.assertEqual(response.data['counts'], {'overdue': 1, 'today': 1, 'week': 1})
+        self.assertEqual([row['id'] for row in rep.get('/api/sales-tasks/agenda/?bucket=today').data['results']],
+                         [self.due_today.pk])
+        self.assertEqual(rep.get('/api/sales-tasks/agenda/?bucket=later').status_code, 400)
+        # Non-team ka ?owner= ignore: sirf apne
+        self.assertEqual(rep.get(f'/api/sales-tasks/agenda/?owner={self.sales.pk}').data['counts']['today'], 1)
+        everyone = rep.get('/api/sales-tasks/agenda/?owner=all').data['results']
+        self.assertNotIn(self.team_task.pk, [row['id'] for row in everyone])
+
+        team = self.client_for(self.sales)
+        self.assertEqual([row['id'] for row in team.get('/api/sales-tasks/agenda/').data['results']], [self.team_task.pk])
+        self.assertEqual(team.get('/api/sales-tasks/agenda/?owner=all').data['counts'],
+                         {'overdue': 1, 'today': 2, 'week': 1})
+        self.assertEqual(team.get(f'/api/sales-tasks/agenda/?owner={self.rep.pk}').data['counts']['today'], 1)
+
+
+class HotQueryPlanTests(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("Plans asserted for SQLite; Postgres: manage.py explain_hot_queries --no-seqscan")
+        for label, index, queryset in hot_queries():
+            with self.subTest(label):
+                self.assertIn(index, queryset.explain())
+
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertNotIn('[ NO]', out.getvalue())
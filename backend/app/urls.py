@@ -1,48 +1,103 @@
 from django.urls import path
 from .views import *
+from .auth import ClaimsTokenRefreshSerializer
+from .bulk import BulkDeleteView, BulkUpdateView
+from .exports import ExportView
 from rest_framework_simplejwt.views import TokenRefreshView
 from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import re_path
-from django.views.static import serve
+from .media import serve_media
+from .async_views import AsyncDashboardStats, AsyncDetailView, AsyncListView
 urlpatterns = [
     # --- Authentication (Login/Token) ---
     path('token/', CustomLoginView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', TokenRefreshView.as_view(serializer_class=ClaimsTokenRefreshSerializer), name='token_refresh'),
     path('register/', RegisterView.as_view(), name='register'),
 
     # --- Dashboard ---
     path('dashboard/stats/', DashboardStats.as_view(), name='dashboard-stats'),
+    path('analytics/revenue/', RevenueAnalytics.as_view(), name='revenue-analytics'),
+    path('analytics/funnel/', FunnelAnalytics.as_view(), name='funnel-analytics'),
+    path('perf/stats/', PerfStats.as_view(), name='perf-stats'),  # Admin only
 
     # --- Leads ---
     path('leads/', LeadListCreate.as_view(), name='lead-list'),
     path('leads/<int:pk>/', LeadDetail.as_view(), name='lead-detail'),
+    path('leads/<int:pk>/history/', LeadStatusHistory.as_view(), name='lead-status-history'),
+    path('leads/export/', ExportView.as_view(list_view=LeadListCreate), name='lead-export'), # 📤 ?as=csv|ndjson
     path('leads/bulk-import/', LeadBulkImport.as_view(), name='lead-bulk-import'), # 🚛 Import
-    path('leads/bulk-delete/', LeadBulkDelete.as_view(), name='lead-bulk-delete'), # 🧹 Delete
+    path('leads/bulk-update/', BulkUpdateView.as_view(list_view=LeadListCreate), name='lead-bulk-update'), # ✏️ ids/filter + patch
+    path('leads/bulk-delete/', BulkDeleteView.as_view(list_view=LeadListCreate), name='lead-bulk-delete'), # 🧹 Delete
+    path('leads/import/', LeadImport.as_view(), name='lead-import'), # 🚛 CSV/XLSX/NDJSON (background)
+    path('leads/import/<int:pk>/', ImportJobDetail.as_view(), name='lead-import-status'),
+
+    # --- Background Jobs ---
+    path('jobs/', JobList.as_view(), name='job-list'),
+    path('jobs/<int:pk>/', JobDetail.as_view(), name='job-detail'),
 
     # --- Customers ---
     path('customers/', CustomerListCreate.as_view(), name='customer-list'),
     path('customers/<int:pk>/', CustomerDetail.as_view(), name='customer-detail'),
+    path('customers/export/', ExportView.as_view(list_view=CustomerListCreate), name='customer-export'),
+    path('customers/bulk-update/', BulkUpdateView.as_view(list_view=CustomerListCreate), name='customer-bulk-update'),
+    path('customers/bulk-delete/', BulkDeleteView.as_view(list_view=CustomerListCreate), name='customer-bulk-delete'),
 
     # --- Payments ---
     path('payments/', PaymentListCreate.as_view(), name='payment-list'),
     path('payments/<int:pk>/', PaymentDetail.as_view(), name='payment-detail'),
+    path('payments/export/', ExportView.as_view(list_view=PaymentListCreate), name='payment-export'),
+    path('payments/bulk-update/', BulkUpdateView.as_view(list_view=PaymentListCreate), name='payment-bulk-update'),
+    path('payments/bulk-delete/', BulkDeleteView.as_view(list_view=PaymentListCreate), name='payment-bulk-delete'),
+    path('payments/<int:pk>/ledger/', PaymentLedger.as_view(), name='payment-ledger'),
+    path('receivables/', ReceivableList.as_view(), name='receivable-list'),
 
     # --- Tasks (Technical) ---
     path('tasks/', TaskListCreate.as_view(), name='task-list'),
     path('tasks/<int:pk>/', TaskDetail.as_view(), name='task-detail'),
+    path('tasks/export/', ExportView.as_view(list_view=TaskListCreate), name='task-export'),
+    path('tasks/bulk-update/', BulkUpdateView.as_view(list_view=TaskListCreate), name='task-bulk-update'),
+    path('tasks/bulk-delete/', BulkDeleteView.as_view(list_view=TaskListCreate), name='task-bulk-delete'),
 
     # --- Tenders ---
     path('tenders/', TenderListCreate.as_view(), name='tender-list'),
     path('tenders/<int:pk>/', TenderDetail.as_view(), name='tender-detail'),
+    path('tenders/export/', ExportView.as_view(list_view=TenderListCreate), name='tender-export'),
+    path('tenders/bulk-update/', BulkUpdateView.as_view(list_view=TenderListCreate), name='tender-bulk-update'),
+    path('tenders/bulk-delete/', BulkDeleteView.as_view(list_view=TenderListCreate), name='tender-bulk-delete'),
 
     # --- Tech Data ---
     path('tech-data/', TechDataListCreate.as_view(), name='tech-data-list'),
     path('tech-data/<int:pk>/', TechDataDetail.as_view(), name='tech-data-detail'),
+    path('tech-data/export/', ExportView.as_view(list_view=TechDataListCreate), name='tech-data-export'),
+    path('tech-data/bulk-update/', BulkUpdateView.as_view(list_view=TechDataListCreate), name='tech-data-bulk-update'),
+    path('tech-data/bulk-delete/', BulkDeleteView.as_view(list_view=TechDataListCreate), name='tech-data-bulk-delete'),
 
     # --- Sales Tasks (Follow Ups) ---
     path('sales-tasks/', SalesTaskListCreate.as_view(), name='sales-task-list'),
     path('sales-tasks/<int:pk>/', SalesTaskDetail.as_view(), name='sales-task-detail'),
+    path('sales-tasks/agenda/', SalesTaskAgenda.as_view(), name='sales-task-agenda'), # 📅 ?bucket=overdue|today|week
+    path('sales-tasks/<int:pk>/follow-up/', LogSalesTaskFollowUp.as_view(), name='sales-task-follow-up'),
+    path('sales-tasks/export/', ExportView.as_view(list_view=SalesTaskListCreate), name='sales-task-export'),
+    path('sales-tasks/bulk-update/', BulkUpdateView.as_view(list_view=SalesTaskListCreate), name='sales-task-bulk-update'),
+    path('sales-tasks/bulk-delete/', BulkDeleteView.as_view(list_view=SalesTaskListCreate), name='sales-task-bulk-delete'),
+
+    # --- Async reads (ASGI pe bina thread ke; response sync endpoints jaisa hi) ---
+    path('async/dashboard/stats/', AsyncDashboardStats.as_view(view_class=DashboardStats), name='async-dashboard-stats'),
+    path('async/leads/', AsyncListView.as_view(view_class=LeadListCreate), name='async-lead-list'),
+    path('async/leads/<int:pk>/', AsyncDetailView.as_view(view_class=LeadDetail), name='async-lead-detail'),
+    path('async/customers/', AsyncListView.as_view(view_class=CustomerListCreate), name='async-customer-list'),
+    path('async/customers/<int:pk>/', AsyncDetailView.as_view(view_class=CustomerDetail), name='async-customer-detail'),
+    path('async/payments/', AsyncListView.as_view(view_class=PaymentListCreate), name='async-payment-list'),
+    path('async/payments/<int:pk>/', AsyncDetailView.as_view(view_class=PaymentDetail), name='async-payment-detail'),
+    path('async/tasks/', AsyncListView.as_view(view_class=TaskListCreate), name='async-task-list'),
+    path('async/tasks/<int:pk>/', AsyncDetailView.as_view(view_class=TaskDetail), name='async-task-detail'),
+    path('async/tenders/', AsyncListView.as_view(view_class=TenderListCreate), name='async-tender-list'),
+    path('async/tenders/<int:pk>/', AsyncDetailView.as_view(view_class=TenderDetail), name='async-tender-detail'),
+    path('async/tech-data/', AsyncListView.as_view(view_class=TechDataListCreate), name='async-tech-data-list'),
+    path('async/tech-data/<int:pk>/', AsyncDetailView.as_view(view_class=TechDataDetail), name='async-tech-data-detail'),
+    path('async/sales-tasks/', AsyncListView.as_view(view_class=SalesTaskListCreate), name='async-sales-task-list'),
+    path('async/sales-tasks/<int:pk>/', AsyncDetailView.as_view(view_class=SalesTaskDetail), name='async-sales-task-detail'),
 
     # ==========================================
     #       CUSTOM LOGIC (Magic 🪄)
@@ -57,11 +112,16 @@ urlpatterns = [
     # 3. Lead -> Sales Task (Follow Up)
     path('leads/<int:pk>/to-sales-task/', MoveLeadToSalesTask.as_view(), name='lead-to-sales'),
 
+    # 4. Batch: bahut saari leads ek hi request (ek transaction) me
+    path('leads/convert/', LeadBatchConvert.as_view(), name='lead-batch-to-payment'),
+    path('leads/to-sales-task/', LeadBatchToSalesTask.as_view(), name='lead-batch-to-sales'),
+
 
 
 
 
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    # Range requests + ETag + immutable cache for content-addressed receipts
+    re_path(r'^media/(?P<path>.*)$', serve_media),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+from .serializers import MaskedFieldsMixin
+
+# ==========================================
+#       VALUES LISTS (bina model instances ke rows 🏎️)
+# ==========================================
+# List endpoints pe zyada time serializer ka nahi, har row ka model instance banane
+# (from_db, __init__, descriptors) + phir field-by-field get_attribute ka hai. Read-only
+# lists ke liye queryset.values(<serializer ke columns>) se seedha dicts aate hain, aur
+# har column ka DRF field hi to_representation karta hai — isliye JSON bilkul wahi
+# (Decimal "1500.00", datetime 'Z', FK id, file URL, masking).
+#
+# Plan serializer ke fields se banta hai. Koi bhi field jo ek concrete model column nahi
+# (SerializerMethodField, nested serializer, 'owner.username' source, M2M) ya serializer
+# ki apni to_representation ho to plan None -> purana instance waala raasta.
+
+# In to_representation ke alawa koi override hua to values path safe nahi
+PLAIN_REPRESENTATIONS = (
+    serializers.ModelSerializer.to_representation,
+    MaskedFieldsMixin.to_representation,
+)
+
+
+def enabled():
+    return getattr(settings, 'CRM_VALUES_LISTS', True)
+
+
+def _identity(value):
+    return value
+
+
+def _file_converter(field, model_field):
+    # .values() sirf file ka naam deta hai; DRF FileField ko FieldFile chahiye (.url)
+    def convert(value):
+        return field.to_representation(model_field.attr_class(None, model_field, value))
+    return convert
+
+
+def _converter(field, model_field):
+    if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField,
+                          serializers.HiddenField, ManyRelatedField)):
+        return None
+    if isinstance(field, RelatedField):
+        # FK column = pk hi; pk_field / slug / hyperlinked fields ke liye object chahiye
+        if type(field) is PrimaryKeyRelatedField and field.pk_field is None:
+            return _identity
+        return None
+    if isinstance(field, serializers.FileField):
+        return _file_converter(field, model_field)
+    return field.to_representation
+
+
+class ValuesPlan:
+    """Serializer ke readable fields -> (output name, values() column, converter)."""
+
+    def __init__(self, columns, maskers):
+        self.columns = columns
+        self.maskers = maskers
+
+    def queryset(self, queryset, extra=()):
+        # `extra` = output me nahi par chahiye (keyset cursor ke ordering fields)
+        names = [column for _, column, _ in self.columns]
+        names += [name for name in extra if name not in names]
+        return queryset.values(*names)
+
+    def row(self, row):
+        item = {}
+        for name, column, convert in self.columns:
+            value = row[column]
+            # DRF bhi None ko to_representation tak nahi bhejta
+            item[name] = None if value is None else convert(value)
+        if self.maskers:
+            MaskedFieldsMixin.apply_masks(item, self.maskers)
+        return item
+
+    def rows(self, rows):
+        return [self.row(row) for row in rows]
+
+
+def plan_for(serializer):
+    """ValuesPlan ya None (serializer values() se exactly reproduce nahi ho sakta)."""
+    if not enabled() or not isinstance(serializer, serializers.ModelSerializer):
+        return None
+    if type(serializer).to_representation not in PLAIN_REPRESENTATIONS:
+        return None
+
+    model = serializer.Meta.model
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if len(field.source_attrs) != 1:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        convert = _converter(field, model_field)
+        if convert is None:
+            return None
+        columns.append((name, model_field.name, convert))
+
+    maskers = serializer.get_maskers() if isinstance(serializer, MaskedFieldsMixin) else {}
+    return ValuesPlan(columns, maskers)
@@ -4,21 +4,23 @@ from rest_framework.views import APIView
 from django.contrib.auth.models import User
 from .serializers import *
 from .models import *
-from datetime import date   
+from datetime import date, datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from .permissions import IsSalesTeamOrReadOnly, IsTechTeamOrReadOnly
+from . import bulk, conversions, dashboard, fingerprints, funnel, imports, ledger, perf, receipts, roles, rollups, sync, values
+from .conditional import ConditionalGetMixin
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from rest_framework.parsers import MultiPartParser
 from .serializers import CustomTokenObtainPairSerializer 
 from rest_framework_simplejwt.views import TokenObtainPairView
-from django.db.models import Sum, Count, Q
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Sum, Count, F, Q
 from rest_framework import viewsets
-
-# ==========================================
-#       PAGINATION CLASS (🚀 Fast Loading)
-# ==========================================
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 20  # Ek baar mein sirf 20 leads aayengi
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+from .pagination import KeysetPagination, StandardResultsSetPagination
+from .search import IndexedSearchFilter
+from .signals import records_changed
 
 # ==========================================
 #       AUTHENTICATION
@@ -34,8 +36,21 @@ class RegisterView(generics.CreateAPIView):
 # ==========================================
 #       BASE VIEWS
 # ==========================================
-class BaseListCreateView(generics.ListCreateAPIView):
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+def serialize(serializer):
+    # Serializer time Server-Timing ke 'ser' me jata hai (PerformanceMiddleware)
+    with perf.measure_serializer():
+        return serializer.data
+
+class BaseListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    filter_backends = [IndexedSearchFilter, filters.OrderingFilter]
+    # ?cursor= bhejo to keyset pages, warna fallback (None = poori list)
+    pagination_class = KeysetPagination
+    fallback_pagination_class = None
+    keyset_ordering = ('-id',)
+    # List rows .values() se, bina model instances (app/values.py). False = hamesha serializer
+    values_lists = True
+    # Kaunse roles sab rows dekhte hain (get_queryset jaisa hi) — delta sync ke tombstones isi se
+    team_roles = (roles.SALES, roles.TECH)
     
     def get_queryset(self):
         return self.model.objects.all()
@@ -43,31 +58,120 @@ class BaseListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class BaseDetailView(generics.RetrieveUpdateDestroyAPIView):
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if 'since' in request.query_params:
+            return self.delta(request, queryset)
+        plan = self.get_values_plan()
+        if plan is not None:
+            queryset = self.values_queryset(plan, queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_rows(page, plan))
+        return Response(self.serialize_rows(queryset, plan))
+
+    def get_values_plan(self):
+        # None = serializer khud (SerializerMethodField, nested wagairah) — output same rehta hai
+        if not self.values_lists:
+            return None
+        return values.plan_for(self.get_serializer())
+
+    def values_queryset(self, plan, queryset):
+        # Keyset cursor last row ke ordering fields se banta hai, wo bhi fetch karo
+        return plan.queryset(queryset, [name.lstrip('-') for name in self.keyset_ordering])
+
+    def serialize_rows(self, rows, plan):
+        if plan is None:
+            return serialize(self.get_serializer(rows, many=True))
+        with perf.measure_serializer():
+            return plan.rows(rows)
+
+    def delta(self, request, queryset):
+        # ?since=<cursor> -> sirf badle hue rows + deleted ids (dekho sync.py)
+        try:
+            result = sync.changes(queryset, request.query_params.get('since'), self.get_tombstone_owner())
+        except sync.InvalidCursor:
+            return Response({"error": "Invalid since cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        except sync.CursorExpired:
+            return Response(
+                {"error": "Cursor too old, do a full resync", "full_resync": True},
+                status=status.HTTP_410_GONE,
+            )
+        result['changed'] = serialize(self.get_serializer(result['changed'], many=True))
+        return Response(result)
+
+    def get_tombstone_owner(self):
+        # Team = sab deletes; baaki sirf apni rows ke (dusron ke deleted ids leak na hon)
+        user = self.request.user
+        return None if roles.is_team_member(user, *self.team_roles) else user.pk
+
+class BaseDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return self.model.objects.all()
 
+    def retrieve(self, request, *args, **kwargs):
+        return Response(serialize(self.get_serializer(self.get_object())))
+
+
+# ==========================================
+#       DUPLICATE CHECK ON CREATE (Lead / Customer)
+# ==========================================
+class DuplicatePolicyMixin:
+    """
+    ?on_duplicate=skip|merge|flag (default settings.CRM_DUPLICATE_POLICY).
+    skip -> 409 + duplicate_of, merge -> existing row ke khali fields bharo (200),
+    flag -> naya row banao, response me duplicate_of.
+    """
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        fingerprint = fingerprints.compute(data.get('company'), data.get('contact'), data.get('email'))
+        # Sirf wahi rows jo user ko list me dikhti hain — dusre owner ki lead na leak ho na merge
+        scope = self.get_queryset()
+        duplicate_of = fingerprints.existing_ids(scope, [fingerprint]).get(fingerprint)
+        if duplicate_of is None:
+            return super().create(request, *args, **kwargs)
+
+        policy = fingerprints.get_policy(request.query_params.get('on_duplicate'))
+        if policy == 'skip':
+            return Response(
+                {"error": "Duplicate record", "duplicate_of": duplicate_of},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if policy == 'merge':
+            existing = scope.get(pk=duplicate_of)
+            changed = fingerprints.merge_into(existing, data)
+            if changed:
+                existing.save(update_fields=changed)
+            return Response(self.get_serializer(existing).data, status=status.HTTP_200_OK)
+
+        self.perform_create(serializer)
+        response_data = dict(serializer.data, duplicate_of=duplicate_of)
+        return Response(response_data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(serializer.data))
+
 
 # ==========================================
 #       SALES TEAM VIEWS (Secured Shared Access)
 # ==========================================
 
 # 1. Leads (🟢 UPDATED FOR SHARING)
-class LeadListCreate(BaseListCreateView):
+class LeadListCreate(DuplicatePolicyMixin, BaseListCreateView):
     serializer_class = LeadSerializer
     model = Lead
     permission_classes = [permissions.IsAuthenticated] 
     search_fields = ['name', 'company', 'status', 'contact']
-    pagination_class = StandardResultsSetPagination 
+    fallback_pagination_class = StandardResultsSetPagination 
 
     def get_queryset(self):
         user = self.request.user
         
         # Shared Access: Sales/Tech/Admin see ALL leads
-        if user.groups.filter(name__in=['Sales', 'Tech']).exists() or user.is_superuser:
+        if roles.is_team_member(user):
             queryset = Lead.objects.all().order_by('-id')
         else:
-            queryset = Lead.objects.filter(owner=user).order_by('-id')
+            queryset = Lead.objects.filter(owner_id=user.pk).order_by('-id')
 
         # Filter Logic
         status_param = self.request.query_params.get('status', None)
@@ -77,7 +181,12 @@ class LeadListCreate(BaseListCreateView):
             queryset = queryset.filter(status=status_param)
 
         if date_after and date_after != '':
-            queryset = queryset.filter(date__date__gte=date_after)
+            # date__date__gte column pe function lagata hai (index use nahi hota),
+            # isliye din ki shuruaat ka datetime bana ke seedha compare karo
+            day = parse_date(date_after)
+            if day is not None:
+                start = timezone.make_aware(datetime.combine(day, time.min))
+                queryset = queryset.filter(date__gte=start)
 
         return queryset
 
@@ -89,19 +198,32 @@ class LeadDetail(BaseDetailView):
     def get_queryset(self):
         return Lead.objects.all()
 
+class LeadStatusHistory(generics.ListAPIView):
+    """leads/<pk>/history/ — status transitions, purane pehle (lead delete ho chuki ho tab bhi)."""
+    serializer_class = LeadStatusChangeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+
+    def get_queryset(self):
+        queryset = LeadStatusChange.objects.filter(lead_id=self.kwargs['pk'])
+        if not roles.is_team_member(self.request.user):
+            queryset = queryset.filter(owner_id=self.request.user.pk)
+        return queryset.order_by('changed_at', 'id')
+
 
 # 2. Customers (🟢 UPDATED FOR SHARING)
-class CustomerListCreate(BaseListCreateView):
+class CustomerListCreate(DuplicatePolicyMixin, BaseListCreateView):
     serializer_class = CustomerSerializer
     model = Customer
     permission_classes = [permissions.IsAuthenticated]
     search_fields = ['name', 'company', 'email']
+    keyset_ordering = ('-date', '-id')
 
     def get_queryset(self):
         user = self.request.user
-        if user.groups.filter(name__in=['Sales', 'Tech']).exists() or user.is_superuser:
-            return Customer.objects.all().order_by('-date')
-        return Customer.objects.filter(owner=user).order_by('-date')
+        if roles.is_team_member(user):
+            return Customer.objects.all().order_by('-date', '-id')
+        return Customer.objects.filter(owner_id=user.pk).order_by('-date', '-id')
 
 class CustomerDetail(BaseDetailView):
     serializer_class = CustomerSerializer
@@ -121,9 +243,9 @@ class PaymentListCreate(BaseListCreateView):
 
     def get_queryset(self):
         user = self.request.user
-        if user.groups.filter(name__in=['Sales', 'Tech']).exists() or user.is_superuser:
+        if roles.is_team_member(user):
             return Payment.objects.all().order_by('-id')
-        return Payment.objects.filter(owner=user).order_by('-id')
+        return Payment.objects.filter(owner_id=user.pk).order_by('-id')
 
 class PaymentDetail(BaseDetailView):
     serializer_class = PaymentSerializer
@@ -133,6 +255,69 @@ class PaymentDetail(BaseDetailView):
     def get_queryset(self):
         return Payment.objects.all()
 
+class PaymentLedger(generics.ListCreateAPIView):
+    """
+    payments/<pk>/ledger/ — GET entries (naya pehle), POST receipt / adjustment.
+    POST ke response me payment ka naya received / remaining bhi.
+    """
+    serializer_class = LedgerEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+
+    def get_payment_queryset(self):
+        # Payment list jaisa scoping: team sab, baaki sirf apni
+        user = self.request.user
+        if roles.is_team_member(user):
+            return Payment.objects.all()
+        return Payment.objects.filter(owner_id=user.pk)
+
+    def get_queryset(self):
+        if not self.get_payment_queryset().filter(pk=self.kwargs['pk']).exists():
+            raise Http404("Payment not found")
+        return LedgerEntry.objects.filter(payment_id=self.kwargs['pk']).order_by('-date', '-id')
+
+    def create(self, request, pk):
+        if not self.get_payment_queryset().filter(pk=pk).exists():
+            return Response({"error": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entry, payment = ledger.record(pk, user=request.user, **serializer.validated_data)
+        return Response({
+            **self.get_serializer(entry).data,
+            "payment_received": str(payment.received),
+            "payment_remaining": str(payment.remaining),
+        }, status=status.HTTP_201_CREATED)
+
+class ReceivableList(ConditionalGetMixin, generics.ListAPIView):
+    """
+    Outstanding receivables, sabse bada balance pehle. Receivable summary table se
+    (app/ledger.py) — ledger history kitni bhi ho, sirf (company, owner) rows padhi jaati hain.
+    Team: ?by=company (default, company totals) ya ?by=owner (&owner=<id>). Baaki users
+    sirf apni rows. ?all=1 = zero / negative balance bhi.
+    """
+    serializer_class = ReceivableSerializer
+    model = Receivable
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        params = self.request.query_params
+        queryset = Receivable.objects.select_related('owner')
+        if not roles.is_team_member(user):
+            queryset = queryset.filter(owner_id=user.pk)
+        elif params.get('by') == 'owner':
+            owner = params.get('owner')
+            if owner:
+                queryset = queryset.filter(owner_id=owner) if owner.isdigit() else queryset.none()
+            else:
+                queryset = queryset.filter(owner__isnull=False)
+        else:
+            queryset = queryset.filter(owner__isnull=True)
+        if params.get('all') not in ('1', 'true'):
+            queryset = queryset.filter(balance__gt=0)
+        return queryset.order_by('-balance', 'company_key', 'id')
+
 
 # 4. Sales Tasks
 class SalesTaskListCreate(BaseListCreateView):
@@ -140,12 +325,13 @@ class SalesTaskListCreate(BaseListCreateView):
     model = SalesTask
     permission_classes = [permissions.IsAuthenticated]
     search_fields = ['lead_name', 'company', 'status']
+    keyset_ordering = ('-date', '-id')
 
     def get_queryset(self):
         user = self.request.user
-        if user.groups.filter(name__in=['Sales', 'Tech']).exists() or user.is_superuser:
-            return SalesTask.objects.all().order_by('-date')
-        return SalesTask.objects.filter(owner=user).order_by('-date')
+        if roles.is_team_member(user):
+            return SalesTask.objects.all().order_by('-date', '-id')
+        return SalesTask.objects.filter(owner_id=user.pk).order_by('-date', '-id')
 
 class SalesTaskDetail(BaseDetailView):
     serializer_class = SalesTaskSerializer
@@ -154,9 +340,92 @@ class SalesTaskDetail(BaseDetailView):
 
     def get_queryset(self):
         user = self.request.user
-        if user.groups.filter(name__in=['Sales', 'Tech']).exists() or user.is_superuser:
+        if roles.is_team_member(user):
             return SalesTask.objects.all()
-        return SalesTask.objects.filter(owner=user)
+        return SalesTask.objects.filter(owner_id=user.pk)
+
+# Follow-up agenda: sirf due open tasks (overdue / today / week), paginated
+class SalesTaskAgenda(ConditionalGetMixin, generics.ListAPIView):
+    """
+    ?bucket=overdue|today|week (default: teeno). Apne tasks; team members
+    ?owner=<id> ya ?owner=all bhi de sakte hain. week = agle 6 din (aaj ke baad).
+    salestask_due_idx (status, next_follow_up, owner) se sirf due rows padhi jaati hain.
+    """
+    serializer_class = SalesTaskSerializer
+    model = SalesTask
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    fallback_pagination_class = StandardResultsSetPagination
+    keyset_ordering = ('next_follow_up', 'id')
+    BUCKETS = ('overdue', 'today', 'week')
+
+    def get_etag_extra(self):
+        return [date.today()]
+
+    def get_scoped_queryset(self):
+        user = self.request.user
+        queryset = SalesTask.objects.filter(status__in=SalesTask.OPEN_STATUSES)
+        owner = self.request.query_params.get('owner')
+        if owner and roles.is_team_member(user):
+            if owner == 'all':
+                return queryset
+            return queryset.filter(owner_id=owner) if owner.isdigit() else queryset.none()
+        return queryset.filter(owner_id=user.pk)
+
+    def get_queryset(self):
+        today = date.today()
+        week_end = today + timedelta(days=6)
+        bucket = self.request.query_params.get('bucket')
+        queryset = self.get_scoped_queryset()
+        if bucket == 'overdue':
+            queryset = queryset.filter(next_follow_up__lt=today)
+        elif bucket == 'today':
+            queryset = queryset.filter(next_follow_up=today)
+        elif bucket == 'week':
+            queryset = queryset.filter(next_follow_up__gt=today, next_follow_up__lte=week_end)
+        else:
+            queryset = queryset.filter(next_follow_up__lte=week_end)
+        return queryset.order_by('next_follow_up', 'id')
+
+    def get_counts(self):
+        today = date.today()
+        return self.get_scoped_queryset().filter(next_follow_up__lte=today + timedelta(days=6)).aggregate(
+            overdue=Count('id', filter=Q(next_follow_up__lt=today)),
+            today=Count('id', filter=Q(next_follow_up=today)),
+            week=Count('id', filter=Q(next_follow_up__gt=today)),
+        )
+
+    def list(self, request, *args, **kwargs):
+        bucket = request.query_params.get('bucket')
+        if bucket and bucket not in self.BUCKETS:
+            return Response({"error": "bucket must be overdue, today or week"}, status=status.HTTP_400_BAD_REQUEST)
+        page = self.paginate_queryset(self.get_queryset())
+        response = self.get_paginated_response(serialize(self.get_serializer(page, many=True)))
+        response.data['counts'] = self.get_counts()
+        return response
+
+# "Log follow-up": count +1 (F()), remarks, reschedule — ek hi UPDATE
+class LogSalesTaskFollowUp(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        serializer = FollowUpSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        if changes.get('next_follow_up') and 'status' not in changes:
+            changes['status'] = 'Rescheduled'
+
+        user = request.user
+        queryset = SalesTask.objects.filter(pk=pk)
+        if not roles.is_team_member(user):
+            queryset = queryset.filter(owner_id=user.pk)
+        # Read-modify-PATCH ki jagah atomic increment: do log ek saath aaye to bhi count sahi
+        if not queryset.update(follow_up_count=F('follow_up_count') + 1, **changes):
+            return Response({"error": "Sales task not found"}, status=status.HTTP_404_NOT_FOUND)
+        records_changed.send(sender=SalesTask, pks=[pk], deleted=False, using='default')
+
+        task = SalesTask.objects.get(pk=pk)
+        return Response(SalesTaskSerializer(task, context={'request': request}).data)
 
 # ==========================================
 #       TECH TEAM VIEWS (Strictly Private)
@@ -169,12 +438,13 @@ class TaskListCreate(BaseListCreateView):
     # Security: Tech can Edit, Others (Sales) can only Read (GET)
     permission_classes = [permissions.IsAuthenticated, IsTechTeamOrReadOnly]
     search_fields = ['task_name', 'company_name', 'status', 'priority']
+    keyset_ordering = ('-date', '-id')
 
     def get_queryset(self):
         # 👇👇👇 CHANGE: Added 'Sales' to allow visibility
-        if self.request.user.groups.filter(name__in=['Tech', 'Sales']).exists() or self.request.user.is_superuser:
-            return Task.objects.all().order_by('-date')
-        return Task.objects.filter(owner=self.request.user)
+        if roles.is_team_member(self.request.user):
+            return Task.objects.all().order_by('-date', '-id')
+        return Task.objects.filter(owner_id=self.request.user.pk).order_by('-date', '-id')
 
 class TaskDetail(BaseDetailView):
     serializer_class = TaskSerializer
@@ -191,11 +461,13 @@ class TenderListCreate(BaseListCreateView):
     model = Tender
     permission_classes = [permissions.IsAuthenticated, IsTechTeamOrReadOnly]
     search_fields = ['company', 'bid_no', 'status']
+    keyset_ordering = ('-date', '-id')
+    team_roles = (roles.TECH,)
 
     def get_queryset(self):
-        if self.request.user.groups.filter(name='Tech').exists() or self.request.user.is_superuser:
-            return Tender.objects.all().order_by('-date')
-        return Tender.objects.filter(owner=self.request.user)
+        if roles.is_team_member(self.request.user, roles.TECH):
+            return Tender.objects.all().order_by('-date', '-id')
+        return Tender.objects.filter(owner_id=self.request.user.pk).order_by('-date', '-id')
 
 class TenderDetail(BaseDetailView):
     serializer_class = TenderSerializer
@@ -203,9 +475,9 @@ class TenderDetail(BaseDetailView):
     permission_classes = [permissions.IsAuthenticated, IsTechTeamOrReadOnly]
     
     def get_queryset(self):
-        if self.request.user.groups.filter(name='Tech').exists() or self.request.user.is_superuser:
+        if roles.is_team_member(self.request.user, roles.TECH):
             return Tender.objects.all()
-        return Tender.objects.filter(owner=self.request.user)
+        return Tender.objects.filter(owner_id=self.request.user.pk)
 
 # 7. Tech Data (Strictly Tech Only)
 class TechDataListCreate(BaseListCreateView):
@@ -215,12 +487,16 @@ class TechDataListCreate(BaseListCreateView):
     search_fields = ['company', 'machine', 'serial']
 
     def get_queryset(self):
-        if self.request.user.groups.filter(name='Tech').exists() or self.request.user.is_superuser:
+        if roles.is_team_member(self.request.user, roles.TECH):
             return TechData.objects.all().order_by('-id')
         
         # Sales view logic handled by Frontend (Read Only) + Permission (IsTechTeamOrReadOnly)
         return TechData.objects.all().order_by('-id')
 
+    def get_tombstone_owner(self):
+        # List sabko poori dikhti hai, to deletes bhi sab
+        return None
+
 class TechDataDetail(BaseDetailView):
     serializer_class = TechDataSerializer
     model = TechData
@@ -240,40 +516,33 @@ class ConvertLeadToPayment(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
+        # Receipt sirf stage hota hai; storage upload commit ke baad background me
+        upload = request.FILES.get('receipt')
+        staged = receipts.stage(upload) if upload else None
+        receipt_fields = receipts.pending_fields(staged) if staged else {}
         try:
-            lead = Lead.objects.get(pk=pk)
-            data = request.data
-            
-            if lead.status == 'Converted':
-                pass 
-
-            lead.status = 'Converted'
-            lead.save()
-
-            Payment.objects.create(
-                owner=request.user,
-                company=lead.company,
-                
-                # 👇👇👇 MAGIC LINE (ISKO DHYAN SE DEKH) 👇👇👇
-                # Iska matlab: Agar S.No bhara hai to wahi le, 
-                # Agar khali hai to Lead ki ID (Ex: 45) ko S.No bana de.
-                sno=lead.sno if lead.sno else str(lead.id), 
-                # 👆👆👆 UPDATE END 👆👆👆
-                
-                so_no=data.get('so_no', 'N/A'),
-                amount=data.get('amount', 0),
-                advance=data.get('advance', 0),
-                remaining=data.get('remaining', 0),
-                invoice=data.get('invoice', 'Pending'),
-                remark=data.get('remark', f"Converted from Lead: {lead.name}"),
-                receipt=data.get('receipt') 
-            )
-
-            return Response({"message": "Deal finalized & Receipt Saved!"}, status=status.HTTP_200_OK)
+            # Lead Converted + Payment ek transaction me: payment fail = lead bhi nahi badli
+            with transaction.atomic():
+                lead = Lead.objects.select_for_update().get(pk=pk)
+                lead.status = 'Converted'
+                lead.save()
+
+                payment = conversions.payment_for(lead, request.user, request.data, **receipt_fields)
+                payment.save()
+                if receipt_fields:
+                    receipts.schedule(payment)
+
+            return Response({
+                "message": "Deal finalized & Receipt Saved!",
+                "payment_id": payment.pk,
+                "receipt_status": payment.receipt_status,
+            }, status=status.HTTP_200_OK)
 
         except Lead.DoesNotExist:
+            receipts.discard(staged)
             return Response({"error": "Lead not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
+             receipts.discard(staged)
              print("Error saving payment:", str(e)) 
              return Response({"error": f"Database error: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -313,30 +582,66 @@ class MoveLeadToSalesTask(APIView):
 
     def post(self, request, pk):
         try:
-            lead = Lead.objects.get(pk=pk) 
-            data = request.data
-            
-            SalesTask.objects.create(
-                owner=request.user,
-                date=date.today(),
-                lead_name=lead.name,
-                company=lead.company,
-                contact=lead.contact,
-                task_type="Call", 
-                next_follow_up=data.get('next_follow_up'),
-                priority=data.get('priority', 'Medium'),
-                remarks=data.get('remarks', f"Moved from Leads. Purpose: {lead.purpose}"),
-                status="Pending"
-            )
-            
-            lead.status = 'Interested' 
-            lead.save()
+            with transaction.atomic():
+                lead = Lead.objects.select_for_update().get(pk=pk)
+                conversions.sales_task_for(lead, request.user, request.data).save()
+
+                lead.status = 'Interested' 
+                lead.save()
             return Response({"message": "Added to Sales Task Manager!"}, status=status.HTTP_200_OK)
 
         except Lead.DoesNotExist:
             return Response({"error": "Lead not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
+# 3b. Batch: bahut saari leads ek request me (quarter-end conversion runs)
+#   POST leads/convert/        {"items": [{"id": 1, "amount": 5000, "so_no": "SO-9"}, ...], "defaults": {...}}
+#   POST leads/to-sales-task/  {"items": [{"id": 1, "next_follow_up": "2025-01-10"}, ...]}
+class LeadBatchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    item_serializer_class = None
+    count_key = None
+
+    def post(self, request):
+        items = request.data.get('items')
+        defaults = request.data.get('defaults') or {}
+        if not isinstance(items, list) or not items:
+            return Response({"error": "No items provided"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(defaults, dict):
+            return Response({"error": "`defaults` must be an object"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > bulk.max_rows():
+            return Response({"error": f"At most {bulk.max_rows()} items per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Har item = defaults + apna payload; ek bhi galat = kuch nahi likha jata
+        serializer = self.item_serializer_class(
+            data=[{**defaults, **item} if isinstance(item, dict) else item for item in items], many=True,
+        )
+        if not serializer.is_valid():
+            invalid = [
+                {'id': item.get('id') if isinstance(item, dict) else None, 'status': 'invalid', 'errors': errors}
+                for item, errors in zip(items, serializer.errors) if errors
+            ]
+            return Response({"error": "Invalid items", "results": invalid}, status=status.HTTP_400_BAD_REQUEST)
+
+        count, results = self.run(request.user, serializer.validated_data)
+        return Response({self.count_key: count, "results": results}, status=status.HTTP_200_OK)
+
+class LeadBatchConvert(LeadBatchView):
+    item_serializer_class = LeadConversionSerializer
+    count_key = 'converted'
+
+    def run(self, user, items):
+        return conversions.convert_leads(user, items)
+
+class LeadBatchToSalesTask(LeadBatchView):
+    item_serializer_class = LeadFollowUpMoveSerializer
+    count_key = 'moved'
+
+    def run(self, user, items):
+        return conversions.move_leads_to_sales_tasks(user, items)
+
+
 # ==========================================
 #       BULK OPERATIONS
 # ==========================================
@@ -348,87 +653,225 @@ class LeadBulkImport(APIView):
     def post(self, request):
         if not isinstance(request.data, list):
             return Response({"error": "Data must be a list"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        serializer = LeadSerializer(data=request.data, many=True, context={'request': request})
-        if serializer.is_valid():
-            serializer.save(owner=request.user)
-            return Response({"message": f"Imported {len(request.data)} leads!"}, status=status.HTTP_201_CREATED)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-# 5. Bulk Delete
-class LeadBulkDelete(APIView):
+        # Frontend ka JSON import: synchronous 201 {"message"} / 400 per-row errors (contract
+        # wahi). Badi files ke liye leads/import/ (background job + progress).
+        serializer = LeadSerializer(data=request.data, many=True, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Ek-ek INSERT ki jagah batches me bulk_create, sab ek transaction me
+        batch_size = settings.CRM_IMPORT_BATCH_SIZE
+        policy = fingerprints.get_policy(request.query_params.get('on_duplicate'))
+        rows = serializer.validated_data
+        created, duplicates = 0, []
+        with transaction.atomic():
+            for start in range(0, len(rows), batch_size):
+                result = imports.write_leads(
+                    rows[start:start + batch_size], request.user, policy,
+                    range(start + 1, start + batch_size + 1),
+                )
+                created += len(result.created)
+                duplicates += result.duplicates
+        return Response(
+            {"message": f"Imported {created} leads!", "duplicates": duplicates},
+            status=status.HTTP_201_CREATED,
+        )
+
+# 4b. Streaming Import (CSV / XLSX upload ya NDJSON stream -> background job)
+class LeadImport(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
 
     def post(self, request):
-        ids = request.data.get('ids', [])
-        if not ids:
-            return Response({"error": "No IDs provided"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        deleted_count, _ = Lead.objects.filter(id__in=ids).delete()
-        return Response({"message": f"Deleted {deleted_count} leads!"}, status=status.HTTP_200_OK)
-    
+        try:
+            batch_size = int(request.query_params.get('batch_size', settings.CRM_IMPORT_BATCH_SIZE))
+        except ValueError:
+            batch_size = settings.CRM_IMPORT_BATCH_SIZE
+        batch_size = max(1, min(batch_size, settings.CRM_IMPORT_MAX_BATCH_SIZE))
+
+        if request.content_type.startswith(('application/x-ndjson', 'application/jsonl')):
+            # Body seedha disk pe stream karo, memory me poora load nahi
+            if request.stream is None:
+                return Response({"error": "Empty NDJSON body"}, status=status.HTTP_400_BAD_REQUEST)
+            source_format = 'ndjson'
+            staged = imports.stage_stream(request.stream, 'ndjson')
+        else:
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({"error": "Upload a CSV/XLSX 'file' or send an NDJSON body"}, status=status.HTTP_400_BAD_REQUEST)
+            source_format = upload.name.rsplit('.', 1)[-1].lower()
+            if source_format not in ('csv', 'xlsx', 'ndjson'):
+                return Response({"error": "Only .csv, .xlsx and .ndjson files are supported"}, status=status.HTTP_400_BAD_REQUEST)
+            staged = imports.stage_stream(upload, source_format)
+
+        job = ImportJob.objects.create(
+            owner=request.user,
+            source_format=source_format,
+            staged_file=staged,
+            batch_size=batch_size,
+            duplicate_policy=fingerprints.get_policy(request.query_params.get('on_duplicate')),
+        )
+        queued = imports.start_import(job)
+        data = ImportJobSerializer(job).data
+        data['job_id'] = queued.pk
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+class ImportJobDetail(generics.RetrieveAPIView):
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_superuser:
+            return ImportJob.objects.all()
+        return ImportJob.objects.filter(owner_id=self.request.user.pk)
 
-class DashboardStats(APIView):
+# 4c. Background Jobs (status + progress)
+class JobList(generics.ListAPIView):
+    serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+
+    def get_queryset(self):
+        queryset = Job.objects.order_by('-id')
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(owner_id=self.request.user.pk)
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
+
+class JobDetail(generics.RetrieveAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_superuser:
+            return Job.objects.all()
+        return Job.objects.filter(owner_id=self.request.user.pk)
+
+class DashboardStats(ConditionalGetMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    etag_models = dashboard.DASHBOARD_MODELS
+
+    def get_etag_extra(self):
+        return [date.today()]
 
     def get(self, request):
+        return self.conditional_get(request, self.stats)
+
+    def stats(self, request):
+        # Counts conditional aggregates me, poora payload role-wise cache me
+        # (app/dashboard.py); model save/delete signals cache invalidate karte hain
+        return Response(dashboard.get_stats(request.user, date.today()))
+
+
+class RevenueAnalytics(ConditionalGetMixin, APIView):
+    """
+    analytics/revenue/?interval=day|week|month&group=total|owner|company&start=&end=&owner=<id>
+    Daily rollup table (app/rollups.py) se — Payment table scan nahi hoti. Sales team /
+    manager sab dekhte hain (dashboard revenue jaisa); baaki sirf apna owner series.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    etag_models = (RevenueDaily,)
+
+    def get_etag_extra(self):
+        return [date.today()]
+
+    def get(self, request):
+        return self.conditional_get(request, self.series)
+
+    def series(self, request):
+        params = request.query_params
+        interval = params.get('interval', 'month')
+        group = params.get('group', 'total')
+        if interval not in rollups.INTERVALS:
+            return Response({"error": f"interval must be one of {', '.join(rollups.INTERVALS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if group not in rollups.GRAINS:
+            return Response({"error": f"group must be one of {', '.join(rollups.GRAINS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            end = parse_date(params['end']) if params.get('end') else date.today()
+            start = parse_date(params['start']) if params.get('start') else rollups.default_start(interval, end)
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({"error": "Invalid start / end date (YYYY-MM-DD)"}, status=status.HTTP_400_BAD_REQUEST)
+
+        owner = params.get('owner')
+        if owner is not None and not owner.isdigit():
+            return Response({"error": "owner must be a user id"}, status=status.HTTP_400_BAD_REQUEST)
         user = request.user
-        data = {}
-        today = date.today()
+        if not (user.is_superuser or roles.is_sales(user)):
+            if group == 'company':
+                return Response({"error": "Company breakdown is for the sales team only"},
+                                status=status.HTTP_403_FORBIDDEN)
+            owner = user.pk
+        if owner is not None:
+            group = 'owner'  # Ek owner ka series = owner grain
+
+        return Response({
+            "interval": interval,
+            "group": group,
+            "start": start,
+            "end": end,
+            "results": rollups.series(group, interval, start, end, owner_id=int(owner) if owner else None),
+        })
+
+class FunnelAnalytics(ConditionalGetMixin, APIView):
+    """
+    analytics/funnel/?interval=day|week|month&start=&end= — har period me har status ke
+    entered / exited / avg_days_in_stage + new -> converted rate. Sirf FunnelDaily counters
+    (app/funnel.py) padhe jaate hain, Lead table nahi. Sales team / manager ke liye.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    etag_models = (FunnelDaily,)
 
-        # --- 1. CHECK ROLE ---
-        is_sales = user.groups.filter(name='Sales').exists()
-        is_tech = user.groups.filter(name='Tech').exists()
-        is_manager = user.is_superuser
+    def get_etag_extra(self):
+        return [date.today()]
 
-        # --- 2. GATHER DATA BASED ON ROLE ---
-        
-        # 🟢 SALES DATA (Sales & Manager ke liye)
-        if is_sales or is_manager:
-            # Leads Info
-            leads_qs = Lead.objects.all() if is_manager else Lead.objects.all() 
-            
-            data['total_leads'] = leads_qs.count()
-            data['new_leads'] = leads_qs.filter(status='New').count()
-            data['interested_leads'] = leads_qs.filter(status='Interested').count()
-            data['converted_leads'] = leads_qs.filter(status='Converted').count()
-            
-            # Todays Follow Ups
-            data['todays_calls'] = SalesTask.objects.filter(next_follow_up=today).count()
+    def get(self, request):
+        return self.conditional_get(request, self.series)
+
+    def series(self, request):
+        user = request.user
+        if not (user.is_superuser or roles.is_sales(user)):
+            return Response({"error": "Funnel analytics are for the sales team only"},
+                            status=status.HTTP_403_FORBIDDEN)
+        params = request.query_params
+        interval = params.get('interval', 'month')
+        if interval not in rollups.INTERVALS:
+            return Response({"error": f"interval must be one of {', '.join(rollups.INTERVALS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end = parse_date(params['end']) if params.get('end') else date.today()
+            start = parse_date(params['start']) if params.get('start') else rollups.default_start(interval, end)
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({"error": "Invalid start / end date (YYYY-MM-DD)"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # --- 💰 REVENUE LOGIC ---
-            payment_qs = Payment.objects.all() 
+        return Response({
+            "interval": interval,
+            "start": start,
+            "end": end,
+            "results": funnel.series(interval, start, end),
+        })
 
-            revenue = payment_qs.aggregate(Sum('amount'))['amount__sum'] or 0
-            data['total_revenue'] = revenue
 
-            # --- 🏆 LEADERBOARD ---
-            if is_manager:
-                leaderboard = Payment.objects.values('owner__username').annotate(total_amount=Sum('amount')).order_by('-total_amount')
-                data['leaderboard'] = leaderboard
-            
-            # --- 🕒 RECENT TRANSACTIONS ---
-            recent_payments = payment_qs.order_by('-date', '-id')[:5]
-            data['recent_payments'] = [
-                {
-                    'company': p.company,
-                    'amount': p.amount,
-                    'date': p.date,
-                    'by': p.owner.username
-                } for p in recent_payments
-            ]
 
-        # 🔴 TECH DATA (Tech & Manager ke liye)
-        if is_tech or is_manager:
-            tasks_qs = Task.objects.all() 
-            data['pending_tasks'] = tasks_qs.filter(status='Pending').count()
-            data['high_priority_tasks'] = tasks_qs.filter(priority='High', status='Pending').count()
-            data['service_due'] = TechData.objects.filter(service_due__gte=today).count()
-            data['active_tenders'] = Tender.objects.exclude(status__in=['Won', 'Lost']).count()
+# ==========================================
+#       PERF STATS (Admin only 📊)
+# ==========================================
+class PerfStats(APIView):
+    permission_classes = [permissions.IsAdminUser]
 
-        if is_manager: data['role_view'] = 'Manager'
-        elif is_tech: data['role_view'] = 'Tech'
-        else: data['role_view'] = 'Sales'
+    def get(self, request):
+        # Per-view aggregates isi worker process ke hain
+        return Response(perf.view_stats.snapshot())
 
-        return Response(data)
\ No newline at end of file
+    def delete(self, request):
+        perf.view_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -5,6 +5,7 @@ Django settings for backend project.
 from pathlib import Path
 from datetime import timedelta
 import dj_database_url
+from corsheaders.defaults import default_headers
 import os
 
 # 👇 Zaroori Imports Cloudinary ke liye
@@ -48,9 +49,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Sabse upar taaki poori request ka time/SQL count ho (Server-Timing header)
+    'app.middleware.PerformanceMiddleware',
+    # Safe-method reads replica pe (agar DATABASE_REPLICA_URL set hai)
+    'app.middleware.ReplicaRoutingMiddleware',
+    # Bade JSON responses gzip / brotli (body likhne waale sab middlewares iske neeche)
+    'app.middleware.CompressionMiddleware',
+
     # FIX 2: Whitenoise for static files (Security ke neeche)
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
+    # WhiteNoise ka sync+async wrapper (ASGI pe async views thread me na jayein)
+    'app.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     
     # FIX 3: CORS middleware upar hona chahiye
@@ -83,11 +92,40 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 
 # Database (dj-database-url handles Render connection)
+# Persistent connections: DB_CONN_MAX_AGE seconds (0 = har request naya connection),
+# DB_CONN_HEALTH_CHECKS=True -> reuse se pehle connection check hota hai
 DATABASES = {
     'default': dj_database_url.config(
         default='sqlite:///db.sqlite3',
-        conn_max_age=0
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', '0')),
+        conn_health_checks=os.environ.get('DB_CONN_HEALTH_CHECKS', 'False') == 'True',
+    )
+}
+
+# Optional read replica: list/detail GETs, DashboardStats, exports yahan se padhte hain
+# (app/db_router.py). Na ho to sab kuch 'default' pe.
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.environ['DATABASE_REPLICA_URL'],
+        conn_max_age=int(os.environ.get('DB_REPLICA_CONN_MAX_AGE', os.environ.get('DB_CONN_MAX_AGE', '0'))),
+        conn_health_checks=os.environ.get('DB_REPLICA_CONN_HEALTH_CHECKS', os.environ.get('DB_CONN_HEALTH_CHECKS', 'False')) == 'True',
+        test_options={'MIRROR': 'default'},
     )
+
+DATABASE_ROUTERS = ['app.db_router.PrimaryReplicaRouter']
+
+
+# --- Cache ---
+# Default LocMem (per worker). Ek se zyada gunicorn workers ya alag `run_jobs` worker
+# ho to shared cache do, warna invalidation sirf usi process tak pahunchega, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://...
+# LocMem pe role cache / JWT claim auth / token replica pins off rehte hain aur
+# run_jobs start nahi hota (app/caching.py, `check --deploy` warning app.W001).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'crm-default'),
+    }
 }
 
 
@@ -114,8 +152,9 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # 👇👇👇 UPDATED FOR DJANGO 5.0+ (Ye zaroori tha) 👇👇👇
 STORAGES = {
     # Media files (Images) ke liye Cloudinary
+    # Local/tests: MEDIA_STORAGE_BACKEND=django.core.files.storage.FileSystemStorage
     "default": {
-        "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
+        "BACKEND": os.environ.get('MEDIA_STORAGE_BACKEND', 'cloudinary_storage.storage.MediaCloudinaryStorage'),
     },
     # CSS/JS files ke liye Whitenoise
     "staticfiles": {
@@ -127,7 +166,13 @@ STORAGES = {
 # --- DRF & JWT Config ---
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication jaisa hi, par GET pe user token claims se (app/auth.py)
+        'app.auth.ClaimsJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        # orjson se render, output DRF JSONRenderer jaisa hi (app/renderers.py)
+        'app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
 }
 
@@ -140,6 +185,9 @@ SIMPLE_JWT = {
 # --- CORS CONFIG ---
 # Sabhi origins allow kar rahe hain taaki frontend se issue na aaye
 CORS_ALLOW_ALL_ORIGINS = True
+# Replica pin header (app/db_router.py): SPA response se padhta hai aur wapas bhejta hai
+CORS_EXPOSE_HEADERS = ['X-CRM-Primary-Pin']
+CORS_ALLOW_HEADERS = (*default_headers, 'x-crm-primary-pin')
 
 
 # Default primary key field type
@@ -159,4 +207,96 @@ CLOUDINARY_STORAGE = {
 
 # Media URL ab Cloudinary ka link banega
 MEDIA_URL = '/media/' 
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# ==========================================
+# 👇👇 CRM PERFORMANCE KNOBS 👇👇
+# ==========================================
+
+# User ke groups (Sales/Tech) kitne seconds tak cache me rakhne hain.
+# 0 = sirf per-request memo (har request pe ek query). Unset = shared cache pe 300,
+# LocMem pe off — wahan dusre worker ka group change is worker ke cache tak nahi pahunchta.
+CRM_ROLE_CACHE_TIMEOUT = (
+    int(os.environ['CRM_ROLE_CACHE_TIMEOUT']) if 'CRM_ROLE_CACHE_TIMEOUT' in os.environ else None
+)
+
+# Dashboard payload cache (seconds). 0 = har baar DB se. Unset = shared cache pe 300,
+# LocMem pe off — dusre worker ke writes ka version bump is worker tak nahi pahunchta.
+CRM_DASHBOARD_CACHE_TIMEOUT = (
+    int(os.environ['CRM_DASHBOARD_CACHE_TIMEOUT']) if 'CRM_DASHBOARD_CACHE_TIMEOUT' in os.environ else None
+)
+
+# Per-request SQL/serializer timing + slow request log + perf/stats/ aggregates
+CRM_PERF_ENABLED = os.environ.get('CRM_PERF_ENABLED', 'True') == 'True'
+# Server-Timing header: 'off' | 'staff' (sirf is_staff users) | 'all'
+CRM_SERVER_TIMING = os.environ.get('CRM_SERVER_TIMING', 'off')
+CRM_SLOW_REQUEST_MS = int(os.environ.get('CRM_SLOW_REQUEST_MS', '500'))
+
+# Staged uploads DB me rehte hain (app/staging.py, worker alag machine pe bhi padh sake);
+# yahan sirf worker ki temp copies banti hain, kaam ke baad delete
+CRM_STAGING_ROOT = os.environ.get('CRM_STAGING_ROOT', os.path.join(BASE_DIR, 'staging'))
+
+# Lead import: bulk_create batch size + har job me kitne row errors store karne hain
+CRM_IMPORT_BATCH_SIZE = int(os.environ.get('CRM_IMPORT_BATCH_SIZE', '500'))
+CRM_IMPORT_MAX_BATCH_SIZE = 5000
+CRM_IMPORT_MAX_ERRORS = 1000
+
+# Lead/Customer duplicate (same company + phone + email): skip / merge / flag
+CRM_DUPLICATE_POLICY = os.environ.get('CRM_DUPLICATE_POLICY', 'flag')
+
+# Write ke baad itne seconds tak us client ke reads primary se (replica lag).
+# Signed cookie se; Bearer-only cross-origin clients ka pin sirf shared cache pe chalta hai.
+CRM_REPLICA_PIN_SECONDS = int(os.environ.get('CRM_REPLICA_PIN_SECONDS', '5'))
+
+# Delta sync (?since=): ek response me max rows, aakhri cursor kitna peeche rakhein
+# (slow transactions ke rows miss na hon), aur tombstones kitne din rakhne hain
+CRM_SYNC_PAGE_SIZE = int(os.environ.get('CRM_SYNC_PAGE_SIZE', '500'))
+CRM_SYNC_OVERLAP_SECONDS = int(os.environ.get('CRM_SYNC_OVERLAP_SECONDS', '5'))
+CRM_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('CRM_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Conditional GET (ETag / Last-Modified -> 304). Unset = sirf shared cache pe on: LocMem
+# me generation counters per worker hain, dusra worker purane data pe 304 de deta.
+# Generation counters kitni der cache me rahein; shared cache pe 0 = forever.
+CRM_CONDITIONAL_GET = (
+    None if os.environ.get('CRM_CONDITIONAL_GET') is None
+    else os.environ['CRM_CONDITIONAL_GET'] == 'True'
+)
+CRM_ETAG_GENERATION_TIMEOUT = int(os.environ.get('CRM_ETAG_GENERATION_TIMEOUT', '300')) or None
+
+# Receipt upload worker: kitni baar try karna hai, retries ke beech base backoff (seconds)
+CRM_RECEIPT_MAX_ATTEMPTS = int(os.environ.get('CRM_RECEIPT_MAX_ATTEMPTS', '5'))
+CRM_RECEIPT_RETRY_BACKOFF = float(os.environ.get('CRM_RECEIPT_RETRY_BACKOFF', '2'))
+
+# Background jobs (app/jobs.py, `manage.py run_jobs` worker). CRM_JOBS_INLINE=True = bina
+# worker ke isi (web) process me thread, retries bhi. Unset = inline jab tak cache shared
+# nahi (LocMem pe worker ke cache bumps web tak nahi pahunchte; tab run_jobs idle rehta hai).
+CRM_JOBS_INLINE = (
+    None if os.environ.get('CRM_JOBS_INLINE') is None
+    else os.environ['CRM_JOBS_INLINE'] == 'True'
+)
+CRM_JOB_WORKER_THREADS = int(os.environ.get('CRM_JOB_WORKER_THREADS', '4'))
+CRM_JOB_MAX_ATTEMPTS = int(os.environ.get('CRM_JOB_MAX_ATTEMPTS', '3'))
+CRM_JOB_RETRY_BACKOFF = int(os.environ.get('CRM_JOB_RETRY_BACKOFF', '10'))
+CRM_JOB_RETRY_BACKOFF_MAX = 3600
+CRM_JOB_STALE_SECONDS = int(os.environ.get('CRM_JOB_STALE_SECONDS', '300'))
+
+# JWT claims auth: safe-method requests pe user token claims se (DB lookup nahi).
+# Writes pe bhi claims chahiye to CRM_JWT_CLAIMS_FOR_WRITES=True.
+# Unset = sirf shared cache pe on: revoke markers LocMem me dusre workers tak nahi
+# pahunchte, to wahan hataya gaya user token expiry tak purane roles se padhta rehta.
+CRM_JWT_CLAIMS_AUTH = (
+    None if os.environ.get('CRM_JWT_CLAIMS_AUTH') is None
+    else os.environ['CRM_JWT_CLAIMS_AUTH'] == 'True'
+)
+CRM_JWT_CLAIMS_FOR_WRITES = os.environ.get('CRM_JWT_CLAIMS_FOR_WRITES', 'False') == 'True'
+
+# Bulk update / delete endpoints (app/bulk.py): ek request me itni rows tak
+CRM_BULK_MAX_ROWS = int(os.environ.get('CRM_BULK_MAX_ROWS', '1000'))
+
+# Response speed: orjson renderer (app/renderers.py), list endpoints .values() se bina
+# model instances (app/values.py), aur CRM_COMPRESS_MIN_BYTES se bade responses gzip /
+# brotli (brotli package installed ho tab). Quality 4 = gzip se chhota, gzip jitna tez.
+CRM_FAST_JSON = os.environ.get('CRM_FAST_JSON', 'True') == 'True'
+CRM_VALUES_LISTS = os.environ.get('CRM_VALUES_LISTS', 'True') == 'True'
+CRM_COMPRESS_MIN_BYTES = int(os.environ.get('CRM_COMPRESS_MIN_BYTES', '1024'))
+CRM_BROTLI_QUALITY = int(os.environ.get('CRM_BROTLI_QUALITY', '4'))
@@ -2449,7 +2449,7 @@ const LeadManager = () => {
       formData.append("so_no", paymentData.so_no);
       formData.append("amount", paymentData.amount);
       formData.append("advance", paymentData.advance);
-      formData.append("remaining", paymentData.remaining);
+      // remaining server ledger se calculate karta hai (read-only), bhejna nahi
       formData.append("invoice", paymentData.invoice);
       formData.append("remark", paymentData.remark);
 
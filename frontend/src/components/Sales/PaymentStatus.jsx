@@ -138,7 +138,7 @@ const PaymentStatus = () => {
     formData.append("so_no", currentEditData.so_no || "");
     formData.append("amount", parseFloat(currentEditData.amount) || 0);
     formData.append("advance", parseFloat(currentEditData.advance) || 0);
-    formData.append("remaining", parseFloat(currentEditData.remaining) || 0);
+    // remaining server ledger se calculate karta hai (read-only), bhejna nahi
     formData.append("invoice", currentEditData.invoice || "");
     formData.append("remark", currentEditData.remark || "");
 
@@ -442,7 +442,7 @@ const PaymentStatus = () => {
     formData.append("so_no", newPay.so_no);
     formData.append("amount", parseFloat(newPay.amount) || 0);
     formData.append("advance", parseFloat(newPay.advance) || 0);
-    formData.append("remaining", parseFloat(newPay.remaining) || 0);
+    // remaining server ledger se calculate karta hai (read-only), bhejna nahi
     formData.append("invoice", newPay.invoice);
     formData.append("remark", newPay.remark);
 
@@ -1,9 +1,30 @@
 import { StrictMode } from 'react'
 import { createRoot } from 'react-dom/client'
+import axios from 'axios';
 import'bootstrap/dist/css/bootstrap.min.css';
- 
+
 import App from './App.jsx'
 
+// Write ke baad backend ek signed pin header bhejta hai; agle kuch second wahi header
+// wapas bhejo taaki reads replica ki jagah primary se aayein (apna naya data turant dikhe).
+// Cross-origin hone ki wajah se pin cookie yahan kaam nahi karti.
+const PIN_HEADER = 'x-crm-primary-pin';
+let primaryPin = null;
+
+axios.interceptors.response.use(
+  (response) => {
+    if (response.headers?.[PIN_HEADER]) primaryPin = response.headers[PIN_HEADER];
+    return response;
+  },
+  (error) => Promise.reject(error),
+);
+
+axios.interceptors.request.use((config) => {
+  // Expiry backend check karta hai (signed timestamp)
+  if (primaryPin) config.headers[PIN_HEADER] = primaryPin;
+  return config;
+});
+
 createRoot(document.getElementById('root')).render(
   <StrictMode>
     <App />